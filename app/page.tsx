@@ -7,7 +7,7 @@ import { Button } from "@/components/ui/button"
 import { Card, CardContent } from "@/components/ui/card"
 import { ArrowRight } from "lucide-react"
 
-import { getProjects, getHomeStats, getTestimonials, getAllContentSections } from "@/lib/api-client"
+import { getHomepageBundle } from "@/lib/api-client"
 import type { Project, Testimonial, HomeStats, ContentSection } from "@/lib/types"
 
 export default function HomePage() {
@@ -21,20 +21,14 @@ export default function HomePage() {
   useEffect(() => {
     async function fetchData() {
       try {
-        const [contentData, statsData, testimonialsData, projectsData] = await Promise.all([
-          getAllContentSections(),
-          getHomeStats(),
-          getTestimonials(true),
-          getProjects()
-        ])
+        // One request for everything below; the bundle holds featured projects and testimonials only
+        const bundle = await getHomepageBundle(["projects", "testimonials", "home-stats", "content"])
 
-        if (contentData) {
-          setHeroContent(contentData.find(s => s.section === 'hero') || null)
-          setMissionContent(contentData.find(s => s.section === 'mission') || null)
-        }
-        setStats(statsData)
-        setTestimonials(testimonialsData)
-        setProjects(projectsData.filter(p => p.featured).slice(0, 3))
+        setHeroContent(bundle.content.find(s => s.section === 'hero') || null)
+        setMissionContent(bundle.content.find(s => s.section === 'mission') || null)
+        setStats(bundle.homeStats)
+        setTestimonials(bundle.testimonials)
+        setProjects(bundle.projects.slice(0, 3))
 
       } catch (error) {
         console.error("Error fetching homepage data:", error)
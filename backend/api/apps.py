@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        # Connect signal receivers (content version bumps, image variants, SQL
+        # timing, token revocation, snapshot rebuilds)
+        from . import signals, versions, images, metrics, authentication, snapshots, tags  # noqa: F401
@@ -0,0 +1,168 @@
+"""
+Async, read-only variants of the public GET endpoints.
+
+Served under `/api/async/<resource>/` and `/api/async/<resource>/<id>/` with
+the same filters, `?q=` search, `?fields=`/`?omit=`, pagination and errors,
+and byte-identical JSON, as the DRF viewsets (they reuse the `.values()`
+serializers, the paginators and the configured JSON renderer), but as native async views
+using the async ORM, so under an ASGI server (uvicorn) a request waiting on
+the database does not tie up a thread. They share the response cache and the
+ETag/Last-Modified validators (see api.conditional) with the viewsets; an
+unknown resource is a JSON 404. Writes stay on the sync viewsets.
+"""
+import functools
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from . import cache
+from .conditional import set_validators, validators
+from .metrics import timed
+from .pagination import KeysetPagination, SearchPagination
+from .renderers import get_renderer
+from .search import SEARCH_FIELDS, search
+from .tags import filter_by_tags, parse_tag_mode
+from .versions import aget_state
+from .models import Project, Testimonial, Service, HomeStats, ContentSection, ContactInfo
+from .serializers import (
+    ProjectValuesSerializer, TestimonialValuesSerializer, ServiceValuesSerializer,
+    HomeStatsValuesSerializer, ContentSectionValuesSerializer, ContactInfoValuesSerializer,
+)
+
+
+def filter_featured(queryset, params, paginated):
+    if params.get('featured') == 'true':
+        queryset = queryset.filter(featured=True)
+    return queryset
+
+
+def filter_projects(queryset, params, paginated):
+    queryset = filter_featured(queryset, params, paginated)
+    queryset = filter_by_tags(queryset, params.getlist('tag'), parse_tag_mode(params))
+    limit = params.get('limit')
+    if limit and limit.isdigit() and not paginated:
+        queryset = queryset[:int(limit)]
+    return queryset
+
+
+def filter_content(queryset, params, paginated):
+    section = params.get('section')
+    if section:
+        queryset = queryset.filter(section=section)
+    return queryset
+
+
+# name: (model, serializer, filter, pagination class), as on the viewsets
+RESOURCES = {
+    'projects': (Project, ProjectValuesSerializer, filter_projects, KeysetPagination),
+    'testimonials': (Testimonial, TestimonialValuesSerializer, filter_featured, KeysetPagination),
+    'services': (Service, ServiceValuesSerializer, None, None),
+    'home-stats': (HomeStats, HomeStatsValuesSerializer, None, None),
+    'content': (ContentSection, ContentSectionValuesSerializer, filter_content, None),
+    'contact-info': (ContactInfo, ContactInfoValuesSerializer, None, None),
+}
+
+renderer = get_renderer()
+
+
+def json_response(data, status=200):
+    return HttpResponse(renderer.render(data), status=status, content_type='application/json')
+
+
+def error_response(exc):
+    """The response DRF's exception handler gives for a 400 or 404 raised by the shared helpers."""
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return json_response(detail, status=exc.status_code)
+
+
+def resource_view(view):
+    """
+    Answer unknown resources with a JSON 404, conditional requests with a 304,
+    and serve and fill the API response cache, as the viewsets' mixins do.
+    The content versions are read once for all three.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, resource, *args, **kwargs):
+        if resource not in RESOURCES:
+            return json_response({'detail': f'Unknown resource: {resource}'}, status=404)
+        models = [RESOURCES[resource][0]]
+        state = await aget_state(models)
+        etag, last_modified = validators(request, models, state)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            set_validators(response, etag, last_modified)
+            return response
+
+        key = None
+        if cache.enabled():
+            key, response = await cache.alookup(request, state[0])
+            if response is not None:
+                return response
+        response = await view(request, resource, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        if key is not None:
+            await cache.astore(key, response)
+        return response
+    return wrapper
+
+
+def get_paginator(pagination_class, request, query):
+    """The paginator of the page requested, or None for a plain array (see SearchMixin)."""
+    if query:
+        return SearchPagination()
+    if pagination_class is not None and pagination_class().is_requested(request):
+        return pagination_class()
+    return None
+
+
+@require_safe
+@resource_view
+async def resource_list(request, resource):
+    model, serializer_class, filter_queryset, pagination_class = RESOURCES[resource]
+    params = request.GET
+    query = params.get('q', '').strip() if model in SEARCH_FIELDS else ''
+    drf_request = Request(request)  # query_params and build_absolute_uri() for the paginators
+    try:
+        fields = serializer_class.sparse_fields(params)
+        paginator = get_paginator(pagination_class, drf_request, query)
+        queryset = model.objects.all()
+        if filter_queryset:
+            queryset = filter_queryset(queryset, params, paginated=paginator is not None)
+        if query:
+            queryset = search(queryset, query)
+        columns = serializer_class.columns if fields is None else serializer_class.columns_for(fields)
+        queryset = queryset.values(*columns)
+        if paginator is not None:
+            queryset = paginator.page_queryset(queryset, drf_request)
+    except APIException as e:
+        return error_response(e)
+
+    rows = [row async for row in queryset]
+    if paginator is not None:
+        rows = paginator.take_page(rows)
+    with timed('serialize'):
+        data = serializer_class(rows, context={'request': request}, fields=fields).data
+    if paginator is not None:
+        data = {'next': paginator.get_next_link(), 'results': data}
+    return json_response(data)
+
+
+@require_safe
+@resource_view
+async def resource_detail(request, resource, pk):
+    model, serializer_class, _, _ = RESOURCES[resource]
+    try:
+        fields = serializer_class.sparse_fields(request.GET)
+    except APIException as e:
+        return error_response(e)
+    columns = serializer_class.columns if fields is None else serializer_class.columns_for(fields)
+    try:
+        row = await model.objects.values(*columns).aget(pk=pk)
+    except model.DoesNotExist:
+        return json_response({'detail': 'No %s matches the given query.' % model._meta.object_name}, status=404)
+    with timed('serialize'):
+        return json_response(serializer_class([row], context={'request': request}, fields=fields).data[0])
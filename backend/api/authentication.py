@@ -0,0 +1,158 @@
+"""
+JWT authentication for the API.
+
+Tokens carry the user's `is_staff` and `is_superuser` flags as claims, so
+`StatelessJWTAuthentication` can authorize admin writes from the token alone,
+without loading the user row. Turning an account off, or changing its flags,
+records the time in the `API_AUTH_CACHE_ALIAS` cache; tokens issued before
+that are refused until they would have expired anyway. That cache holds
+nothing else and is shared between processes (see API_AUTH_CACHE in the
+settings), so a revocation is neither evicted by other entries nor missed by
+another worker. Refreshing a token re-reads the flags from the database.
+
+Times are in microseconds: tokens carry their issue time in ISSUED_CLAIM,
+`iat` having whole seconds only, so a token issued right after a change in
+the same second is not refused. A revocation is recorded on save and again
+once the change commits, so a token whose flags were read before the commit
+is refused too.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework_simplejwt import authentication, serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .metrics import timed
+
+CLAIM_FIELDS = ('is_staff', 'is_superuser')
+REVOKING_FIELDS = ('is_active', *CLAIM_FIELDS)
+ISSUED_CLAIM = 'iat_us'
+
+
+def now_us():
+    return time.time_ns() // 1000
+
+
+def add_claims(token, user, issued_at=None):
+    """Set the claims of `user` on `token`, as read at `issued_at` (microseconds, now by default)."""
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[ISSUED_CLAIM] = now_us() if issued_at is None else issued_at
+    return token
+
+
+def get_auth_cache():
+    return caches[settings.API_AUTH_CACHE_ALIAS]
+
+
+def revoked_key(user_id):
+    return f'api:auth:revoked:{user_id}'
+
+
+def revoke(user_id):
+    """Refuse every token of `user_id` issued up to now."""
+    lifetime = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    get_auth_cache().set(revoked_key(user_id), now_us(), int(lifetime) + 1)
+
+
+def revoke_on_commit(user_id):
+    """`revoke()` now, for this process to see at once, and after the current transaction commits."""
+    revoke(user_id)
+    transaction.on_commit(lambda: revoke(user_id))
+
+
+def issued_at(token):
+    if ISSUED_CLAIM in token:
+        return token[ISSUED_CLAIM]
+    return (token.get('iat', 0) + 1) * 1_000_000 - 1  # Whole seconds: assume the end of the second
+
+
+def is_revoked(token):
+    revoked_at = get_auth_cache().get(revoked_key(token[api_settings.USER_ID_CLAIM]))
+    return revoked_at is not None and issued_at(token) <= revoked_at
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def _remember_flags(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields is not None and not set(update_fields) & set(REVOKING_FIELDS)):
+        return
+    instance._api_auth_flags = sender.objects.filter(pk=instance.pk).values(*REVOKING_FIELDS).first()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def _revoke_on_change(sender, instance, created, **kwargs):
+    before = getattr(instance, '_api_auth_flags', None)
+    if before and any(before[field] != getattr(instance, field) for field in REVOKING_FIELDS):
+        revoke_on_commit(getattr(instance, api_settings.USER_ID_FIELD))
+    instance._api_auth_flags = None
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def _revoke_on_delete(sender, instance, **kwargs):
+    revoke_on_commit(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+class TokenObtainPairSerializer(serializers.TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_claims(super().get_token(user), user)
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    """
+    simplejwt's refresh, issuing the current claims rather than the ones copied
+    from the refresh token. The user is read once, for both the active check
+    and the claims.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        issued = now_us()  # Before the flags are read: see is_revoked()
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        add_claims(refresh, user, issued)  # Copied to the access token
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:  # The blacklist app is not installed
+                    pass
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """simplejwt's authentication, with its time reported as the `auth` phase of api.metrics."""
+
+    def authenticate(self, request):
+        with timed('auth'):
+            return super().authenticate(request)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Trust the claims of a valid, unrevoked token instead of loading the user.
+    `request.user` is a simplejwt `TokenUser`. Tokens issued before the claims
+    existed fall back to the database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if not all(field in validated_token for field in CLAIM_FIELDS):
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM in validated_token and is_revoked(validated_token):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return api_settings.TOKEN_USER_CLASS(validated_token)
@@ -0,0 +1,146 @@
+"""
+Batch writes for the admin UI.
+
+`POST <resource>/bulk/` applies a list of creates, updates and deletes in one
+transaction:
+
+    {"create": [{...}, ...], "update": [{"id": "3", ...}, ...], "delete": ["4", "5"]}
+
+`POST <resource>/reorder/` with `{"ids": [...]}` rewrites `order` to match the
+list position in a single UPDATE.
+
+Either way the change notification (cache invalidation, content versions)
+fires once per batch instead of once per row. Ids that match no row are
+rejected with a 400, for updates and deletes alike. Rows written with a new
+image get their responsive variants queued (see api.images), which bulk
+writes would otherwise skip along with post_save.
+"""
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .images import schedule_variants
+from .signals import batched_changes, changed
+
+
+def parse_ids(values, field):
+    if not isinstance(values, list):
+        raise ValidationError({field: 'Expected a list of ids.'})
+    try:
+        ids = [int(value) for value in values]
+    except (TypeError, ValueError):
+        raise ValidationError({field: 'Ids must be integers.'})
+    if len(set(ids)) != len(ids):
+        raise ValidationError({field: 'Ids must be unique.'})
+    return ids
+
+
+def parse_object(data):
+    if not isinstance(data, dict):
+        raise ValidationError('Expected a JSON object.')
+    return data
+
+
+class BulkMixin:
+    max_bulk_size = 500
+
+    def _validate_creates(self, items):
+        serializer = self.get_serializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        model = self.get_queryset().model
+        return [model(**data) for data in serializer.validated_data]
+
+    def _validate_updates(self, items):
+        ids = parse_ids([item.get('id') if isinstance(item, dict) else None for item in items], 'update')
+        instances = self.get_queryset().model.objects.in_bulk(ids)
+        missing = [pk for pk in ids if pk not in instances]
+        if missing:
+            raise ValidationError({'update': f"Not found: {', '.join(map(str, missing))}."})
+
+        updated, fields, errors = [], set(), []
+        for pk, item in zip(ids, items):
+            serializer = self.get_serializer(instances[pk], data=item, partial=True)
+            if not serializer.is_valid():
+                errors.append(serializer.errors)
+                continue
+            errors.append({})
+            for field, value in serializer.validated_data.items():
+                setattr(instances[pk], field, value)
+                fields.add(field)
+            updated.append(instances[pk])
+        if any(errors):
+            raise ValidationError({'update': errors})
+        return updated, fields
+
+    def _validate_deletes(self, ids):
+        found = set(self.get_queryset().model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        missing = [pk for pk in ids if pk not in found]
+        if missing:
+            raise ValidationError({'delete': f"Not found: {', '.join(map(str, missing))}."})
+        return ids
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        data = parse_object(request.data)
+        creates = data.get('create', [])
+        updates = data.get('update', [])
+        deletes = parse_ids(data.get('delete', []), 'delete')
+        if not isinstance(creates, list):
+            raise ValidationError({'create': 'Expected a list of objects.'})
+        if not isinstance(updates, list):
+            raise ValidationError({'update': 'Expected a list of objects.'})
+        if len(creates) + len(updates) + len(deletes) > self.max_bulk_size:
+            raise ValidationError(f'At most {self.max_bulk_size} operations per request.')
+
+        model = self.get_queryset().model
+        new = self._validate_creates(creates)
+        updated, fields = self._validate_updates(updates)
+        deletes = self._validate_deletes(deletes)
+
+        with transaction.atomic(), batched_changes():
+            if new:
+                new = model.objects.bulk_create(new)
+            if updated and fields:
+                if hasattr(model, 'updated_at'):
+                    now = timezone.now()  # auto_now is not applied by bulk_update()
+                    for instance in updated:
+                        instance.updated_at = now
+                    fields.add('updated_at')
+                model.objects.bulk_update(updated, sorted(fields))
+            if deletes:
+                model.objects.filter(pk__in=deletes).delete()
+            if new or updated:
+                changed(model)
+            schedule_variants(model, new)
+            if 'image' in fields:
+                schedule_variants(model, updated)
+
+        return Response({
+            'created': self.get_serializer(new, many=True).data,
+            'updated': self.get_serializer(updated, many=True).data,
+            'deleted': [str(pk) for pk in deletes],
+        })
+
+    @action(detail=False, methods=['post'])
+    def reorder(self, request):
+        ids = parse_ids(parse_object(request.data).get('ids'), 'ids')
+        if not ids:
+            raise ValidationError({'ids': 'This list may not be empty.'})
+        model = self.get_queryset().model
+        queryset = model.objects.filter(pk__in=ids)
+
+        with transaction.atomic(), batched_changes():
+            values = {'order': Case(
+                *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+                output_field=IntegerField(),
+            )}
+            if hasattr(model, 'updated_at'):
+                values['updated_at'] = timezone.now()
+            if queryset.update(**values) != len(ids):
+                raise ValidationError({'ids': 'Some ids do not exist.'})
+            changed(model)
+
+        return Response(self.get_serializer(queryset.order_by('order', 'id'), many=True).data)
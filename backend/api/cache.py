@@ -0,0 +1,167 @@
+"""
+Response cache for the public read-only API.
+
+Rendered GET responses are stored in the cache alias named by the
+`API_CACHE_ALIAS` setting, under a key built from the request path, query
+string, Accept header and the current content version (see `api.versions`)
+of every model the view reads. A write to any of those models bumps its
+version, so stale entries are never looked up again and simply expire.
+Versions live in the database, so a write reaches every worker even with the
+default per-process cache; a shared backend (file or database cache) also
+shares the entries themselves.
+"""
+import hashlib
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .versions import get_versions
+
+CACHEABLE_CONTENT_TYPES = ('application/json',)
+CACHED_HEADERS = ('Content-Type', 'Vary', 'Allow', 'ETag', 'Last-Modified')
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'API_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+class CacheStats:
+    """Per-process hit/miss counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def record(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+stats = CacheStats()
+
+
+def make_key(request, versions):
+    raw = '|'.join([
+        request.path,
+        '&'.join(sorted(request.GET.urlencode().split('&'))),
+        request.headers.get('Accept', ''),
+        ','.join(str(version) for version in versions),
+    ])
+    return 'api:resp:' + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def enabled():
+    return getattr(settings, 'API_CACHE_ENABLED', True)
+
+
+def lookup(request, models):
+    """Return `(key, response)`, where `response` is None on a cache miss."""
+    key = make_key(request, get_versions(models, request))
+    return key, fetch(request, key)
+
+
+def fetch(request, key):
+    entry = get_cache().get(key)
+    if entry is None:
+        stats.record('misses')
+        return None
+
+    stats.record('hits')
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for header, value in entry['headers'].items():
+        response[header] = value
+    response['X-Cache'] = 'HIT'
+    response.api_cache_key = key  # Lets api.compression cache encoded bodies alongside
+    # Cached validators answer conditional requests without touching the DB
+    response = get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified', '')),
+        response=response,
+    )
+    return response
+
+
+def store(key, response):
+    """Cache a rendered response if it is a successful JSON one."""
+    if response.status_code == 200 and response.get('Content-Type', '').startswith(CACHEABLE_CONTENT_TYPES):
+        get_cache().set(key, {
+            'content': response.content,
+            'status': response.status_code,
+            'headers': {h: response[h] for h in CACHED_HEADERS if response.has_header(h)},
+        }, get_timeout())
+        response.api_cache_key = key
+    response['X-Cache'] = 'MISS'
+
+
+def in_memory():
+    return isinstance(get_cache(), LocMemCache)
+
+
+async def alookup(request, versions):
+    """`lookup()` for async views, given the `versions` they read (see api.versions.aget_state)."""
+    key = make_key(request, versions)
+    # Local-memory lookups never block; shared backends (file, DB) do I/O and
+    # must leave the event loop.
+    if in_memory():
+        return key, fetch(request, key)
+    return key, await sync_to_async(fetch)(request, key)
+
+
+async def astore(key, response):
+    if in_memory():
+        store(key, response)
+    else:
+        await sync_to_async(store)(key, response)
+
+
+class CachedResponseMixin:
+    """
+    Serve GET/HEAD responses from the API cache.
+
+    Views declare the models they read through `cache_models`; by default that
+    is the model of `queryset`. Only successful JSON responses are stored.
+    """
+    cache_models = None
+
+    def get_cache_models(self):
+        if self.cache_models is not None:
+            return self.cache_models
+        return [self.queryset.model]
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not enabled():
+            return super().dispatch(request, *args, **kwargs)
+
+        key, response = lookup(request, self.get_cache_models())
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and hasattr(response, 'render'):
+            response.render()
+        store(key, response)
+        return response
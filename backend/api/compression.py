@@ -0,0 +1,120 @@
+"""
+gzip/brotli compression of API responses.
+
+JSON responses under API_COMPRESS_PATH_PREFIXES that are at least
+API_COMPRESS_MIN_SIZE bytes are compressed with the best encoding the client
+accepts (brotli when the `brotli` package is installed, else gzip). Smaller
+ones, such as most detail responses, are sent as is: the saving would not
+cover the CPU and header overhead.
+
+A response served from or stored into the response cache (api.cache) carries
+its cache key, which already covers the content versions of the models it
+reads. Its encoded body is cached under that key, so every version of a
+payload is compressed once per encoding instead of on every hit.
+"""
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from . import cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)  # In order of preference
+COMPRESSIBLE_CONTENT_TYPES = ('application/json',)
+
+_coding = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def negotiate(accept_encoding):
+    """The preferred encoding of ENCODINGS acceptable to `accept_encoding`, or None."""
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        match = _coding.match(part)
+        if match:
+            try:
+                accepted[match[1]] = float(match[2]) if match[2] is not None else 1.0
+            except ValueError:
+                continue
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=getattr(settings, 'API_COMPRESS_BROTLI_QUALITY', 8))
+    return gzip.compress(body, compresslevel=getattr(settings, 'API_COMPRESS_GZIP_LEVEL', 6), mtime=0)
+
+
+def encoded_body(response, encoding):
+    key = getattr(response, 'api_cache_key', None)
+    if key is None:
+        return compress(response.content, encoding)
+    key = f'{key}:{encoding}'
+    body = cache.get_cache().get(key)
+    if body is None:
+        body = compress(response.content, encoding)
+        cache.get_cache().set(key, body, cache.get_timeout())
+    return body
+
+
+def should_compress(request, response):
+    return (
+        request.path_info.startswith(tuple(settings.API_COMPRESS_PATH_PREFIXES))
+        and response.status_code == 200
+        and not response.streaming
+        and not response.has_header('Content-Encoding')
+        and response.get('Content-Type', '').startswith(COMPRESSIBLE_CONTENT_TYPES)
+        and len(response.content) >= getattr(settings, 'API_COMPRESS_MIN_SIZE', 1024)
+    )
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if cache.in_memory():
+            return self.process_response(request, response)
+        # Encoded bodies may live in a file or database cache
+        return await sync_to_async(self.process_response)(request, response)
+
+    def process_response(self, request, response):
+        if not should_compress(request, response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        body = encoded_body(response, encoding)
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        # The body is no longer byte-identical to the uncompressed one
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,64 @@
+"""
+Conditional GET support for the content viewsets.
+
+Validators are derived from the content versions of the models the view reads
+(see `api.versions`), which every write bumps: the ETag hashes the request
+path with those versions, Last-Modified is the time of their latest bump. The
+versions are read once per request and shared with the response cache lookup,
+so validating never queries the content tables, whatever the page or filter.
+A client presenting a matching `If-None-Match` or a recent enough
+`If-Modified-Since` gets a 304 without the queryset ever being built. The
+async views (api.async_views) give the same validators.
+
+The validators are per model rather than per row: any write to a model
+invalidates every list and detail of it, which errs on the side of a full
+response.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .metrics import timed
+from .versions import get_state
+
+
+def validators(request, models, state):
+    """`(etag, last modified timestamp)` of a GET of `models`, given their `(versions, last modified)`."""
+    versions, last_modified = state
+    raw = '|'.join([
+        ','.join(model._meta.label_lower for model in models),
+        request.get_full_path(),
+        ','.join(str(version) for version in versions),
+    ])
+    return quote_etag(hashlib.sha1(raw.encode()).hexdigest()), int(last_modified.timestamp())
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+
+
+class ConditionalGetMixin:
+    """Validators for list and detail; the models come from CachedResponseMixin."""
+
+    def get_validators(self):
+        models = self.get_cache_models()
+        return validators(self.request, models, get_state(models, self.request))
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            with timed('serialize'):
+                response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        set_validators(response, etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class ImageURLField(models.CharField):
+    """
+    Stores the public URL of a sibling image field, resolved through its
+    storage backend when the row is saved.
+
+    Declare it *after* the image field: fields are saved in declaration order,
+    so by the time this one runs the upload has been committed and the image
+    name is final.
+    """
+
+    def __init__(self, *args, source='image', **kwargs):
+        self.source = source
+        kwargs.setdefault('max_length', 500)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('default', '')
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.source != 'image':
+            kwargs['source'] = self.source
+        for key, default in (('max_length', 500), ('blank', True), ('default', ''), ('editable', False)):
+            if kwargs.get(key) == default:
+                del kwargs[key]
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        image = getattr(model_instance, self.source)
+        url = image.storage.url(image.name) if image else ''
+        setattr(model_instance, self.attname, url)
+        return url
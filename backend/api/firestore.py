@@ -0,0 +1,198 @@
+"""
+Reading the site's content back out of Firestore, where it lived before the
+move to Django (see scripts/seed-firebase.py for the collections' shape).
+
+Two sources, both yielding `(document id, fields)` in document id order:
+
+- `read_export(path)`: a JSON export as written by the usual export tools,
+  `{"projects": {"<id>": {...}, ...}, ...}`, optionally wrapped in
+  `"__collections__"`. Timestamps may be ISO strings or `{"_seconds": ..,
+  "_nanoseconds": ..}` objects.
+- `read_emulator(host, project)`: the Firestore emulator's REST API, paged
+  with `runQuery` ordered on the document name, so a read can start after
+  any document.
+
+`to_record(collection, fields)` turns a document into an api.transfer
+record: camelCase names become the model's snake_case ones (`createdAt` ->
+`created_at`), with the exceptions in COLLECTIONS; fields the model has no
+column for are dropped and reported.
+
+`DocumentLoader` writes the records, keyed on document ids rather than on
+content: two documents with the same title stay two rows, and a document
+renamed between runs updates its row.
+"""
+import datetime
+import json
+import re
+import urllib.parse
+import urllib.request
+
+from .models import ContactInfo, ContentSection, HomeStats, Project, Service, Testimonial
+from .transfer import NATURAL_KEYS, Loader, field_map, lookup
+
+# Firestore collection -> (model, renamed fields). A None name drops the field:
+# `imageUrl` was an external URL, which only Project has a column for.
+COLLECTIONS = {
+    'projects': (Project, {'imageUrl': 'image_url_fallback'}),
+    'testimonials': (Testimonial, {'imageUrl': None}),
+    'services': (Service, {}),
+    'homeStats': (HomeStats, {}),
+    'content': (ContentSection, {'imageUrl': None}),
+    'contactInfo': (ContactInfo, {}),
+}
+EMULATOR_PAGE_SIZE = 300
+
+_upper = re.compile(r'(?<!^)(?=[A-Z])')
+
+
+class FirestoreError(Exception):
+    pass
+
+
+def snake_case(name):
+    return _upper.sub('_', name).lower()
+
+
+def timestamp(seconds, nanos=0):
+    return datetime.datetime.fromtimestamp(int(seconds), datetime.timezone.utc) + datetime.timedelta(microseconds=int(nanos) // 1000)
+
+
+def to_record(collection, fields):
+    """`(record, dropped field names)` for a document of `collection`."""
+    model, renames = COLLECTIONS[collection]
+    columns = field_map(model)
+    values, dropped = {}, []
+    for name, value in fields.items():
+        column = renames.get(name, snake_case(name))
+        if column not in columns:
+            dropped.append(name)
+            continue
+        values[column] = value
+    return {'model': model._meta.label_lower, 'fields': values}, dropped
+
+
+class DocumentLoader(Loader):
+    """
+    A Loader that upserts documents on their id: `add(document_id, record)`.
+
+    `ids` maps each model to `{document id: pk}`, and is filled in as batches
+    are written; keep it (the importer does, in its checkpoint) and pass it
+    back on the next run. A document seen before updates its row. A new one
+    takes over a row with the same natural key that no other document owns
+    yet, such as content seeded in Django before the move, or else creates one.
+    """
+
+    def __init__(self, ids=None, batch_size=500):
+        super().__init__(batch_size=batch_size)
+        self.ids = {} if ids is None else ids
+
+    def add(self, document_id, record):
+        super().add(record, key=document_id)
+
+    def existing(self, model, batch):
+        known = self.ids.setdefault(model, {})
+        found = {document_id: known[document_id] for document_id in batch if document_id in known}
+        names = NATURAL_KEYS[model]
+        new = {
+            document_id: tuple(getattr(instance, name) for name in names)
+            for document_id, (instance, _) in batch.items() if document_id not in known
+        }
+        if new:
+            owned = set(known.values())
+            free = {}  # natural key -> pks of the rows no document owns
+            for key, pk in lookup(model, names, new.values()):
+                if pk not in owned:
+                    free.setdefault(key, []).append(pk)
+            for document_id, key in new.items():
+                if free.get(key):
+                    found[document_id] = free[key].pop(0)
+        return found
+
+    def flush(self, model):
+        batch = self.pending.get(model, {})
+        super().flush(model)
+        known = self.ids.setdefault(model, {})
+        for document_id, (instance, _) in batch.items():
+            known[document_id] = instance.pk
+
+
+# Export files
+
+def export_value(value):
+    """A value of a JSON export, with its timestamp objects made datetimes."""
+    if isinstance(value, dict):
+        if value.get('__datatype__') == 'timestamp':
+            value = value['value']
+        if '_seconds' in value:
+            return timestamp(value['_seconds'], value.get('_nanoseconds', 0))
+        if set(value) == {'seconds', 'nanoseconds'}:
+            return timestamp(value['seconds'], value['nanoseconds'])
+        return {key: export_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [export_value(item) for item in value]
+    return value
+
+
+def read_export(path):
+    """`{collection: [(id, fields), ...]}` of the known collections in the export at `path`."""
+    with open(path, 'rb') as f:
+        data = json.load(f)
+    data = data.get('__collections__', data)
+    return {
+        collection: [
+            (document_id, {
+                name: export_value(value) for name, value in document.items() if not name.startswith('__')
+            })
+            for document_id, document in sorted(data[collection].items())
+        ]
+        for collection in COLLECTIONS if collection in data
+    }
+
+
+# Emulator
+
+def rest_value(value):
+    """Decode a typed value of the REST API (`{"stringValue": "x"}` and so on)."""
+    (kind, item), = value.items()
+    if kind == 'integerValue':
+        return int(item)
+    if kind == 'timestampValue':
+        return item  # RFC 3339, parsed by the model field
+    if kind == 'mapValue':
+        return {name: rest_value(field) for name, field in item.get('fields', {}).items()}
+    if kind == 'arrayValue':
+        return [rest_value(element) for element in item.get('values', [])]
+    if kind == 'nullValue':
+        return None
+    return item
+
+
+def read_emulator(host, project, collection, after=None, page_size=EMULATOR_PAGE_SIZE):
+    """Yield `(id, fields)` of the documents of `collection`, in id order, from the one after `after`."""
+    database = f'projects/{project}/databases/(default)'
+    url = f'http://{host}/v1/{urllib.parse.quote(database)}/documents:runQuery'
+    while True:
+        query = {
+            'from': [{'collectionId': collection}],
+            'orderBy': [{'field': {'fieldPath': '__name__'}}],
+            'limit': page_size,
+        }
+        if after is not None:
+            reference = f'{database}/documents/{collection}/{after}'
+            query['startAt'] = {'values': [{'referenceValue': reference}], 'before': False}
+        request = urllib.request.Request(
+            url, data=json.dumps({'structuredQuery': query}).encode(), method='POST',
+            # "owner" is the emulator's admin token: security rules are skipped
+            headers={'Content-Type': 'application/json', 'Authorization': 'Bearer owner'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                results = json.load(response)
+        except OSError as e:
+            raise FirestoreError(f'Cannot query the emulator at {host}: {e}') from e
+        documents = [result['document'] for result in results if 'document' in result]
+        for document in documents:
+            after = document['name'].rsplit('/', 1)[-1]
+            yield after, {name: rest_value(value) for name, value in document.get('fields', {}).items()}
+        if len(documents) < page_size:
+            return
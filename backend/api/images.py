@@ -0,0 +1,124 @@
+"""
+Responsive variants for uploaded images.
+
+When a row with an `image` is saved with a new file, a background job
+(see `api.tasks`) renders width-bounded copies in every modern format Pillow
+supports here (WebP, plus AVIF when Pillow is built with it), saves them
+through the image field's own storage (local MEDIA_ROOT or Cloudinary alike)
+and records them in the row's `image_variants`:
+
+    {"source": "<image name>", "variants": [{"url", "width", "height", "format"}, ...]}
+
+`source` ties the variants to the image they were made from: variants of a
+replaced or removed image are simply ignored until new ones are recorded, and
+a job that finishes after the image was replaced again does not overwrite
+newer data.
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from PIL import Image, ImageOps, features
+
+from . import tasks
+from .models import Project, Testimonial, ContentSection
+from .signals import changed
+
+IMAGE_MODELS = (Project, Testimonial, ContentSection)
+
+DEFAULT_WIDTHS = (320, 640, 1024, 1600)
+CONTENT_TYPES = {'webp': 'image/webp', 'avif': 'image/avif'}
+
+
+def get_widths():
+    return tuple(getattr(settings, 'IMAGE_VARIANT_WIDTHS', DEFAULT_WIDTHS))
+
+
+def get_formats():
+    preferred = getattr(settings, 'IMAGE_VARIANT_FORMATS', ('avif', 'webp'))
+    return [fmt for fmt in preferred if features.check(fmt)]
+
+
+def render_variants(image_field):
+    """Yield (width, height, format, bytes) for every variant of an image."""
+    with image_field.open('rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info or 'A' in original.mode else 'RGB')
+
+    # Never upscale; an image narrower than every bound gets one full-size variant
+    widths = [width for width in get_widths() if width < original.width] or [original.width]
+    for width in widths:
+        height = max(1, round(original.height * width / original.width))
+        resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+        for fmt in get_formats():
+            buffer = io.BytesIO()
+            resized.save(buffer, format=fmt.upper(), quality=getattr(settings, 'IMAGE_VARIANT_QUALITY', 80))
+            yield width, height, fmt, buffer.getvalue()
+
+
+def generate_variants(model, pk):
+    """Build and record the variants for one row, if its image still needs them."""
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.image:
+        return
+    source = instance.image.name
+    if instance.image_variants.get('source') == source:
+        return
+
+    storage = instance.image.storage
+    stem, _ = os.path.splitext(source)
+    directory, basename = os.path.split(stem)
+    variants = []
+    for width, height, fmt, data in render_variants(instance.image):
+        name = storage.save(f'{directory}/variants/{basename}-{width}w.{fmt}', ContentFile(data))
+        variants.append({'url': storage.url(name), 'width': width, 'height': height, 'format': fmt})
+
+    updated = model.objects.filter(pk=pk, image=source).update(
+        image_variants={'source': source, 'variants': variants}
+    )
+    if updated:
+        changed(model)
+
+
+def needs_variants(instance):
+    return bool(instance.image) and instance.image_variants.get('source') != instance.image.name
+
+
+def schedule_variants(model, instances):
+    """
+    Queue variants for those of `instances` whose image has none yet. Saves do
+    it on post_save; call it after writes that send no signal (bulk_create,
+    bulk_update).
+    """
+    if model in IMAGE_MODELS:
+        for instance in instances:
+            if needs_variants(instance):
+                tasks.submit(generate_variants, model, instance.pk)
+
+
+@receiver(post_save)
+def _schedule_variants(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_variants(sender, [instance])
+
+
+def current_variants(image_variants, image_name, request=None):
+    """The recorded variants, or [] while they belong to a previous image."""
+    if not image_name or not image_variants or image_variants.get('source') != image_name:
+        return []
+    if request is None:
+        return image_variants['variants']
+    return [{**variant, 'url': request.build_absolute_uri(variant['url'])} for variant in image_variants['variants']]
+
+
+def srcsets(variants):
+    """`{"webp": "url 320w, url 640w", ...}` for a list of variants."""
+    by_format = {}
+    for variant in variants:
+        by_format.setdefault(variant['format'], []).append(f"{variant['url']} {variant['width']}w")
+    return {fmt: ', '.join(entries) for fmt, entries in by_format.items()}
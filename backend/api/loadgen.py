@@ -0,0 +1,125 @@
+"""
+A small asyncio HTTP/1.1 load generator.
+
+Each simulated client holds one keep-alive connection and sends requests
+back to back, so `concurrency` is the number of in-flight requests. Only the
+standard library is used, so it runs anywhere the backend does.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+
+@dataclass
+class LoadResult:
+    url: str
+    concurrency: int
+    elapsed: float = 0.0
+    latencies: list = field(default_factory=list)
+    statuses: dict = field(default_factory=dict)
+    bytes_received: int = 0
+    errors: int = 0
+
+    def percentile(self, p):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    def summary(self):
+        count = len(self.latencies)
+        ms = lambda value: round(value * 1000, 2) if value is not None else None
+        return {
+            'url': self.url,
+            'concurrency': self.concurrency,
+            'requests': count,
+            'errors': self.errors,
+            'statuses': {str(code): n for code, n in sorted(self.statuses.items())},
+            'throughput_rps': round(count / self.elapsed, 1) if self.elapsed else None,
+            'p50_ms': ms(self.percentile(50)),
+            'p95_ms': ms(self.percentile(95)),
+            'p99_ms': ms(self.percentile(99)),
+            'bytes_per_response': round(self.bytes_received / count) if count else None,
+        }
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        body = b''
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            chunk = await reader.readexactly(size + 2)
+            if size == 0:
+                break
+            body += chunk[:-2]
+    else:
+        body = await reader.read()
+    return status, headers, body
+
+
+async def _client(url, request, result, deadline, remaining):
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    ssl = parts.scheme == 'https'
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        if remaining is not None:
+            if remaining[0] <= 0:
+                break
+            remaining[0] -= 1
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(parts.hostname, port, ssl=ssl)
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, headers, body = await _read_response(reader)
+            result.latencies.append(time.perf_counter() - start)
+            result.statuses[status] = result.statuses.get(status, 0) + 1
+            result.bytes_received += len(body)
+            if headers.get('connection', '').lower() == 'close':
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            result.errors += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run(url, concurrency=50, duration=10.0, requests=None, method='GET', headers=None, body=b''):
+    """Hit `url` from `concurrency` clients for `duration` seconds or `requests` requests."""
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    lines = [f'{method} {path} HTTP/1.1', f'Host: {parts.netloc}', 'Connection: keep-alive']
+    lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+    if body:
+        lines.append(f'Content-Length: {len(body)}')
+    request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+    result = LoadResult(url=url, concurrency=concurrency)
+    remaining = [requests] if requests else None  # Shared request budget
+    start = time.perf_counter()
+    deadline = start + duration if duration else float('inf')
+    await asyncio.gather(*[_client(url, request, result, deadline, remaining) for _ in range(concurrency)])
+    result.elapsed = time.perf_counter() - start
+    return result
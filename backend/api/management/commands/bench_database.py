@@ -0,0 +1,182 @@
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+
+from api.models import Project
+
+# SQLite's own defaults, for comparison with the DB_SQLITE_* tuning
+STOCK_SQLITE_OPTIONS = {'init_command': 'PRAGMA journal_mode=DELETE;PRAGMA synchronous=FULL;PRAGMA mmap_size=0;'}
+
+
+def connection_modes(settings_dict):
+    """`(name, settings overrides)` of each connection handling strategy to compare."""
+    options = settings_dict.get('OPTIONS', {})
+    plain = {key: value for key, value in options.items() if key != 'pool'}
+    modes = [
+        ('connect per request', {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': plain}),
+        ('persistent', {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': plain}),
+        ('persistent + health checks', {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True, 'OPTIONS': plain}),
+    ]
+    if settings_dict['ENGINE'] == 'django.db.backends.sqlite3':
+        stock = {**plain, **STOCK_SQLITE_OPTIONS}
+        stock.pop('transaction_mode', None)
+        stock.pop('timeout', None)
+        modes = [(f'{name}, stock sqlite', {**overrides, 'OPTIONS': stock}) for name, overrides in modes] + [
+            (f'{name}, tuned sqlite', overrides) for name, overrides in modes
+        ]
+    elif 'pool' in options:
+        modes.append(('pool', {'CONN_MAX_AGE': 0, 'OPTIONS': options}))
+    return modes
+
+
+@contextmanager
+def database_mode(overrides):
+    """Point the default alias, in every thread, at a copy of its settings with `overrides`."""
+    original_settings = connections.settings['default']
+    original = connections['default']
+    connections.settings['default'] = {**copy.deepcopy(original_settings), **overrides}
+    connections['default'] = connections.create_connection('default')
+    try:
+        yield
+    finally:
+        connections['default'].close()
+        if getattr(connections['default'], 'pool', None):
+            connections['default'].close_pool()
+        connections.settings['default'] = original_settings
+        connections['default'] = original
+
+
+@contextmanager
+def sqlite_copy(name):
+    """A throwaway copy of the SQLite database `name`, so that writes and journal modes stay off it."""
+    with tempfile.TemporaryDirectory() as directory:
+        target = os.path.join(directory, 'bench.sqlite3')
+        source = sqlite3.connect(name, uri=str(name).startswith('file:'))
+        destination = sqlite3.connect(target)
+        with destination:
+            source.backup(destination)
+        source.close()
+        destination.close()
+        yield target
+
+
+def request(func):
+    """Run `func` the way a request would: between request_started and request_finished."""
+    request_started.send(sender=None)
+    try:
+        func()
+    finally:
+        request_finished.send(sender=None)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the connection handling strategies of the default database '
+        '(connecting per request, persistent connections with and without health '
+        'checks, the pool on PostgreSQL) and, on SQLite, the stock and tuned '
+        'pragmas: request-shaped reads, committed writes, and a mix of both from '
+        'several threads. On SQLite a copy of the database is used; elsewhere '
+        'writes rewrite project rows with their own values.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='Read and write requests per measurement')
+        parser.add_argument('--threads', type=int, default=8, help='Threads for the concurrent measurement')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of writes in the concurrent measurement')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def read(self):
+        list(Project.objects.values('id', 'title', 'order').order_by('order')[:20])
+
+    def write(self, pk):
+        with transaction.atomic():
+            Project.objects.filter(pk=pk).update(order=F('order'))
+
+    def measure_sequential(self, func, count):
+        request(func)  # Warm up
+        start = time.perf_counter()
+        for _ in range(count):
+            request(func)
+        return count / (time.perf_counter() - start)
+
+    def measure_concurrent(self, pks, count, threads, write_ratio):
+        errors = []
+        every = round(1 / write_ratio) if write_ratio > 0 else 0
+
+        def work(offset):
+            try:
+                for i in range(count // threads):
+                    if every and (i + offset) % every == 0:
+                        pk = pks[(i + offset) % len(pks)]
+                        func = lambda: self.write(pk)
+                    else:
+                        func = self.read
+                    try:
+                        request(func)
+                    except OperationalError as e:
+                        errors.append(str(e))
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=work, args=(n,)) for n in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        done = count // threads * threads
+        return (done - len(errors)) / (time.perf_counter() - start), len(errors)
+
+    def run_modes(self, options):
+        results = []
+        for name, overrides in connection_modes(connections.settings['default']):
+            with database_mode(overrides):
+                pks = list(Project.objects.values_list('pk', flat=True)[:100])
+                if not pks:
+                    raise CommandError('There are no projects to read; run seed_data.py first.')
+                reads = self.measure_sequential(self.read, options['requests'])
+                writes = self.measure_sequential(lambda: self.write(pks[0]), options['requests'])
+                mixed, errors = self.measure_concurrent(
+                    pks, options['requests'], options['threads'], options['write_ratio'],
+                )
+            results.append({
+                'mode': name,
+                'reads_per_s': round(reads),
+                'writes_per_s': round(writes),
+                'mixed_per_s': round(mixed),
+                'mixed_errors': errors,
+            })
+        return results
+
+    def handle(self, *args, **options):
+        settings_dict = connections.settings['default']
+        if settings_dict['ENGINE'] == 'django.db.backends.sqlite3':
+            with sqlite_copy(settings_dict['NAME']) as name, database_mode({'NAME': name}):
+                results = self.run_modes(options)
+        else:
+            results = self.run_modes(options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1]}, "
+            f"{options['threads']} threads, {options['write_ratio']:.0%} writes when mixed"
+        )
+        self.stdout.write(f"{'mode':<42}{'reads/s':>10}{'writes/s':>10}{'mixed/s':>10}{'errors':>8}")
+        for row in results:
+            self.stdout.write(
+                f"{row['mode']:<42}{row['reads_per_s']:>10}{row['writes_per_s']:>10}"
+                f"{row['mixed_per_s']:>10}{row['mixed_errors']:>8}"
+            )
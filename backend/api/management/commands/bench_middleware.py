@@ -0,0 +1,86 @@
+import asyncio
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+
+# What settings.MIDDLEWARE looked like before the lean profile
+STOCK_MIDDLEWARE = {
+    'api.middleware.SecurityMiddleware': 'django.middleware.security.SecurityMiddleware',
+    'api.middleware.SessionMiddleware': 'django.contrib.sessions.middleware.SessionMiddleware',
+    'api.middleware.CommonMiddleware': 'django.middleware.common.CommonMiddleware',
+    'api.middleware.CsrfViewMiddleware': 'django.middleware.csrf.CsrfViewMiddleware',
+    'api.middleware.AuthenticationMiddleware': 'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.MessageMiddleware': 'django.contrib.messages.middleware.MessageMiddleware',
+    'api.middleware.XFrameOptionsMiddleware': 'django.middleware.clickjacking.XFrameOptionsMiddleware',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the per-request cost of the stock Django middleware stack and '
+        'the lean one (settings.MIDDLEWARE) on an API path, through the sync '
+        '(WSGI) and async (ASGI) request handlers. The path should be cheap, so '
+        'that middleware dominates.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/versions/', help='API path to request')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per measurement')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best is kept')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def measure_sync(self, path, requests, repeat):
+        client = Client()
+        client.get(path)  # Loads the middleware chain
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(requests):
+                client.get(path)
+            best = min(best, time.perf_counter() - start)
+        return best / requests
+
+    def measure_async(self, path, requests, repeat):
+        async def run():
+            client = AsyncClient()
+            await client.get(path)
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for _ in range(requests):
+                    await client.get(path)
+                best = min(best, time.perf_counter() - start)
+            return best / requests
+        return asyncio.run(run())
+
+    def handle(self, *args, **options):
+        profiles = {
+            'stock': [STOCK_MIDDLEWARE.get(path, path) for path in settings.MIDDLEWARE],
+            'lean': list(settings.MIDDLEWARE),
+        }
+        results = []
+        for handler, measure in (('wsgi', self.measure_sync), ('asgi', self.measure_async)):
+            timings = {}
+            for name, middleware in profiles.items():
+                with override_settings(MIDDLEWARE=middleware):
+                    timings[name] = measure(options['path'], options['requests'], options['repeat'])
+            results.append({
+                'handler': handler,
+                'path': options['path'],
+                'stock_us': round(timings['stock'] * 1e6, 1),
+                'lean_us': round(timings['lean'] * 1e6, 1),
+                'saved_us': round((timings['stock'] - timings['lean']) * 1e6, 1),
+                'speedup': round(timings['stock'] / timings['lean'], 2),
+            })
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'handler':<8}{'stock µs/req':>14}{'lean µs/req':>13}{'saved µs':>10}{'speedup':>9}")
+        for row in results:
+            self.stdout.write(
+                f"{row['handler']:<8}{row['stock_us']:>14}{row['lean_us']:>13}{row['saved_us']:>10}{row['speedup']:>8}x"
+            )
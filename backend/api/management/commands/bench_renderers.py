@@ -0,0 +1,89 @@
+import io
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import ORJSONParser, orjson
+from api.renderers import ORJSONRenderer
+
+from .bench_serializers import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSON renderer and parser with the orjson-backed ones on "
+        "the list payloads of the .values() serializers, and check that both "
+        "produce the same bytes. Rows are created inside a transaction that is "
+        "rolled back, so existing data is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,1000,10000', help='Comma separated row counts')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best is kept')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def measure(self, func, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed; ORJSONRenderer falls back to the stdlib')
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        context = {'request': RequestFactory().get('/api/projects/')}
+        drf_renderer, fast_renderer = JSONRenderer(), ORJSONRenderer()
+        drf_parser, fast_parser = JSONParser(), ORJSONParser()
+        results = []
+
+        with transaction.atomic():
+            for name, (model, factory, _, values_serializer) in BENCHMARKS.items():
+                for size in sizes:
+                    model.objects.all().delete()
+                    model.objects.bulk_create(factory(size), batch_size=1000)
+                    data = values_serializer(model.objects.values(*values_serializer.columns), context=context).data
+
+                    body = drf_renderer.render(data)
+                    if fast_renderer.render(data) != body:
+                        raise CommandError(f'{name}: ORJSONRenderer output differs from JSONRenderer')
+                    if fast_parser.parse(io.BytesIO(body)) != drf_parser.parse(io.BytesIO(body)):
+                        raise CommandError(f'{name}: ORJSONParser output differs from JSONParser')
+
+                    timings = {
+                        'drf_render': self.measure(lambda: drf_renderer.render(data), options['repeat']),
+                        'orjson_render': self.measure(lambda: fast_renderer.render(data), options['repeat']),
+                        'drf_parse': self.measure(lambda: drf_parser.parse(io.BytesIO(body)), options['repeat']),
+                        'orjson_parse': self.measure(lambda: fast_parser.parse(io.BytesIO(body)), options['repeat']),
+                    }
+                    results.append({
+                        'endpoint': name,
+                        'rows': size,
+                        'bytes': len(body),
+                        **{f'{key}_mb_per_sec': round(len(body) / seconds / 1e6, 1) for key, seconds in timings.items()},
+                        'render_speedup': round(timings['drf_render'] / timings['orjson_render'], 2),
+                        'parse_speedup': round(timings['drf_parse'] / timings['orjson_parse'], 2),
+                    })
+            transaction.set_rollback(True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'endpoint':<14}{'rows':>8}{'bytes':>11}{'DRF render':>12}{'orjson':>9}{'speedup':>9}"
+            f"{'DRF parse':>11}{'orjson':>9}{'speedup':>9}   (MB/s)"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['endpoint']:<14}{row['rows']:>8}{row['bytes']:>11}{row['drf_render_mb_per_sec']:>12}"
+                f"{row['orjson_render_mb_per_sec']:>9}{row['render_speedup']:>8}x{row['drf_parse_mb_per_sec']:>11}"
+                f"{row['orjson_parse_mb_per_sec']:>9}{row['parse_speedup']:>8}x"
+            )
@@ -0,0 +1,93 @@
+import contextlib
+import functools
+import io
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from api.models import Project
+from api.search import SEARCH_FIELDS, get_backend, search
+from api.serializers import ProjectValuesSerializer
+from seed_data import seed_synthetic
+
+RARE = 'zeppelin'  # Planted in RARE_ROWS rows, whatever the table size
+RARE_ROWS = 10
+
+
+def scan(queryset, q):
+    """What search looks like without an index: `icontains` on every field."""
+    return queryset.filter(functools.reduce(
+        Q.__or__, (Q(**{f'{name}__icontains': q}) for name, _ in SEARCH_FIELDS[queryset.model]),
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure `?q=` search latency (first page of 20) as the projects table '
+        'grows, against an unindexed icontains scan: a rare word, planted in '
+        f'{RARE_ROWS} rows, and a common one. Rows are created inside a '
+        'transaction that is rolled back, so existing data is left untouched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help='Comma separated table sizes')
+        parser.add_argument('--common', default='stripe', help='A word found in a large share of rows')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best is kept')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def measure(self, queryset, repeat):
+        columns = ProjectValuesSerializer.columns
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = list(queryset.values(*columns)[:20])
+            best = min(best, time.perf_counter() - start)
+        return best, len(rows)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        queries = {'rare': RARE, 'common': options['common']}
+        results = []
+
+        with transaction.atomic():
+            Project.objects.all().delete()
+            created = 0
+            for size in sizes:
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    seed_synthetic(projects=size - created, seed=size)
+                insert_time = time.perf_counter() - start
+                if not created:
+                    pks = Project.objects.order_by('?').values_list('pk', flat=True)[:RARE_ROWS]
+                    for project in Project.objects.filter(pk__in=list(pks)):
+                        project.title = f'{project.title} {RARE}'
+                        project.save(update_fields=['title'])
+                inserted, created = size - created, size
+
+                for kind, q in queries.items():
+                    indexed, found = self.measure(search(Project.objects.all(), q), options['repeat'])
+                    scanned, _ = self.measure(scan(Project.objects.all(), q), options['repeat'])
+                    results.append({
+                        'rows': size,
+                        'query': kind,
+                        'matches': search(Project.objects.all(), q).count(),
+                        'returned': found,
+                        'search_ms': round(indexed * 1000, 2),
+                        'scan_ms': round(scanned * 1000, 2),
+                        'insert_rows_per_sec': round(inserted / insert_time),
+                    })
+            transaction.set_rollback(True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{connection.vendor}, index: {get_backend() or 'none (icontains)'}")
+        self.stdout.write(f"{'rows':>8}  {'query':<8}{'matches':>9}{'search ms':>11}{'scan ms':>10}{'inserts/s':>11}")
+        for row in results:
+            self.stdout.write(
+                f"{row['rows']:>8}  {row['query']:<8}{row['matches']:>9}{row['search_ms']:>11}"
+                f"{row['scan_ms']:>10}{row['insert_rows_per_sec']:>11}"
+            )
@@ -0,0 +1,104 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from api.models import Project, Testimonial
+from api.serializers import (
+    ProjectSerializer, ProjectValuesSerializer, TestimonialSerializer, TestimonialValuesSerializer,
+)
+
+
+def make_projects(count):
+    return [
+        Project(
+            title=f'Project {i}',
+            description='Lorem ipsum dolor sit amet. ' * 20,
+            image_url_fallback=f'https://cdn.example.com/{i}.jpg',
+            tags=['Next.js', 'Django', 'PostgreSQL'],
+            link='https://example.com',
+            featured=i % 5 == 0,
+            order=i,
+        )
+        for i in range(count)
+    ]
+
+
+def make_testimonials(count):
+    return [
+        Testimonial(
+            name=f'Client {i}', role='CEO', company='Acme', content='Great work. ' * 30,
+            rating=5, featured=i % 5 == 0, order=i,
+        )
+        for i in range(count)
+    ]
+
+
+BENCHMARKS = {
+    'projects': (Project, make_projects, ProjectSerializer, ProjectValuesSerializer),
+    'testimonials': (Testimonial, make_testimonials, TestimonialSerializer, TestimonialValuesSerializer),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare list serialization throughput of the ModelSerializers and the '
+        '.values() serializers. Rows are created inside a transaction that is '
+        'rolled back, so existing data is left untouched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,1000,10000', help='Comma separated row counts')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the best is kept')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def measure(self, func, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        request = RequestFactory().get('/api/projects/')
+        context = {'request': request}
+        results = []
+
+        with transaction.atomic():
+            for name, (model, factory, model_serializer, values_serializer) in BENCHMARKS.items():
+                for size in sizes:
+                    model.objects.all().delete()
+                    model.objects.bulk_create(factory(size), batch_size=1000)
+                    queryset = model.objects.all()
+
+                    model_time = self.measure(
+                        lambda: model_serializer(queryset.all(), many=True, context=context).data,
+                        options['repeat'],
+                    )
+                    values_time = self.measure(
+                        lambda: values_serializer(queryset.values(*values_serializer.columns), context=context).data,
+                        options['repeat'],
+                    )
+                    results.append({
+                        'endpoint': name,
+                        'rows': size,
+                        'model_serializer_rows_per_sec': round(size / model_time),
+                        'values_serializer_rows_per_sec': round(size / values_time),
+                        'speedup': round(model_time / values_time, 2),
+                    })
+            transaction.set_rollback(True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{'endpoint':<14}{'rows':>8}{'ModelSerializer/s':>20}{'values()/s':>14}{'speedup':>10}")
+        for row in results:
+            self.stdout.write(
+                f"{row['endpoint']:<14}{row['rows']:>8}{row['model_serializer_rows_per_sec']:>20}"
+                f"{row['values_serializer_rows_per_sec']:>14}{row['speedup']:>9}x"
+            )
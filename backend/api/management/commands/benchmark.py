@@ -0,0 +1,221 @@
+import asyncio
+import json
+import platform
+import time
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api import loadgen
+from api.signals import CONTENT_MODELS
+from api.urls import router
+from api.versions import bump
+from seed_data import seed_synthetic
+
+# Metric name -> whether a larger value is worse
+METRICS = {
+    'throughput_rps': False,
+    'p50_ms': True,
+    'p95_ms': True,
+    'queries_per_request': True,
+    'bytes_per_response': True,
+}
+
+TOKEN_USERNAME = 'benchmark'
+TOKEN_PASSWORD = 'benchmark-password'
+
+
+def endpoints(prefix='/api/'):
+    """(name, method, path, body) for the API root and every list and detail route of the router."""
+    yield 'api-root', 'GET', prefix, None
+    for basename, viewset in ((entry[0], entry[1]) for entry in router.registry):
+        yield f'{basename}-list', 'GET', f'{prefix}{basename}/', None
+        pk = viewset.queryset.model.objects.order_by('pk').values_list('pk', flat=True).first()
+        if pk is not None:
+            yield f'{basename}-detail', 'GET', f'{prefix}{basename}/{pk}/', None
+
+
+def compare(baseline, current, threshold):
+    """
+    Return a line per metric that is more than `threshold` percent worse in
+    `current` than in `baseline`. Endpoints or metrics missing from either run
+    are not compared.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            continue
+        for metric, higher_is_worse in METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            if (change if higher_is_worse else -change) > threshold:
+                regressions.append(f'{name} {metric}: {old} -> {new} ({change:+.1f}%)')
+    return regressions
+
+
+class Command(BaseCommand):
+    help = """
+    Benchmark every API route and the token endpoint, and optionally fail on
+    regressions against an earlier run.
+
+    By default requests go through the Django test client in this process,
+    which also counts SQL queries per request. Synthetic rows are added inside
+    a transaction that is rolled back, so the database is left untouched:
+
+        python manage.py benchmark --projects 1000 --output bench.json
+        python manage.py benchmark --projects 1000 --baseline bench.json --threshold 10
+
+    With --base-url the same routes are loaded over HTTP against a running
+    server (seed it first with `python seed_data.py --projects 1000`).
+    Queries per request are not available in that mode.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=0, help='Synthetic projects to add')
+        parser.add_argument('--testimonials', type=int, default=0, help='Synthetic testimonials to add')
+        parser.add_argument('--services', type=int, default=0, help='Synthetic services to add')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for synthetic content')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per endpoint')
+        parser.add_argument('--token-requests', type=int, default=20,
+                            help='Measured requests for api/token/, which is slow by design')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per endpoint')
+        parser.add_argument('--no-cache', action='store_true', help='Disable the API response cache')
+        parser.add_argument('--base-url', help='Load a running server instead, e.g. http://127.0.0.1:8000')
+        parser.add_argument('-c', '--concurrency', type=int, default=10, help='Clients per endpoint with --base-url')
+        parser.add_argument('--username', help='Account for api/token/ with --base-url')
+        parser.add_argument('--password', help='Password for --username')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+        parser.add_argument('--baseline', help='Earlier --output file to compare against')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Percent a metric may worsen against --baseline before failing')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        with override_settings(**({'API_CACHE_ENABLED': False} if options['no_cache'] else {})):
+            if options['base_url']:
+                results = self.run_remote(options)
+            else:
+                results = self.run_local(options)
+
+        report = {
+            'meta': {
+                'mode': 'http' if options['base_url'] else 'in-process',
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'cache': not options['no_cache'],
+                'rows': {name: options[name] for name in ('projects', 'testimonials', 'services')},
+                'seed': options['seed'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.print_table(results)
+
+        if baseline is not None:
+            if baseline.get('meta', {}).get('rows') != report['meta']['rows'] or \
+                    baseline.get('meta', {}).get('cache') != report['meta']['cache']:
+                self.stderr.write(self.style.WARNING('The baseline was run with a different dataset or cache setting'))
+            regressions = compare(baseline, report, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    f'{len(regressions)} metric(s) regressed by more than {options["threshold"]}%:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS(f'No regressions over {options["threshold"]}%'))
+
+    def run_local(self, options):
+        results = {}
+        client = Client()
+        with transaction.atomic():
+            if options['projects'] or options['testimonials'] or options['services']:
+                seed_synthetic(options['projects'], options['testimonials'], options['services'], seed=options['seed'])
+            get_user_model().objects.create_superuser(TOKEN_USERNAME, password=TOKEN_PASSWORD)
+
+            for name, method, path, body in endpoints():
+                results[name] = self.measure_local(client, method, path, body, options['requests'], options['warmup'])
+            credentials = {'username': TOKEN_USERNAME, 'password': TOKEN_PASSWORD}
+            results['token'] = self.measure_local(
+                client, 'POST', '/api/token/', credentials, options['token_requests'], min(options['warmup'], 1),
+            )
+            transaction.set_rollback(True)
+        # Responses of the rolled back rows may sit in a shared cache under the current versions
+        bump(*CONTENT_MODELS)
+        return results
+
+    def measure_local(self, client, method, path, body, requests, warmup):
+        send = client.post if method == 'POST' else client.get
+        kwargs = {'data': body, 'content_type': 'application/json'} if body is not None else {}
+        for _ in range(warmup):
+            send(path, **kwargs)
+
+        result = loadgen.LoadResult(url=f'{method} {path}', concurrency=1)
+        queries = 0
+        start = time.perf_counter()
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                request_start = time.perf_counter()
+                response = send(path, **kwargs)
+                result.latencies.append(time.perf_counter() - request_start)
+            queries += len(captured)
+            result.statuses[response.status_code] = result.statuses.get(response.status_code, 0) + 1
+            result.bytes_received += len(response.content)
+        result.elapsed = time.perf_counter() - start
+
+        summary = result.summary()
+        summary['queries_per_request'] = round(queries / requests, 2) if requests else None
+        return summary
+
+    def run_remote(self, options):
+        base = options['base_url'].rstrip('/')
+        routes = [(name, method, base + path, body) for name, method, path, body in endpoints()]
+        if options['username']:
+            credentials = {'username': options['username'], 'password': options['password'] or ''}
+            routes.append(('token', 'POST', f'{base}/api/token/', credentials))
+
+        results = {}
+        for name, method, url, body in routes:
+            requests = options['token_requests'] if name == 'token' else options['requests']
+            kwargs = {}
+            if body is not None:
+                kwargs = {
+                    'method': method,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': json.dumps(body).encode(),
+                }
+            result = asyncio.run(loadgen.run(
+                url, concurrency=min(options['concurrency'], requests), duration=None, requests=requests, **kwargs,
+            ))
+            summary = result.summary()
+            summary['queries_per_request'] = None
+            results[name] = summary
+        return results
+
+    def print_table(self, results):
+        self.stdout.write(
+            f"{'endpoint':<24}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'bytes':>10}"
+        )
+        for name, summary in results.items():
+            queries = summary['queries_per_request']
+            self.stdout.write(
+                f"{name:<24}{summary['throughput_rps'] or 0:>10}{summary['p50_ms'] or 0:>10}"
+                f"{summary['p95_ms'] or 0:>10}{summary['p99_ms'] or 0:>10}"
+                f"{'-' if queries is None else queries:>9}{summary['bytes_per_response'] or 0:>10}"
+            )
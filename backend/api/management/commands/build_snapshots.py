@@ -0,0 +1,31 @@
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from api import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the public list and detail endpoints and the homepage bundle to '
+        'precompressed, content-hashed JSON files in API_SNAPSHOT_ROOT. Needs '
+        'API_SNAPSHOT_BASE_URL, the origin of the absolute URLs in them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('resources', nargs='*', metavar='resource',
+                            help=f'Only rebuild these ({", ".join(snapshots.RESOURCES)}); the bundle is always rebuilt')
+
+    def handle(self, *args, **options):
+        unknown = set(options['resources']) - set(snapshots.RESOURCES)
+        if unknown:
+            raise CommandError(f'Unknown resource(s): {", ".join(sorted(unknown))}')
+        start = time.perf_counter()
+        try:
+            count = snapshots.build(options['resources'] or None)
+        except ImproperlyConfigured as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} snapshots in {snapshots.get_root()} ({time.perf_counter() - start:.2f}s)'
+        ))
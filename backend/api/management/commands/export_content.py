@@ -0,0 +1,50 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.transfer import MODELS, dumps, export_records
+from api.versions import RESOURCE_NAMES
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream the content tables to NDJSON, one record per line (see '
+        'api/transfer.py), in constant memory. Load it back with import_content.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-', help='File to write; "-" for stdout')
+        parser.add_argument('--models', help=f"Comma separated, from: {', '.join(RESOURCE_NAMES[label] for label in MODELS)}")
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows read per database round trip')
+
+    def get_models(self, names):
+        by_name = {RESOURCE_NAMES[label]: model for label, model in MODELS.items()}
+        if not names:
+            return list(by_name.values())
+        names = [name.strip() for name in names.split(',') if name.strip()]
+        unknown = [name for name in names if name not in by_name]
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(unknown)}. Choose from: {', '.join(by_name)}.")
+        return [model for name, model in by_name.items() if name in names]
+
+    def handle(self, *args, **options):
+        models = self.get_models(options['models'])
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        total, start = 0, time.perf_counter()
+        try:
+            for model in models:
+                count, model_start = 0, time.perf_counter()
+                for record in export_records(model, options['chunk_size']):
+                    output.write(dumps(record) + b'\n')
+                    count += 1
+                total += count
+                seconds = time.perf_counter() - model_start
+                self.stderr.write(f'{model._meta.label_lower}: {count} rows, {count / seconds if seconds else 0:.0f} rows/s')
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+            else:
+                output.flush()
+        seconds = time.perf_counter() - start
+        self.stderr.write(f'Exported {total} rows in {seconds:.2f}s ({total / seconds if seconds else 0:.0f} rows/s)')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.images import IMAGE_MODELS, generate_variants, needs_variants
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate responsive variants for every image that does not have them yet, '
+        'e.g. rows saved before variants existed or jobs lost to a worker restart.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate variants for every image')
+
+    def handle(self, *args, **options):
+        for model in IMAGE_MODELS:
+            rows = model.objects.exclude(image='').exclude(image__isnull=True)
+            done = 0
+            for instance in rows.iterator():
+                if options['force']:
+                    model.objects.filter(pk=instance.pk).update(image_variants={})
+                elif not needs_variants(instance):
+                    continue
+                generate_variants(model, instance.pk)
+                done += 1
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {done} image(s) processed')
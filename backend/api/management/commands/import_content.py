@@ -0,0 +1,49 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.transfer import LoadError, Loader, loads
+
+
+class Command(BaseCommand):
+    help = (
+        'Load NDJSON written by export_content (or by dumpdata --format jsonl), '
+        'upserting rows in batched transactions: existing rows are matched on '
+        'their natural key (api.transfer.NATURAL_KEYS) or, with --key pk, their '
+        'primary key. A natural key that repeats is refused; load such data with '
+        '--key pk. Reports throughput per model.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='File to read; "-" for stdin')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per transaction')
+        parser.add_argument('--key', choices=('natural', 'pk'), default='natural', help='How to match existing rows')
+
+    def handle(self, *args, **options):
+        source = sys.stdin.buffer if options['input'] == '-' else open(options['input'], 'rb')
+        start = time.perf_counter()
+        try:
+            with Loader(batch_size=options['batch_size'], key=options['key']) as loader:
+                for number, line in enumerate(source, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        loader.add(loads(line))
+                    except (LoadError, ValueError, TypeError) as e:
+                        raise CommandError(f'Line {number}: {e}')
+        except LoadError as e:  # Found when the last batches are written
+            raise CommandError(str(e))
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+        seconds = time.perf_counter() - start
+
+        total = 0
+        for model, stats in loader.stats.items():
+            total += stats.rows
+            self.stdout.write(
+                f'{model._meta.label_lower}: {stats.created} created, {stats.updated} updated, '
+                f'{stats.rows / stats.seconds if stats.seconds else 0:.0f} rows/s'
+            )
+        self.stdout.write(f'Imported {total} rows in {seconds:.2f}s ({total / seconds if seconds else 0:.0f} rows/s)')
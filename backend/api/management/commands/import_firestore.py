@@ -0,0 +1,123 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.firestore import COLLECTIONS, DocumentLoader, FirestoreError, read_emulator, read_export, to_record
+from api.transfer import LoadError
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the Firestore collections (projects, testimonials, services, '
+        'homeStats, content, contactInfo) into the api models, from a JSON '
+        'export or the Firestore emulator. Documents are upserted on their '
+        'ids in batched transactions; after each batch, the last document id '
+        'and the row of every document are saved to a checkpoint file, and a '
+        'rerun resumes from there.'
+    )
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--export', help='JSON export file')
+        source.add_argument(
+            '--emulator', nargs='?', const=os.environ.get('FIRESTORE_EMULATOR_HOST'),
+            help='host:port of the emulator (default: $FIRESTORE_EMULATOR_HOST)',
+        )
+        parser.add_argument('--project', default=os.environ.get('GCLOUD_PROJECT'), help='Firebase project id, with --emulator')
+        parser.add_argument('--collections', help=f"Comma separated, from: {', '.join(COLLECTIONS)}")
+        parser.add_argument('--batch-size', type=int, default=500, help='Documents per transaction')
+        parser.add_argument('--checkpoint', help='Progress file (default: next to the export, or firestore-<project>.checkpoint)')
+        parser.add_argument('--restart', action='store_true', help='Read every document again (rows stay matched on the document ids in the checkpoint)')
+
+    def get_source(self, options):
+        """`(checkpoint path, read(collection, after))` of the source in `options`."""
+        if options['export']:
+            try:
+                collections = read_export(options['export'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['export']}: {e}")
+
+            def read(collection, after):
+                return (document for document in collections.get(collection, []) if after is None or document[0] > after)
+            return f"{options['export']}.checkpoint", read
+
+        if not options['emulator']:
+            raise CommandError('Give the emulator host with --emulator or FIRESTORE_EMULATOR_HOST.')
+        if not options['project']:
+            raise CommandError('Give the project id with --project or GCLOUD_PROJECT.')
+        return f"firestore-{options['project']}.checkpoint", lambda collection, after: read_emulator(
+            options['emulator'], options['project'], collection, after,
+        )
+
+    def get_collections(self, names):
+        if not names:
+            return list(COLLECTIONS)
+        names = [name.strip() for name in names.split(',') if name.strip()]
+        unknown = [name for name in names if name not in COLLECTIONS]
+        if unknown:
+            raise CommandError(f"Unknown collection(s): {', '.join(unknown)}. Choose from: {', '.join(COLLECTIONS)}.")
+        return [name for name in COLLECTIONS if name in names]
+
+    def load_checkpoint(self, path, restart):
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if restart:
+            return {collection: {'ids': progress.get('ids', {})} for collection, progress in checkpoint.items()}
+        return checkpoint
+
+    def save_checkpoint(self, path, checkpoint):
+        # Written aside and renamed, so an interruption never leaves half a file
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(f'{path}.tmp', path)
+
+    def handle(self, *args, **options):
+        collections = self.get_collections(options['collections'])
+        default_checkpoint, read = self.get_source(options)
+        path = options['checkpoint'] or default_checkpoint
+        checkpoint = self.load_checkpoint(path, options['restart'])
+        batch_size = options['batch_size']
+        start = time.perf_counter()
+
+        with DocumentLoader(batch_size=batch_size) as loader:
+            for collection in collections:
+                progress = checkpoint.setdefault(collection, {})
+                for name, value in (('after', None), ('documents', 0), ('done', False), ('ids', {})):
+                    progress.setdefault(name, value)
+                if progress['done']:
+                    self.stdout.write(f'{collection}: done in an earlier run, skipped')
+                    continue
+                model = COLLECTIONS[collection][0]
+                loader.ids[model] = progress['ids']  # Document id -> pk, kept up to date by the loader
+                dropped, pending, last = set(), 0, progress['after']
+                document_id = last
+                try:
+                    for document_id, fields in read(collection, progress['after']):
+                        record, names = to_record(collection, fields)
+                        dropped.update(names)
+                        loader.add(document_id, record)
+                        pending, last = pending + 1, document_id
+                        if pending == batch_size:
+                            loader.flush(model)
+                            progress.update(after=last, documents=progress['documents'] + pending)
+                            self.save_checkpoint(path, checkpoint)
+                            pending = 0
+                except (LoadError, ValueError, TypeError) as e:
+                    raise CommandError(f'{collection}/{document_id}: {e}')
+                except FirestoreError as e:
+                    raise CommandError(str(e))
+                loader.flush(model)
+                progress.update(after=last, documents=progress['documents'] + pending, done=True)
+                self.save_checkpoint(path, checkpoint)
+                if dropped:
+                    self.stdout.write(f"{collection}: no column for {', '.join(sorted(dropped))}, dropped")
+
+        seconds = time.perf_counter() - start
+        for model, stats in loader.stats.items():
+            self.stdout.write(f'{model._meta.label_lower}: {stats.created} created, {stats.updated} updated')
+        total = sum(stats.rows for stats in loader.stats.values())
+        self.stdout.write(f'Imported {total} rows in {seconds:.2f}s; progress kept in {path}')
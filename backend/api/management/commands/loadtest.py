@@ -0,0 +1,60 @@
+import asyncio
+import json
+import resource
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import loadgen
+
+
+class Command(BaseCommand):
+    help = """
+    Compare latency and throughput of running API servers under concurrent load.
+
+    Start the servers to compare, then point one --target at each, e.g.
+
+        gunicorn portfolio_backend.wsgi -w 4 -b 127.0.0.1:8001
+        uvicorn portfolio_backend.asgi:application --workers 4 --port 8002 --no-access-log
+        python manage.py loadtest -c 500 --duration 30 \\
+            --target wsgi=http://127.0.0.1:8001/api/projects/ \\
+            --target asgi=http://127.0.0.1:8002/api/async/projects/
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, metavar='NAME=URL',
+                            help='Server to load; may be repeated')
+        parser.add_argument('-c', '--concurrency', type=int, default=500)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per target')
+        parser.add_argument('--requests', type=int, default=None, help='Stop after this many requests instead')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def raise_file_limit(self, needed):
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < needed + 64:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, needed + 64), hard))
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, sep, url = target.partition('=')
+            if not sep or not url.startswith(('http://', 'https://')):
+                raise CommandError(f'Expected NAME=URL, got {target!r}')
+            targets.append((name, url))
+        self.raise_file_limit(options['concurrency'])
+
+        results = {}
+        for name, url in targets:
+            result = asyncio.run(loadgen.run(
+                url, concurrency=options['concurrency'], duration=options['duration'], requests=options['requests'],
+            ))
+            results[name] = result.summary()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'target':<12}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:<12}{summary['requests']:>10}{summary['errors']:>8}{summary['throughput_rps'] or 0:>10}"
+                f"{summary['p50_ms'] or 0:>10}{summary['p99_ms'] or 0:>10}"
+            )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.images import IMAGE_MODELS
+from api.uploads import FAILED, PENDING, publish_staged_image
+
+
+class Command(BaseCommand):
+    help = 'Push staged image uploads to storage, e.g. ones left behind by a restarted worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry uploads that failed before')
+
+    def handle(self, *args, **options):
+        statuses = [PENDING, FAILED] if options['retry_failed'] else [PENDING]
+        for model in IMAGE_MODELS:
+            pks = list(model.objects.filter(image_status__in=statuses).exclude(image_staging='').values_list('pk', flat=True))
+            for pk in pks:
+                publish_staged_image(model, pk)
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {len(pks)} staged image(s) processed')
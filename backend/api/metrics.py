@@ -0,0 +1,244 @@
+"""
+Per-request instrumentation.
+
+`RequestMetricsMiddleware` records, for every request, the resolved view, the
+number of SQL queries and the time spent in SQL, JWT authentication and
+serialization (building `.data` and rendering). Each request gets a
+`Server-Timing` header and one JSON log line on the `api.metrics` logger, and
+is added to per-route histograms that `MetricsView` exposes in Prometheus
+text format.
+
+Phases never include SQL time: a query run while serializing (a lazy queryset
+being evaluated, say) counts towards `db` only, so the phases add up to no
+more than `total`.
+
+Enabled with API_METRICS=True, which puts the middleware first in MIDDLEWARE.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('api.metrics')
+
+PHASES = ('auth', 'serialize')
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+_current = ContextVar('api_request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'sql', 'phases', 'active')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.active = None
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block, minus SQL, to `phase` of the current
+    request. Nested blocks are folded into the outermost one.
+    """
+    metrics = _current.get()
+    if metrics is None or metrics.active is not None:
+        yield
+        return
+    metrics.active = phase
+    sql = metrics.sql
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.phases[phase] += time.perf_counter() - start - (metrics.sql - sql)
+        metrics.active = None
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql += time.perf_counter() - start
+        metrics.queries += 1
+
+
+@receiver(connection_created)
+def _install_wrapper(sender, connection, **kwargs):
+    # Installed once per connection; it does nothing outside a measured request
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+class RouteStats:
+    __slots__ = ('requests', 'buckets', 'duration', 'queries', 'sql', 'phases', 'recent')
+
+    def __init__(self, window):
+        self.requests = {}  # status -> count
+        self.buckets = [0] * len(BUCKETS)
+        self.duration = 0.0
+        self.queries = 0
+        self.sql = 0.0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.recent = deque(maxlen=window)
+
+    @property
+    def count(self):
+        return sum(self.requests.values())
+
+
+class Registry:
+    """Per-route counters and histograms of this worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, method, status, duration, metrics):
+        with self._lock:
+            stats = self.routes.get((route, method))
+            if stats is None:
+                stats = self.routes[(route, method)] = RouteStats(getattr(settings, 'API_METRICS_WINDOW', 1000))
+            stats.requests[status] = stats.requests.get(status, 0) + 1
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    stats.buckets[i] += 1
+            stats.duration += duration
+            stats.queries += metrics.queries
+            stats.sql += metrics.sql
+            for phase, value in metrics.phases.items():
+                stats.phases[phase] += value
+            stats.recent.append(duration)
+
+    def reset(self):
+        with self._lock:
+            self.routes.clear()
+
+    def render(self):
+        """The registry in Prometheus text exposition format."""
+        with self._lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                '# HELP api_requests_total Requests handled, by route, method and status.',
+                '# TYPE api_requests_total counter',
+            ]
+            for (route, method), stats in routes:
+                for status, count in sorted(stats.requests.items()):
+                    lines.append(f'api_requests_total{_labels(route, method, status=status)} {count}')
+
+            lines += [
+                '# HELP api_request_duration_seconds Request duration.',
+                '# TYPE api_request_duration_seconds histogram',
+            ]
+            for (route, method), stats in routes:
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    lines.append(f'api_request_duration_seconds_bucket{_labels(route, method, le=bound)} {count}')
+                lines.append(f'api_request_duration_seconds_bucket{_labels(route, method, le="+Inf")} {stats.count}')
+                lines.append(f'api_request_duration_seconds_sum{_labels(route, method)} {stats.duration:.6f}')
+                lines.append(f'api_request_duration_seconds_count{_labels(route, method)} {stats.count}')
+
+            lines += [
+                '# HELP api_request_recent_duration_seconds Request duration over the last API_METRICS_WINDOW requests.',
+                '# TYPE api_request_recent_duration_seconds summary',
+            ]
+            for (route, method), stats in routes:
+                ordered = sorted(stats.recent)
+                for q in QUANTILES:
+                    value = ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+                    lines.append(f'api_request_recent_duration_seconds{_labels(route, method, quantile=q)} {value:.6f}')
+                lines.append(f'api_request_recent_duration_seconds_sum{_labels(route, method)} {sum(ordered):.6f}')
+                lines.append(f'api_request_recent_duration_seconds_count{_labels(route, method)} {len(ordered)}')
+
+            counters = [
+                ('api_db_queries_total', 'SQL queries run.', lambda stats: stats.queries),
+                ('api_db_seconds_total', 'Time spent in SQL.', lambda stats: f'{stats.sql:.6f}'),
+            ] + [
+                (f'api_{phase}_seconds_total', f'Time spent in {phase}, excluding SQL.',
+                 lambda stats, phase=phase: f'{stats.phases[phase]:.6f}')
+                for phase in PHASES
+            ]
+            for name, help_text, value in counters:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for (route, method), stats in routes:
+                    lines.append(f'{name}{_labels(route, method)} {value(stats)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(route, method, **extra):
+    pairs = {'route': route, 'method': method, **extra}
+    escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs.items()) + '}'
+
+
+registry = Registry()
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    def finish(self, request, response, metrics, duration):
+        match = request.resolver_match
+        route = match.view_name if match else '<unresolved>'
+        ms = lambda seconds: round(seconds * 1000, 2)
+
+        timings = [f'db;dur={ms(metrics.sql)};desc="{metrics.queries} queries"']
+        timings += [f'{phase};dur={ms(value)}' for phase, value in metrics.phases.items()]
+        timings.append(f'total;dur={ms(duration)}')
+        response['Server-Timing'] = ', '.join(timings)
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': route,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': ms(metrics.sql),
+            **{f'{phase}_ms': ms(value) for phase, value in metrics.phases.items()},
+            'total_ms': ms(duration),
+        }, separators=(',', ':')))
+        registry.record(route, request.method, response.status_code, duration, metrics)
+        return response
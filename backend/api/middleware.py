@@ -0,0 +1,163 @@
+import os
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings as django_settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.middleware import clickjacking, common, csrf, security
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import MissingFileError
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can also run natively under ASGI, and serves the JSON
+    snapshots of api.snapshots at API_SNAPSHOT_URL.
+
+    Upstream WhiteNoiseMiddleware is sync-only, which makes Django adapt every
+    request below it (including the async API views) through a thread and back.
+    Lookups of already-indexed files are pure dict reads; only the autorefresh
+    scan (DEBUG), first lookups of snapshots and file serving touch the disk
+    and run in a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=django_settings):
+        super().__init__(get_response, settings)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.snapshot_root = str(settings.API_SNAPSHOT_ROOT)
+        self.snapshot_prefix = '/' + settings.API_SNAPSHOT_URL.strip('/') + '/'
+        self.snapshot_manifest = self.snapshot_prefix + 'manifest.json'
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        static_file = self.lookup(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        url = request.path_info
+        if self.autorefresh or (url.startswith(self.snapshot_prefix) and url not in self.files):
+            static_file = await sync_to_async(self.lookup)(url)
+        else:
+            static_file = self.files.get(url)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+    def lookup(self, url):
+        static_file = self.find_file(url) if self.autorefresh else self.files.get(url)
+        return static_file or self.find_snapshot(url)
+
+    def find_snapshot(self, url):
+        # Snapshots are written while the server runs, so they are found on
+        # disk; hashed names never change content and are indexed on first use.
+        if not url.startswith(self.snapshot_prefix) or not self.url_is_canonical(url):
+            return None
+        try:
+            static_file = self.find_file_at_path(
+                os.path.join(self.snapshot_root, url[len(self.snapshot_prefix):]), url,
+            )
+        except MissingFileError:
+            return None
+        if url != self.snapshot_manifest:
+            self.files[url] = static_file
+        return static_file
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(self.snapshot_prefix):
+            return url != self.snapshot_manifest
+        return super().immutable_file_test(path, url)
+
+    def add_cache_headers(self, headers, path, url):
+        super().add_cache_headers(headers, path, url)
+        if url == self.snapshot_manifest:
+            headers['Cache-Control'] = 'no-cache'
+
+
+def is_lean_path(request):
+    return request.path_info.startswith(tuple(django_settings.API_LEAN_PATH_PREFIXES))
+
+
+class PathScopedMixin:
+    """
+    Skip a middleware entirely for requests under API_LEAN_PATH_PREFIXES.
+
+    The session, CSRF, auth, messages and clickjacking middleware exist for the
+    Django admin. The JSON API authenticates with JWTs (DRF views are CSRF
+    exempt and never read the session), so under /api/ they would only cost a
+    session cookie parse, lazy user setup and, under ASGI, a thread hop each.
+    """
+
+    def __call__(self, request):
+        if is_lean_path(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class InlineAsyncMixin:
+    """
+    Run process_request/process_response inline under ASGI.
+
+    MiddlewareMixin runs them through sync_to_async in case they block; for
+    middleware that only inspects the request and sets headers that hop is
+    pure overhead.
+    """
+
+    async def __acall__(self, request):
+        response = self.process_request(request) if hasattr(self, 'process_request') else None
+        response = response or await self.get_response(request)
+        if hasattr(self, 'process_response'):
+            response = self.process_response(request, response)
+        return response
+
+
+class SecurityMiddleware(InlineAsyncMixin, security.SecurityMiddleware):
+    pass
+
+
+class CommonMiddleware(InlineAsyncMixin, common.CommonMiddleware):
+    pass
+
+
+class SessionMiddleware(PathScopedMixin, sessions.SessionMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(PathScopedMixin, auth.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(PathScopedMixin, messages.MessageMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(PathScopedMixin, InlineAsyncMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(PathScopedMixin, csrf.CsrfViewMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.async_mode:
+            # Django adapts a sync process_view with sync_to_async; an async one
+            # lets lean paths return without leaving the event loop.
+            self.process_view = self.aprocess_view
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_lean_path(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+    async def aprocess_view(self, request, callback, callback_args, callback_kwargs):
+        if is_lean_path(request):
+            return None
+        return await sync_to_async(super().process_view, thread_sensitive=True)(
+            request, callback, callback_args, callback_kwargs,
+        )
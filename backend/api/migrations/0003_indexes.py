@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_homestats_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='homestats',
+            index=models.Index(fields=['order', 'id'], name='homestats_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('featured', True)), fields=['order', 'id'], name='project_featured_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['order', 'id'], name='project_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['order', 'id'], name='service_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('featured', True)), fields=['order', 'id'], name='testimonial_featured_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['order', 'id'], name='testimonial_order_idx'),
+        ),
+    ]
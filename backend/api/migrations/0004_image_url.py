@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:05
+
+import api.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentsection',
+            name='image_url',
+            field=api.fields.ImageURLField(help_text='Public URL of `image`, resolved on save'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_url',
+            field=api.fields.ImageURLField(help_text='Public URL of `image`, resolved on save'),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='image_url',
+            field=api.fields.ImageURLField(help_text='Public URL of `image`, resolved on save'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentsection',
+            name='image_staging',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Upload waiting to be pushed to storage, see api.uploads', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='contentsection',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'No upload'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_staging',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Upload waiting to be pushed to storage, see api.uploads', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'No upload'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='image_staging',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Upload waiting to be pushed to storage, see api.uploads', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'No upload'), ('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='', editable=False, max_length=10),
+        ),
+    ]
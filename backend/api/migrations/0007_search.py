@@ -0,0 +1,101 @@
+import sqlite3
+
+from django.db import migrations
+
+# The statements of api.search.install_sql() / uninstall_sql() when this was
+# written, kept here so that later changes to the models or to SEARCH_FIELDS
+# do not change what this migration does.
+INSTALL = {
+    'postgresql': [
+        'DROP INDEX IF EXISTS "api_project_search_idx"',
+        'DROP INDEX IF EXISTS "api_testimonial_search_idx"',
+        'DROP INDEX IF EXISTS "api_service_search_idx"',
+        """CREATE INDEX "api_project_search_idx" ON "api_project" USING GIN ((setweight(to_tsvector('english', coalesce("title", '')), 'A') || setweight(jsonb_to_tsvector('english', coalesce("tags", '[]'::jsonb), '["string"]'), 'B') || setweight(to_tsvector('english', coalesce("description", '')), 'C')))""",
+        """CREATE INDEX "api_testimonial_search_idx" ON "api_testimonial" USING GIN ((setweight(to_tsvector('english', coalesce("name", '')), 'A') || setweight(to_tsvector('english', coalesce("company", '')), 'B') || setweight(to_tsvector('english', coalesce("role", '')), 'B') || setweight(to_tsvector('english', coalesce("content", '')), 'C')))""",
+        """CREATE INDEX "api_service_search_idx" ON "api_service" USING GIN ((setweight(to_tsvector('english', coalesce("title", '')), 'A') || setweight(to_tsvector('english', coalesce("description", '')), 'C')))""",
+    ],
+    'fts5': [
+        'DROP TRIGGER IF EXISTS "api_project_search_ai"',
+        'DROP TRIGGER IF EXISTS "api_project_search_ad"',
+        'DROP TRIGGER IF EXISTS "api_project_search_au"',
+        'DROP TABLE IF EXISTS "api_project_search"',
+        'DROP TRIGGER IF EXISTS "api_testimonial_search_ai"',
+        'DROP TRIGGER IF EXISTS "api_testimonial_search_ad"',
+        'DROP TRIGGER IF EXISTS "api_testimonial_search_au"',
+        'DROP TABLE IF EXISTS "api_testimonial_search"',
+        'DROP TRIGGER IF EXISTS "api_service_search_ai"',
+        'DROP TRIGGER IF EXISTS "api_service_search_ad"',
+        'DROP TRIGGER IF EXISTS "api_service_search_au"',
+        'DROP TABLE IF EXISTS "api_service_search"',
+        """CREATE VIRTUAL TABLE "api_project_search" USING fts5(title, tags, description, tokenize='porter unicode61 remove_diacritics 2')""",
+        """CREATE TRIGGER "api_project_search_ai" AFTER INSERT ON "api_project" BEGIN INSERT INTO "api_project_search" (rowid, title, tags, description) SELECT new."id", new."title", (SELECT group_concat(value, ' ') FROM json_each(new."tags") WHERE json_valid(new."tags")), new."description"; END""",
+        'CREATE TRIGGER "api_project_search_ad" AFTER DELETE ON "api_project" BEGIN DELETE FROM "api_project_search" WHERE rowid = old."id"; END',
+        """CREATE TRIGGER "api_project_search_au" AFTER UPDATE OF "title", "tags", "description" ON "api_project" BEGIN DELETE FROM "api_project_search" WHERE rowid = old."id"; INSERT INTO "api_project_search" (rowid, title, tags, description) SELECT new."id", new."title", (SELECT group_concat(value, ' ') FROM json_each(new."tags") WHERE json_valid(new."tags")), new."description"; END""",
+        """INSERT INTO "api_project_search" (rowid, title, tags, description) SELECT row."id", row."title", (SELECT group_concat(value, ' ') FROM json_each(row."tags") WHERE json_valid(row."tags")), row."description" FROM "api_project" AS row""",
+        """CREATE VIRTUAL TABLE "api_testimonial_search" USING fts5(name, company, role, content, tokenize='porter unicode61 remove_diacritics 2')""",
+        'CREATE TRIGGER "api_testimonial_search_ai" AFTER INSERT ON "api_testimonial" BEGIN INSERT INTO "api_testimonial_search" (rowid, name, company, role, content) SELECT new."id", new."name", new."company", new."role", new."content"; END',
+        'CREATE TRIGGER "api_testimonial_search_ad" AFTER DELETE ON "api_testimonial" BEGIN DELETE FROM "api_testimonial_search" WHERE rowid = old."id"; END',
+        'CREATE TRIGGER "api_testimonial_search_au" AFTER UPDATE OF "name", "company", "role", "content" ON "api_testimonial" BEGIN DELETE FROM "api_testimonial_search" WHERE rowid = old."id"; INSERT INTO "api_testimonial_search" (rowid, name, company, role, content) SELECT new."id", new."name", new."company", new."role", new."content"; END',
+        'INSERT INTO "api_testimonial_search" (rowid, name, company, role, content) SELECT row."id", row."name", row."company", row."role", row."content" FROM "api_testimonial" AS row',
+        """CREATE VIRTUAL TABLE "api_service_search" USING fts5(title, description, tokenize='porter unicode61 remove_diacritics 2')""",
+        'CREATE TRIGGER "api_service_search_ai" AFTER INSERT ON "api_service" BEGIN INSERT INTO "api_service_search" (rowid, title, description) SELECT new."id", new."title", new."description"; END',
+        'CREATE TRIGGER "api_service_search_ad" AFTER DELETE ON "api_service" BEGIN DELETE FROM "api_service_search" WHERE rowid = old."id"; END',
+        'CREATE TRIGGER "api_service_search_au" AFTER UPDATE OF "title", "description" ON "api_service" BEGIN DELETE FROM "api_service_search" WHERE rowid = old."id"; INSERT INTO "api_service_search" (rowid, title, description) SELECT new."id", new."title", new."description"; END',
+        'INSERT INTO "api_service_search" (rowid, title, description) SELECT row."id", row."title", row."description" FROM "api_service" AS row',
+    ],
+}
+UNINSTALL = {
+    'postgresql': [
+        'DROP INDEX IF EXISTS "api_project_search_idx"',
+        'DROP INDEX IF EXISTS "api_testimonial_search_idx"',
+        'DROP INDEX IF EXISTS "api_service_search_idx"',
+    ],
+    'fts5': [
+        'DROP TRIGGER IF EXISTS "api_project_search_ai"',
+        'DROP TRIGGER IF EXISTS "api_project_search_ad"',
+        'DROP TRIGGER IF EXISTS "api_project_search_au"',
+        'DROP TABLE IF EXISTS "api_project_search"',
+        'DROP TRIGGER IF EXISTS "api_testimonial_search_ai"',
+        'DROP TRIGGER IF EXISTS "api_testimonial_search_ad"',
+        'DROP TRIGGER IF EXISTS "api_testimonial_search_au"',
+        'DROP TABLE IF EXISTS "api_testimonial_search"',
+        'DROP TRIGGER IF EXISTS "api_service_search_ai"',
+        'DROP TRIGGER IF EXISTS "api_service_search_ad"',
+        'DROP TRIGGER IF EXISTS "api_service_search_au"',
+        'DROP TABLE IF EXISTS "api_service_search"',
+    ],
+}
+
+
+def backend(connection):
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite':
+        try:
+            sqlite3.connect(':memory:').execute('CREATE VIRTUAL TABLE t USING fts5(c)')
+        except sqlite3.OperationalError:
+            return None
+        return 'fts5'
+    return None
+
+
+def install(apps, schema_editor):
+    for sql in INSTALL.get(backend(schema_editor.connection), []):
+        schema_editor.execute(sql)
+
+
+def uninstall(apps, schema_editor):
+    for sql in UNINSTALL.get(backend(schema_editor.connection), []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    """Full-text search indexes, see api.search."""
+
+    dependencies = [
+        ('api', '0006_image_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
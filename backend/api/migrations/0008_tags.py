@@ -0,0 +1,190 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# The triggers of api.tags when this was written (see api.tags.install_sql()),
+# kept here so that later changes there do not change what this migration does.
+TRIGGERS = {
+    'sqlite': [
+        """
+        CREATE TRIGGER api_project_tags_ai AFTER INSERT ON api_project BEGIN
+
+        INSERT INTO api_tag (name) SELECT value FROM (SELECT DISTINCT value FROM json_each(new.tags) WHERE json_valid(new.tags) AND type = 'text')
+            WHERE value NOT IN (SELECT name FROM api_tag);
+
+
+        INSERT INTO api_projecttag (project_id, tag_id)
+            SELECT new.id, id FROM api_tag WHERE name IN (SELECT DISTINCT value FROM json_each(new.tags) WHERE json_valid(new.tags) AND type = 'text')
+            AND NOT EXISTS (SELECT 1 FROM api_projecttag WHERE project_id = new.id AND tag_id = api_tag.id);
+
+        END
+        """,
+        """
+        CREATE TRIGGER api_project_tags_au AFTER UPDATE OF tags ON api_project WHEN old.tags IS NOT new.tags BEGIN
+            DELETE FROM api_projecttag WHERE project_id = new.id
+                AND tag_id NOT IN (SELECT id FROM api_tag WHERE name IN (SELECT DISTINCT value FROM json_each(new.tags) WHERE json_valid(new.tags) AND type = 'text'));
+
+        INSERT INTO api_tag (name) SELECT value FROM (SELECT DISTINCT value FROM json_each(new.tags) WHERE json_valid(new.tags) AND type = 'text')
+            WHERE value NOT IN (SELECT name FROM api_tag);
+
+
+        INSERT INTO api_projecttag (project_id, tag_id)
+            SELECT new.id, id FROM api_tag WHERE name IN (SELECT DISTINCT value FROM json_each(new.tags) WHERE json_valid(new.tags) AND type = 'text')
+            AND NOT EXISTS (SELECT 1 FROM api_projecttag WHERE project_id = new.id AND tag_id = api_tag.id);
+
+        END
+        """,
+        """
+        CREATE TRIGGER api_project_tags_ad AFTER DELETE ON api_project BEGIN
+            DELETE FROM api_projecttag WHERE project_id = old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER api_projecttag_count_ai AFTER INSERT ON api_projecttag BEGIN
+            UPDATE api_tag SET count = count + 1 WHERE id = new.tag_id;
+        END
+        """,
+        """
+        CREATE TRIGGER api_projecttag_count_ad AFTER DELETE ON api_projecttag BEGIN
+            UPDATE api_tag SET count = count - 1 WHERE id = old.tag_id;
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+            CREATE FUNCTION api_project_sync_tags() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    DELETE FROM api_projecttag WHERE project_id = OLD.id;
+                    RETURN OLD;
+                END IF;
+                IF TG_OP = 'UPDATE' AND NEW.tags IS NOT DISTINCT FROM OLD.tags THEN
+                    RETURN NEW;
+                END IF;
+                DELETE FROM api_projecttag WHERE project_id = NEW.id
+                    AND tag_id NOT IN (SELECT id FROM api_tag WHERE name IN (
+            SELECT DISTINCT element #>> '{}' FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(NEW.tags) = 'array' THEN NEW.tags ELSE '[]'::jsonb END
+            ) AS element WHERE jsonb_typeof(element) = 'string'
+        ));
+                INSERT INTO api_tag (name) 
+            SELECT DISTINCT element #>> '{}' FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(NEW.tags) = 'array' THEN NEW.tags ELSE '[]'::jsonb END
+            ) AS element WHERE jsonb_typeof(element) = 'string'
+         ON CONFLICT (name) DO NOTHING;
+                INSERT INTO api_projecttag (project_id, tag_id)
+                    SELECT NEW.id, id FROM api_tag WHERE name IN (
+            SELECT DISTINCT element #>> '{}' FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(NEW.tags) = 'array' THEN NEW.tags ELSE '[]'::jsonb END
+            ) AS element WHERE jsonb_typeof(element) = 'string'
+        )
+                    ON CONFLICT (tag_id, project_id) DO NOTHING;
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER api_project_tags AFTER INSERT OR UPDATE OF tags OR DELETE ON api_project
+            FOR EACH ROW EXECUTE FUNCTION api_project_sync_tags()
+        """,
+        """
+        CREATE FUNCTION api_projecttag_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE api_tag SET "count" = "count" + 1 WHERE id = NEW.tag_id;
+                RETURN NEW;
+            END IF;
+            UPDATE api_tag SET "count" = "count" - 1 WHERE id = OLD.tag_id;
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER api_projecttag_count AFTER INSERT OR DELETE ON api_projecttag
+            FOR EACH ROW EXECUTE FUNCTION api_projecttag_count()
+        """,
+    ],
+}
+UNINSTALL = {
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS api_project_tags_ai',
+        'DROP TRIGGER IF EXISTS api_project_tags_au',
+        'DROP TRIGGER IF EXISTS api_project_tags_ad',
+        'DROP TRIGGER IF EXISTS api_projecttag_count_ai',
+        'DROP TRIGGER IF EXISTS api_projecttag_count_ad',
+    ],
+    'postgresql': [
+        'DROP TRIGGER IF EXISTS api_project_tags ON api_project',
+        'DROP TRIGGER IF EXISTS api_projecttag_count ON api_projecttag',
+        'DROP FUNCTION IF EXISTS api_project_sync_tags()',
+        'DROP FUNCTION IF EXISTS api_projecttag_count()',
+    ],
+}
+
+
+def backfill(apps):
+    """Fill Tag and ProjectTag from the existing projects, as api.tags.rebuild() does."""
+    Project = apps.get_model('api', 'Project')
+    Tag = apps.get_model('api', 'Tag')
+    ProjectTag = apps.get_model('api', 'ProjectTag')
+    links = {}
+    for pk, tags in Project.objects.values_list('pk', 'tags').iterator():
+        links[pk] = {tag for tag in tags if isinstance(tag, str)} if isinstance(tags, list) else set()
+    counts = {}
+    for names in links.values():
+        for name in names:
+            counts[name] = counts.get(name, 0) + 1
+    Tag.objects.bulk_create([Tag(name=name, count=count) for name, count in counts.items()], batch_size=1000)
+    ids = dict(Tag.objects.values_list('name', 'pk'))
+    ProjectTag.objects.bulk_create([
+        ProjectTag(project_id=pk, tag_id=ids[name]) for pk, names in links.items() for name in names
+    ], batch_size=1000)
+
+
+def install(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in UNINSTALL.get(vendor, []):
+        schema_editor.execute(sql)
+    backfill(apps)
+    for sql in TRIGGERS.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def uninstall(apps, schema_editor):
+    for sql in UNINSTALL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.TextField(unique=True)),
+                ('count', models.IntegerField(db_default=0, help_text='Projects carrying the tag')),
+            ],
+            options={
+                'ordering': ['-count', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='api.project')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_links', to='api.tag')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tag', 'project'), name='projecttag_unique')],
+            },
+        ),
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:31
+
+import time
+
+import django.utils.timezone
+from django.db import migrations, models
+
+NAMES = ['api.project', 'api.testimonial', 'api.service', 'api.homestats', 'api.contentsection', 'api.contactinfo', '__all__']
+
+
+def seed(apps, schema_editor):
+    # Versions used to be cache counters seeded from the time in milliseconds:
+    # start from there, so that no version goes backwards
+    ContentVersion = apps.get_model('api', 'ContentVersion')
+    version = int(time.time() * 1000)
+    ContentVersion.objects.bulk_create([ContentVersion(name=name, version=version) for name in NAMES])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField()),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Time of the last bump')),
+            ],
+        ),
+        migrations.RunPython(seed, migrations.RunPython.noop),
+    ]
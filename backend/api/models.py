@@ -1,9 +1,23 @@
 from django.db import models
+from django.utils import timezone
+
+from .fields import ImageURLField
+
+IMAGE_STATUS_CHOICES = [
+    ('', 'No upload'),
+    ('pending', 'Pending'),
+    ('ready', 'Ready'),
+    ('failed', 'Failed'),
+]
 
 class Project(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     image = models.ImageField(upload_to='projects/', blank=True, null=True)
+    image_url = ImageURLField(help_text="Public URL of `image`, resolved on save")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of `image`, see api.images")
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, blank=True, default='', editable=False)
+    image_staging = models.CharField(max_length=255, blank=True, default='', editable=False, help_text="Upload waiting to be pushed to storage, see api.uploads")
     image_url_fallback = models.URLField(blank=True, null=True, help_text="Fallback if using external URL")
     tags = models.JSONField(default=list, help_text="List of strings")
     link = models.URLField(blank=True, null=True)
@@ -14,16 +28,50 @@ class Project(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order', 'id'], condition=models.Q(featured=True), name='project_featured_order_idx'),
+            models.Index(fields=['order', 'id'], name='project_order_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+class Tag(models.Model):
+    """
+    A distinct entry of `Project.tags`. Maintained from the JSON field by
+    api.tags, together with ProjectTag and `count`; never written directly.
+    """
+    name = models.TextField(unique=True)
+    count = models.IntegerField(db_default=0, help_text="Projects carrying the tag")
+
+    class Meta:
+        ordering = ['-count', 'name']
+
+    def __str__(self):
+        return self.name
+
+class ProjectTag(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='project_links')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tag', 'project'], name='projecttag_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} - {self.tag_id}"
+
 class Testimonial(models.Model):
     name = models.CharField(max_length=100)
     role = models.CharField(max_length=100)
     company = models.CharField(max_length=100)
     content = models.TextField()
     image = models.ImageField(upload_to='testimonials/', blank=True, null=True)
+    image_url = ImageURLField(help_text="Public URL of `image`, resolved on save")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of `image`, see api.images")
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, blank=True, default='', editable=False)
+    image_staging = models.CharField(max_length=255, blank=True, default='', editable=False, help_text="Upload waiting to be pushed to storage, see api.uploads")
     rating = models.IntegerField(default=5)
     featured = models.BooleanField(default=False)
     order = models.IntegerField(default=0)
@@ -32,6 +80,10 @@ class Testimonial(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order', 'id'], condition=models.Q(featured=True), name='testimonial_featured_order_idx'),
+            models.Index(fields=['order', 'id'], name='testimonial_order_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.company}"
@@ -46,6 +98,9 @@ class Service(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order', 'id'], name='service_order_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -54,9 +109,13 @@ class HomeStats(models.Model):
     label = models.CharField(max_length=100)
     value = models.CharField(max_length=50)
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order', 'id'], name='homestats_order_idx'),
+        ]
 
     def __str__(self):
         return self.label
@@ -73,6 +132,10 @@ class ContentSection(models.Model):
     subtitle = models.CharField(max_length=200, blank=True, null=True)
     content = models.TextField()
     image = models.ImageField(upload_to='content/', blank=True, null=True)
+    image_url = ImageURLField(help_text="Public URL of `image`, resolved on save")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of `image`, see api.images")
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, blank=True, default='', editable=False)
+    image_staging = models.CharField(max_length=255, blank=True, default='', editable=False, help_text="Upload waiting to be pushed to storage, see api.uploads")
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
@@ -91,3 +154,15 @@ class ContactInfo(models.Model):
 
     def __str__(self):
         return self.email
+
+class ContentVersion(models.Model):
+    """
+    A content version counter (see api.versions): one row per content model,
+    named by its label, and one for the global version. Never written directly.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField()
+    updated_at = models.DateTimeField(default=timezone.now, help_text="Time of the last bump")
+
+    def __str__(self):
+        return f"{self.name} - {self.version}"
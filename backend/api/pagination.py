@@ -0,0 +1,146 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination on `(order, id)`.
+
+    Lists stay unpaginated unless the client sends `?page_size=` or `?cursor=`,
+    so existing callers keep receiving a plain array. Paginated responses look
+    like `{"next": <url or null>, "results": [...]}`. Each page is a single
+    index range scan from the last row of the previous one, so deep pages cost
+    the same as the first and cursors stay valid while rows are added or removed.
+    """
+    ordering = ('order', 'id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, row):
+        if isinstance(row, dict):  # .values() rows from the fast list path
+            position = [row[field] for field in self.ordering]
+        else:
+            position = [getattr(row, field) for field in self.ordering]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            order, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return int(order), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def apply_cursor(self, queryset, cursor):
+        queryset = queryset.order_by(*self.ordering)
+        if cursor is None:
+            return queryset
+        order, pk = cursor
+        # The redundant `order >= x` bound lets the planner turn this into an
+        # index range scan; the OR alone would scan the index from the start.
+        return queryset.filter(Q(order__gte=order) & (Q(order__gt=order) | Q(id__gt=pk)))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return self.take_page(list(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        """
+        The rows to fetch for the requested page: one more than fits, to tell
+        whether there is a next page. Pass them, fetched, to `take_page()`;
+        async views fetch them with the async ORM.
+        """
+        self.request = request
+        self.current_page_size = self.get_page_size(request)
+        return self.apply_cursor(queryset, self.decode_cursor(request))[:self.current_page_size + 1]
+
+    def take_page(self, rows):
+        page_size = self.current_page_size
+        self.has_next = len(rows) > page_size
+        page = rows[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class SearchPagination(KeysetPagination):
+    """
+    Pages of ranked search results (see api.search), always paginated.
+
+    Same `{"next", "results"}` shape and `?page_size=`/`?cursor=` parameters
+    as KeysetPagination, but the cursor is an offset: rank is not a stable
+    key to seek from, and searches are rarely paged deeply.
+    """
+
+    def is_requested(self, request):
+        return True
+
+    def encode_cursor(self, offset):
+        return base64.urlsafe_b64encode(json.dumps(offset).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return 0
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            offset = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(offset, int) or offset < 0:
+            raise NotFound(self.invalid_cursor_message)
+        return offset
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.current_page_size = self.get_page_size(request)
+        self.offset = self.decode_cursor(request)
+        return queryset[self.offset:self.offset + self.current_page_size + 1]
+
+    def take_page(self, rows):
+        page_size = self.current_page_size
+        self.has_next = len(rows) > page_size
+        self.next_cursor = self.encode_cursor(self.offset + page_size) if self.has_next else None
+        return rows[:page_size]
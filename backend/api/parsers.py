@@ -0,0 +1,37 @@
+"""
+JSON parser for the API.
+
+`ORJSONParser` parses with the optional `orjson` package when installed and
+the body is UTF-8, and otherwise behaves exactly like DRF's `JSONParser`.
+Documents orjson rejects go to DRF's parser, so error messages (and values
+such as 1e400) are DRF's. The one divergence: integers beyond 64 bits come
+back as floats, which every integer field rejects just as it rejects the
+out-of-range int.
+"""
+import io
+
+from django.conf import settings
+from rest_framework import parsers
+
+from .renderers import ORJSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONParser(parsers.JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
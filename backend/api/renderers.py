@@ -0,0 +1,76 @@
+"""
+JSON renderers for the API.
+
+`ORJSONRenderer` produces the same bytes as DRF's `JSONRenderer` with the
+default UNICODE_JSON/COMPACT_JSON settings, several times faster, when the
+optional `orjson` package is installed. Datetimes, dates and times go through
+DRF's encoder (`...Z` for UTC, microseconds kept), as do Decimals, lazy
+strings and anything else orjson does not handle natively. Whatever orjson
+rejects (integers beyond 64 bits, lone surrogates) and indented output (the
+browsable API, `; indent=N`) falls back to DRF's renderer. So does data
+holding NaN or an infinity, which orjson writes as `null`: DRF raises on them
+under STRICT_JSON (the default), or writes `NaN` without it. Only output with
+a `null` in it is searched for them. Floats are the only divergence: orjson
+writes `1e-7` where Python writes `1e-07`.
+"""
+import math
+from decimal import Decimal
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+from .metrics import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def has_non_finite(data):
+    """Whether `data` holds a NaN or an infinity, float or Decimal, at any depth."""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(map(has_non_finite, data.values()))
+    if isinstance(data, (list, tuple)):
+        return any(map(has_non_finite, data))
+    if isinstance(data, Decimal):
+        return not data.is_finite()
+    return False
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """DRF's JSON renderer, with its time reported as part of the `serialize` phase of api.metrics."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class ORJSONRenderer(JSONRenderer):
+    options = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+    default = staticmethod(JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        with timed('serialize'):
+            try:
+                ret = orjson.dumps(data, default=self.default, option=self.options)
+            except orjson.JSONEncodeError:
+                return super().render(data, accepted_media_type, renderer_context)
+            if b'null' in ret and has_non_finite(data):
+                return super().render(data, accepted_media_type, renderer_context)
+        # Like DRF, keep the output a strict JavaScript subset. A one-byte
+        # search first: it is a memchr, unlike the three-byte one.
+        if b'\xe2' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+def get_renderer():
+    """An instance of the first DEFAULT_RENDERER_CLASSES entry, for views that render by hand."""
+    from rest_framework.settings import api_settings
+    return api_settings.DEFAULT_RENDERER_CLASSES[0]()
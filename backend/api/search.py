@@ -0,0 +1,197 @@
+"""
+Full-text search over projects, testimonials and services.
+
+`search(queryset, q)` narrows a queryset to the rows matching every word of
+`q` (the last one as a prefix, for search-as-you-type), best match first:
+
+- PostgreSQL: a GIN index on the weighted `tsvector` of SEARCH_FIELDS. The
+  index is an expression index, so PostgreSQL keeps it current on every
+  write; queries repeat the expression to use it and rank with `ts_rank`.
+- SQLite: an FTS5 table per model, `<table>_search`, kept current by
+  triggers on the model's table, so bulk_create, queryset.update() and raw
+  SQL are covered as well as save(). Ranked with `bm25`.
+- Anything else, or an SQLite built without FTS5: `icontains` on each field,
+  in the usual order.
+
+Weights: A for names and titles, B for tags, roles and companies, C for
+bodies. Changing SEARCH_FIELDS needs a migration running the new
+`install_sql()` of each backend.
+"""
+import functools
+import re
+import sqlite3
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, JSONField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Project, Service, Testimonial
+
+SEARCH_FIELDS = {
+    Project: (('title', 'A'), ('tags', 'B'), ('description', 'C')),
+    Testimonial: (('name', 'A'), ('company', 'B'), ('role', 'B'), ('content', 'C')),
+    Service: (('title', 'A'), ('description', 'C')),
+}
+CONFIG = 'english'  # PostgreSQL text search configuration
+BM25_WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 1.0}
+MAX_TERMS = 10
+
+_word = re.compile(r'\w+')
+
+
+@functools.cache
+def has_fts5():
+    try:
+        sqlite3.connect(':memory:').execute('CREATE VIRTUAL TABLE t USING fts5(c)')
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def get_backend(conn=connection):
+    if conn.vendor == 'postgresql':
+        return 'postgresql'
+    if conn.vendor == 'sqlite' and has_fts5():
+        return 'fts5'
+    return None
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_search'
+
+
+def is_json(model, name):
+    return isinstance(model._meta.get_field(name), JSONField)
+
+
+def terms(q):
+    return _word.findall(q.lower())[:MAX_TERMS]
+
+
+# PostgreSQL
+
+def tsvector_sql(model, table=None):
+    """The weighted tsvector of `model`'s SEARCH_FIELDS, as indexed."""
+    parts = []
+    for name, weight in SEARCH_FIELDS[model]:
+        column = model._meta.get_field(name).column
+        column = f'"{table}"."{column}"' if table else f'"{column}"'
+        if is_json(model, name):
+            vector = f"""jsonb_to_tsvector('{CONFIG}', coalesce({column}, '[]'::jsonb), '["string"]')"""
+        else:
+            vector = f"to_tsvector('{CONFIG}', coalesce({column}, ''))"
+        parts.append(f"setweight({vector}, '{weight}')")
+    return '(' + ' || '.join(parts) + ')'
+
+
+def tsquery(words):
+    return ' & '.join(words[:-1] + [words[-1] + ':*'])
+
+
+# SQLite
+
+def fts_value_sql(model, name, ref):
+    column = f'{ref}."{model._meta.get_field(name).column}"'
+    if is_json(model, name):
+        return f"(SELECT group_concat(value, ' ') FROM json_each({column}) WHERE json_valid({column}))"
+    return column
+
+
+def fts_insert_sql(model, ref):
+    table, fts = model._meta.db_table, fts_table(model)
+    names = [name for name, _ in SEARCH_FIELDS[model]]
+    values = ', '.join(fts_value_sql(model, name, ref) for name in names)
+    source = f' FROM "{table}" AS {ref}' if ref != 'new' else ''
+    return f'INSERT INTO "{fts}" (rowid, {", ".join(names)}) SELECT {ref}."id", {values}{source}'
+
+
+def fts_match(words):
+    return ' '.join([f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*'])
+
+
+# Schema
+
+def install_sql(backend):
+    """
+    The statements creating the search index of every model in SEARCH_FIELDS on
+    `backend` ('postgresql' or 'fts5'), after dropping any existing one.
+    Migrations carry a copy of them, as they were when written.
+    """
+    statements = uninstall_sql(backend)
+    for model in SEARCH_FIELDS:
+        table, fts = model._meta.db_table, fts_table(model)
+        if backend == 'postgresql':
+            statements.append(f'CREATE INDEX "{fts}_idx" ON "{table}" USING GIN ({tsvector_sql(model)})')
+        elif backend == 'fts5':
+            names = [name for name, _ in SEARCH_FIELDS[model]]
+            statements.append(
+                f'CREATE VIRTUAL TABLE "{fts}" USING fts5({", ".join(names)}, '
+                f"tokenize='porter unicode61 remove_diacritics 2')"
+            )
+            watched = ', '.join(f'"{model._meta.get_field(name).column}"' for name in names)
+            delete = f'DELETE FROM "{fts}" WHERE rowid = old."id";'
+            statements += [
+                f'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{table}" BEGIN {fts_insert_sql(model, "new")}; END',
+                f'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{table}" BEGIN {delete} END',
+                f'CREATE TRIGGER "{fts}_au" AFTER UPDATE OF {watched} ON "{table}" '
+                f'BEGIN {delete} {fts_insert_sql(model, "new")}; END',
+                fts_insert_sql(model, 'row'),
+            ]
+    return statements
+
+
+def uninstall_sql(backend):
+    statements = []
+    for model in SEARCH_FIELDS:
+        fts = fts_table(model)
+        if backend == 'postgresql':
+            statements.append(f'DROP INDEX IF EXISTS "{fts}_idx"')
+        elif backend == 'fts5':
+            statements += [f'DROP TRIGGER IF EXISTS "{fts}_{suffix}"' for suffix in ('ai', 'ad', 'au')]
+            statements.append(f'DROP TABLE IF EXISTS "{fts}"')
+    return statements
+
+
+# Queries
+
+def search(queryset, q):
+    """`queryset` narrowed to the rows matching `q`, best match first."""
+    model = queryset.model
+    words = terms(q)
+    if not words:
+        return queryset.none()
+    table = model._meta.db_table
+    backend = get_backend()
+
+    if backend == 'postgresql':
+        # The indexed expression itself, so the GIN index serves the filter
+        vector, query = tsvector_sql(model, table), f"to_tsquery('{CONFIG}', %s)"
+        params = [tsquery(words)]
+        return queryset.filter(
+            RawSQL(f'{vector} @@ {query}', params, output_field=BooleanField()),
+        ).annotate(
+            search_rank=RawSQL(f'ts_rank({vector}, {query})', params, output_field=FloatField()),
+        ).order_by('-search_rank', 'order', 'id')
+
+    if backend == 'fts5':
+        # bm25() only works in a query on the FTS table itself: one to find
+        # the matching rowids, one per row for its rank
+        fts = fts_table(model)
+        weights = ', '.join(str(BM25_WEIGHTS[weight]) for _, weight in SEARCH_FIELDS[model])
+        params = [fts_match(words)]
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s', params),
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT bm25("{fts}", {weights}) FROM "{fts}" '
+                f'WHERE "{fts}" MATCH %s AND "{fts}".rowid = "{table}"."id"',
+                params, output_field=FloatField(),
+            ),
+        ).order_by('search_rank', 'order', 'id')
+
+    match = Q()
+    for word in words:
+        match &= functools.reduce(
+            Q.__or__, (Q(**{f'{name}__icontains': word}) for name, _ in SEARCH_FIELDS[model]),
+        )
+    return queryset.filter(match)
@@ -1,40 +1,76 @@
-from rest_framework import serializers
+import functools
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .images import current_variants, srcsets
 from .models import Project, Testimonial, Service, HomeStats, ContentSection, ContactInfo
+from .uploads import StagedImageMixin
+
+
+@functools.lru_cache(maxsize=4096)
+def _storage_url(model, name):
+    return model._meta.get_field('image').storage.url(name)
+
+
+@receiver(setting_changed)
+def _clear_storage_urls(setting, **kwargs):
+    if setting == 'STORAGES':
+        _storage_url.cache_clear()
+
 
-class ProjectSerializer(serializers.ModelSerializer):
+def image_url(model, name, stored_url, request, fallback=""):
+    """
+    Public URL for an image column, without touching the storage backend.
+
+    Rows carry the URL resolved at save time in `image_url`; rows saved before
+    that column existed fall back to a memoized storage lookup.
+    """
+    if not name:
+        return fallback or ""
+    url = stored_url or _storage_url(model, name)
+    return request.build_absolute_uri(url) if request else url
+
+class ImageVariantsMixin:
+    def get_imageVariants(self, obj):
+        return current_variants(obj.image_variants, obj.image.name, self.context.get('request'))
+
+    def get_imageSrcset(self, obj):
+        return srcsets(self.get_imageVariants(obj))
+
+class ProjectSerializer(StagedImageMixin, ImageVariantsMixin, serializers.ModelSerializer):
     id = serializers.CharField(read_only=True) # Cast to string for frontend compatibility
     imageUrl = serializers.SerializerMethodField()
+    imageVariants = serializers.SerializerMethodField()
+    imageSrcset = serializers.SerializerMethodField()
+    imageStatus = serializers.CharField(source='image_status', read_only=True)
     tags = serializers.JSONField()
 
     class Meta:
         model = Project
-        fields = ['id', 'title', 'description', 'imageUrl', 'image', 'image_url_fallback', 'tags', 'link', 'featured', 'order', 'created_at', 'updated_at']
+        fields = ['id', 'title', 'description', 'imageUrl', 'imageVariants', 'imageSrcset', 'imageStatus', 'image', 'image_url_fallback', 'tags', 'link', 'featured', 'order', 'created_at', 'updated_at']
         extra_kwargs = {'image': {'write_only': True}} # Frontend sends 'imageUrl' or 'image' file
 
     def get_imageUrl(self, obj):
-        if obj.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
-        return obj.image_url_fallback or ""
-
-class TestimonialSerializer(serializers.ModelSerializer):
+        return image_url(Project, obj.image.name, obj.image_url, self.context.get('request'), obj.image_url_fallback)
+
+class TestimonialSerializer(StagedImageMixin, ImageVariantsMixin, serializers.ModelSerializer):
     id = serializers.CharField(read_only=True)
     imageUrl = serializers.SerializerMethodField()
+    imageVariants = serializers.SerializerMethodField()
+    imageSrcset = serializers.SerializerMethodField()
+    imageStatus = serializers.CharField(source='image_status', read_only=True)
 
     class Meta:
         model = Testimonial
-        fields = ['id', 'name', 'role', 'company', 'content', 'imageUrl', 'image', 'rating', 'featured', 'order', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'role', 'company', 'content', 'imageUrl', 'imageVariants', 'imageSrcset', 'imageStatus', 'image', 'rating', 'featured', 'order', 'created_at', 'updated_at']
         extra_kwargs = {'image': {'write_only': True}}
 
     def get_imageUrl(self, obj):
-        if obj.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
-        return ""
+        return image_url(Testimonial, obj.image.name, obj.image_url, self.context.get('request'))
 
 class ServiceSerializer(serializers.ModelSerializer):
     id = serializers.CharField(read_only=True)
@@ -50,22 +86,20 @@ class HomeStatsSerializer(serializers.ModelSerializer):
         model = HomeStats
         fields = ['id', 'label', 'value', 'order']
 
-class ContentSectionSerializer(serializers.ModelSerializer):
+class ContentSectionSerializer(StagedImageMixin, ImageVariantsMixin, serializers.ModelSerializer):
     id = serializers.CharField(read_only=True)
     imageUrl = serializers.SerializerMethodField()
+    imageVariants = serializers.SerializerMethodField()
+    imageSrcset = serializers.SerializerMethodField()
+    imageStatus = serializers.CharField(source='image_status', read_only=True)
 
     class Meta:
         model = ContentSection
-        fields = ['id', 'section', 'title', 'subtitle', 'content', 'imageUrl', 'image', 'updated_at']
+        fields = ['id', 'section', 'title', 'subtitle', 'content', 'imageUrl', 'imageVariants', 'imageSrcset', 'imageStatus', 'image', 'updated_at']
         extra_kwargs = {'image': {'write_only': True}}
 
     def get_imageUrl(self, obj):
-        if obj.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
-        return ""
+        return image_url(ContentSection, obj.image.name, obj.image_url, self.context.get('request'))
 
 class ContactInfoSerializer(serializers.ModelSerializer):
     id = serializers.CharField(read_only=True)
@@ -74,3 +108,198 @@ class ContactInfoSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContactInfo
         fields = ['id', 'email', 'phone', 'address', 'socialLinks', 'updated_at']
+
+
+# Read-only serializers for list GETs.
+#
+# ModelSerializer builds a field tree per instance; these work on plain dicts
+# from `QuerySet.values(*columns)` and emit exactly the same JSON as the
+# classes above (same keys, same order, same formatting). Viewsets opt in with
+# `values_serializer_class`.
+
+_datetime_field = serializers.DateTimeField()
+
+
+def datetime_formatter():
+    """
+    A function formatting datetimes exactly like DRF's DateTimeField, with the
+    output format and current timezone looked up once rather than per value.
+    """
+    output_format = api_settings.DATETIME_FORMAT
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    if tz is None or output_format is None or output_format.lower() != ISO_8601:
+        return _datetime_field.to_representation
+
+    def format_datetime(value):
+        if not value or value.tzinfo is None:
+            return _datetime_field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+    return format_datetime
+
+
+# Columns behind the image fields of ImageValuesMixin
+IMAGE_SOURCES = {
+    'imageUrl': ('image', 'image_url'),
+    'imageVariants': ('image', 'image_variants'),
+    'imageSrcset': ('image', 'image_variants'),
+}
+
+
+class ValuesSerializer:
+    model = None
+    columns = ()
+    # The output fields, in order: the column each one is copied from (the
+    # primary key as a string, datetimes formatted as DRF does), or None for
+    # those computed by a `get_<field>(row, request, item)` method, `item`
+    # holding the fields before it
+    output = {}
+    # The columns the computed fields are read from
+    sources = {}
+
+    def __init__(self, rows, many=True, context=None, fields=None):
+        self.rows = rows
+        self.context = context or {}
+        self.fields = fields
+
+    @classmethod
+    def field_names(cls):
+        """The output fields, in order."""
+        return tuple(cls.output)
+
+    @classmethod
+    def columns_for(cls, fields):
+        """The columns `fields` are computed from, plus `id` and `order`, which pagination reads."""
+        needed = {'id', 'order'}
+        for name in fields:
+            column = cls.output[name]
+            needed.update(cls.sources[name] if column is None else (column,))
+        return [column for column in cls.columns if column in needed]
+
+    @classmethod
+    def sparse_fields(cls, params):
+        """
+        The output fields left by `?fields=` and `?omit=` in `params`, in order,
+        or None when neither is given. Unknown names raise a ValidationError.
+        """
+        if 'fields' not in params and 'omit' not in params:
+            return None
+        available = cls.field_names()
+        requested = {}
+        for param in ('fields', 'omit'):
+            names = [name.strip() for name in params.get(param, '').split(',') if name.strip()]
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                raise serializers.ValidationError({
+                    param: f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(available)}."
+                })
+            requested[param] = names
+        fields = requested['fields'] or available
+        return [name for name in available if name in fields and name not in requested['omit']]
+
+    def getters(self):
+        """`(field, getter(row, request, item))` of the output fields, resolved once per serializer."""
+        format_datetime = datetime_formatter()
+        getters = []
+        for name, column in self.output.items():
+            if column is None:
+                getter = getattr(self, f'get_{name}')
+            elif column == self.model._meta.pk.attname:
+                getter = lambda row, request, item, column=column: str(row[column])
+            elif self.model._meta.get_field(column).get_internal_type() == 'DateTimeField':
+                getter = lambda row, request, item, column=column: format_datetime(row[column])
+            else:
+                getter = lambda row, request, item, column=column: row[column]
+            getters.append((name, getter))
+        return getters
+
+    def to_representation(self, row, request):
+        item = {}
+        for name, getter in self._getters:
+            item[name] = getter(row, request, item)
+        return item
+
+    @property
+    def data(self):
+        request = self.context.get('request')
+        self._getters = self.getters()
+        if self.fields is None:
+            return [self.to_representation(row, request) for row in self.rows]
+
+        # Rows only hold columns_for(fields); every field copes with None for the others
+        blank = dict.fromkeys(self.columns)
+        data = []
+        for row in self.rows:
+            item = self.to_representation({**blank, **row}, request)
+            data.append({name: item[name] for name in self.fields})
+        return data
+
+
+class ImageValuesMixin:
+    """The image fields of ImageVariantsMixin, for ValuesSerializer."""
+    sources = IMAGE_SOURCES
+
+    def get_imageUrl(self, row, request, item):
+        return image_url(self.model, row['image'], row['image_url'], request)
+
+    def get_imageVariants(self, row, request, item):
+        return current_variants(row['image_variants'], row['image'], request)
+
+    def get_imageSrcset(self, row, request, item):
+        return srcsets(item['imageVariants'])
+
+
+class ProjectValuesSerializer(ImageValuesMixin, ValuesSerializer):
+    model = Project
+    columns = ('id', 'title', 'description', 'image', 'image_url', 'image_variants', 'image_status', 'image_url_fallback', 'tags', 'link', 'featured', 'order', 'created_at', 'updated_at')
+    output = {
+        'id': 'id', 'title': 'title', 'description': 'description', 'imageUrl': None, 'imageVariants': None,
+        'imageSrcset': None, 'imageStatus': 'image_status', 'image_url_fallback': 'image_url_fallback', 'tags': 'tags',
+        'link': 'link', 'featured': 'featured', 'order': 'order', 'created_at': 'created_at', 'updated_at': 'updated_at',
+    }
+    sources = {**IMAGE_SOURCES, 'imageUrl': ('image', 'image_url', 'image_url_fallback')}
+
+    def get_imageUrl(self, row, request, item):
+        return image_url(Project, row['image'], row['image_url'], request, row['image_url_fallback'])
+
+
+class TestimonialValuesSerializer(ImageValuesMixin, ValuesSerializer):
+    model = Testimonial
+    columns = ('id', 'name', 'role', 'company', 'content', 'image', 'image_url', 'image_variants', 'image_status', 'rating', 'featured', 'order', 'created_at', 'updated_at')
+    output = {
+        'id': 'id', 'name': 'name', 'role': 'role', 'company': 'company', 'content': 'content', 'imageUrl': None,
+        'imageVariants': None, 'imageSrcset': None, 'imageStatus': 'image_status', 'rating': 'rating',
+        'featured': 'featured', 'order': 'order', 'created_at': 'created_at', 'updated_at': 'updated_at',
+    }
+
+
+class ServiceValuesSerializer(ValuesSerializer):
+    model = Service
+    columns = ('id', 'title', 'description', 'icon', 'order', 'created_at', 'updated_at')
+    output = {column: column for column in columns}
+
+
+class HomeStatsValuesSerializer(ValuesSerializer):
+    model = HomeStats
+    columns = ('id', 'label', 'value', 'order')
+    output = {column: column for column in columns}
+
+
+class ContentSectionValuesSerializer(ImageValuesMixin, ValuesSerializer):
+    model = ContentSection
+    columns = ('id', 'section', 'title', 'subtitle', 'content', 'image', 'image_url', 'image_variants', 'image_status', 'updated_at')
+    output = {
+        'id': 'id', 'section': 'section', 'title': 'title', 'subtitle': 'subtitle', 'content': 'content',
+        'imageUrl': None, 'imageVariants': None, 'imageSrcset': None, 'imageStatus': 'image_status',
+        'updated_at': 'updated_at',
+    }
+
+
+class ContactInfoValuesSerializer(ValuesSerializer):
+    model = ContactInfo
+    columns = ('id', 'email', 'phone', 'address', 'social_links', 'updated_at')
+    output = {
+        'id': 'id', 'email': 'email', 'phone': 'phone', 'address': 'address', 'socialLinks': 'social_links',
+        'updated_at': 'updated_at',
+    }
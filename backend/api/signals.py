@@ -0,0 +1,51 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .models import Project, Testimonial, Service, HomeStats, ContentSection, ContactInfo
+
+CONTENT_MODELS = (Project, Testimonial, Service, HomeStats, ContentSection, ContactInfo)
+
+# Sent once per write with `sender` set to the model class that changed.
+# Row-level saves/deletes (viewsets, Django admin, seed_data.py) send it from the
+# receivers below; code that writes with queryset.update()/bulk_* should call
+# `changed()` itself, once per batch.
+content_changed = Signal()
+
+_batch = threading.local()
+
+
+def changed(model):
+    """Report a write to `model`; deferred while inside `batched_changes()`."""
+    pending = getattr(_batch, 'models', None)
+    if pending is not None:
+        pending.add(model)
+    else:
+        content_changed.send(sender=model)
+
+
+@contextmanager
+def batched_changes():
+    """
+    Collapse the change notifications of every write made inside the block
+    into one `content_changed` per model, sent when the block exits.
+    """
+    if getattr(_batch, 'models', None) is not None:
+        yield  # Already batching; the outermost block sends
+        return
+    _batch.models = set()
+    try:
+        yield
+    finally:
+        models, _batch.models = _batch.models, None
+    for model in models:
+        content_changed.send(sender=model)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def _row_changed(sender, **kwargs):
+    if sender in CONTENT_MODELS and not kwargs.get('raw'):
+        changed(sender)
@@ -0,0 +1,234 @@
+"""
+Pre-rendered JSON snapshots of the public read endpoints.
+
+`build()` renders the list and every detail of each router resource, plus
+the homepage bundle, into API_SNAPSHOT_ROOT under content-hashed names, each
+with .gz (and, if `brotli` is installed, .br) siblings, and records them in
+`manifest.json`, keyed by the API path relative to /api/:
+
+    {"files": {"projects/": "projects.3f2a9c1b0d4e.json",
+               "projects/7/": "projects/7.a1b2c3d4e5f6.json", ...}}
+
+AsyncWhiteNoiseMiddleware serves the directory at API_SNAPSHOT_URL: hashed
+files are cached forever, the manifest is revalidated on every use. Bodies
+are byte-identical to the API's (same `.values()` serializers and renderer).
+
+With API_SNAPSHOTS on, a content change rebuilds only the changed model's
+files and the bundle, in the background. Files dropped from the manifest are
+listed under "retired" and deleted API_SNAPSHOT_GRACE seconds later, so
+clients holding an older manifest can still fetch them.
+
+Absolute URLs in the bodies (media, image variants) are built for
+API_SNAPSHOT_BASE_URL, the public origin of the API: building fails without
+it, and so does `manage.py check` when API_SNAPSHOTS is on.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+from django.dispatch import receiver
+from django.http import HttpRequest
+from django.utils import timezone
+
+from . import tasks
+from .async_views import RESOURCES
+from .renderers import get_renderer
+from .signals import content_changed
+from .views import HomepageBundleView
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock
+    fcntl = None
+
+MANIFEST = 'manifest.json'
+BUNDLE = 'bundle/'
+
+_lock = threading.Lock()
+renderer = get_renderer()
+
+
+def get_root():
+    return str(settings.API_SNAPSHOT_ROOT)
+
+
+def get_base_url():
+    """`(scheme, host)` of API_SNAPSHOT_BASE_URL, or None unless it is an http(s) origin."""
+    scheme, _, host = (getattr(settings, 'API_SNAPSHOT_BASE_URL', '') or '').partition('://')
+    host = host.rstrip('/')
+    if scheme not in ('http', 'https') or not host or '/' in host:
+        return None
+    return scheme, host
+
+
+class SnapshotRequest(HttpRequest):
+    """A GET of /api/ on the API's public origin, for the serializers' absolute URLs."""
+
+    def __init__(self, scheme, host):
+        super().__init__()
+        self.method = 'GET'
+        self.path = self.path_info = '/api/'
+        self._scheme, self._host = scheme, host
+
+    def _get_scheme(self):
+        return self._scheme
+
+    def get_host(self):
+        return self._host  # From settings, not from a client: no ALLOWED_HOSTS check
+
+
+def make_request():
+    base_url = get_base_url()
+    if base_url is None:
+        raise ImproperlyConfigured('API_SNAPSHOT_BASE_URL must be the http(s) origin of the API to build snapshots.')
+    return SnapshotRequest(*base_url)
+
+
+@checks.register()
+def check_base_url(app_configs, **kwargs):
+    if getattr(settings, 'API_SNAPSHOTS', False) and get_base_url() is None:
+        return [checks.Error(
+            'API_SNAPSHOTS is on but API_SNAPSHOT_BASE_URL is not an http(s) origin.',
+            hint='Set it to the public origin of the API, e.g. https://api.example.com.',
+            id='api.E001',
+        )]
+    return []
+
+
+def render_resource(name, request):
+    """Yield `(api path, body)` for the list and every detail of resource `name`."""
+    model, serializer_class, *_ = RESOURCES[name]
+    context = {'request': request}
+    rows = list(model.objects.values(*serializer_class.columns))
+    data = serializer_class(rows, context=context).data
+    yield f'{name}/', renderer.render(data)
+    for row, item in zip(rows, data):
+        yield f'{name}/{row["id"]}/', renderer.render(item)
+
+
+def render_bundle(request):
+    data = {}
+    for name, (queryset, _) in HomepageBundleView.collections.items():
+        serializer_class = RESOURCES[name][1]
+        rows = queryset.values(*serializer_class.columns)
+        data[name] = serializer_class(rows, context={'request': request}).data
+    return renderer.render(data)
+
+
+def file_name(path, body):
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    return f'{path.rstrip("/")}.{digest}.json'
+
+
+def _write(target, data):
+    tmp = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, target)
+
+
+def write_file(root, name, body):
+    target = os.path.join(root, name)
+    if os.path.exists(target):
+        return  # Same name, same content
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    min_size = getattr(settings, 'API_SNAPSHOT_COMPRESS_MIN_SIZE', 256)
+    if len(body) >= min_size:
+        # Siblings first: WhiteNoise looks for them when it first sees the file
+        _write(target + '.gz', gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write(target + '.br', brotli.compress(body))
+    _write(target, body)
+
+
+def read_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'files': {}}
+
+
+@contextmanager
+def locked(root):
+    with _lock, open(os.path.join(root, '.lock'), 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def build(names=None):
+    """
+    Rebuild the snapshots of the resources in `names` (all by default) and of
+    the bundle. Returns the number of files now in the manifest.
+    """
+    root = get_root()
+    os.makedirs(root, exist_ok=True)
+    names = list(RESOURCES) if names is None else list(names)
+    with locked(root):
+        request = make_request()
+        manifest = read_manifest(root)
+        files = {
+            path: file for path, file in manifest['files'].items()
+            if path != BUNDLE and path.split('/', 1)[0] not in names
+        }
+        for name in names:
+            for path, body in render_resource(name, request):
+                files[path] = file_name(path, body)
+                write_file(root, files[path], body)
+        body = render_bundle(request)
+        files[BUNDLE] = file_name(BUNDLE, body)
+        write_file(root, files[BUNDLE], body)
+
+        # Files dropped from the manifest stay for API_SNAPSHOT_GRACE seconds
+        now = int(time.time())
+        current = set(files.values())
+        retired = {file: since for file, since in manifest.get('retired', {}).items() if file not in current}
+        retired.update({file: now for file in manifest['files'].values() if file not in current})
+        retired = prune(root, retired, now - getattr(settings, 'API_SNAPSHOT_GRACE', 300))
+
+        _write(os.path.join(root, MANIFEST), json.dumps(
+            {'generated_at': timezone.now().isoformat(), 'files': files, 'retired': retired},
+            sort_keys=True, separators=(',', ':'),
+        ).encode())
+    return len(files)
+
+
+def prune(root, retired, cutoff):
+    """Delete the retired files older than `cutoff`; return the rest."""
+    kept = {}
+    for file, since in retired.items():
+        if since >= cutoff:
+            kept[file] = since
+            continue
+        for path in (file, file + '.gz', file + '.br'):
+            try:
+                os.remove(os.path.join(root, path))
+            except FileNotFoundError:
+                pass
+    return kept
+
+
+def resource_names(model):
+    return [name for name, (resource_model, *_) in RESOURCES.items() if resource_model is model]
+
+
+@receiver(content_changed)
+def _rebuild_on_change(sender, **kwargs):
+    if not getattr(settings, 'API_SNAPSHOTS', False):
+        return
+    names = resource_names(sender)
+    if names:
+        tasks.submit(build, names)
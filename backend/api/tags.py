@@ -0,0 +1,210 @@
+"""
+Tag index for `Project.tags`.
+
+`Project.tags` stays the source of truth, a JSON list of strings. Triggers
+on the project table mirror it into Tag (one row per distinct string) and
+ProjectTag (one row per project and tag), and triggers on ProjectTag keep
+`Tag.count` current, so every write is reflected: save(), bulk_create,
+queryset.update() and raw SQL alike. Facet counts are then a read of Tag.
+
+Tags are matched exactly, case included. A tag no project carries any more
+keeps its row with a count of 0; facets leave it out.
+
+Databases other than SQLite and PostgreSQL get no triggers; there, the index
+is rebuilt whenever projects change.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.dispatch import receiver
+from rest_framework.exceptions import ValidationError
+
+from .models import Project, ProjectTag, Tag
+from .signals import content_changed
+
+TAG_MODES = ('any', 'all')
+
+# SQLite: the distinct strings of a project's tags, for `new` or `old`
+SQLITE_TAGS = "SELECT DISTINCT value FROM json_each({ref}.tags) WHERE json_valid({ref}.tags) AND type = 'text'"
+
+# Existing rows are skipped with NOT IN / NOT EXISTS rather than INSERT OR
+# IGNORE: the conflict policy of the statement firing a trigger overrides the
+# trigger's own, so an upsert or INSERT OR REPLACE on projects would turn
+# OR IGNORE into a failure or a deletion.
+SQLITE_NEW_TAGS = f"""
+    INSERT INTO api_tag (name) SELECT value FROM ({SQLITE_TAGS.format(ref='new')})
+        WHERE value NOT IN (SELECT name FROM api_tag);
+"""
+SQLITE_NEW_LINKS = f"""
+    INSERT INTO api_projecttag (project_id, tag_id)
+        SELECT new.id, id FROM api_tag WHERE name IN ({SQLITE_TAGS.format(ref='new')})
+        AND NOT EXISTS (SELECT 1 FROM api_projecttag WHERE project_id = new.id AND tag_id = api_tag.id);
+"""
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER api_project_tags_ai AFTER INSERT ON api_project BEGIN
+        {SQLITE_NEW_TAGS}
+        {SQLITE_NEW_LINKS}
+    END
+    """,
+    f"""
+    CREATE TRIGGER api_project_tags_au AFTER UPDATE OF tags ON api_project WHEN old.tags IS NOT new.tags BEGIN
+        DELETE FROM api_projecttag WHERE project_id = new.id
+            AND tag_id NOT IN (SELECT id FROM api_tag WHERE name IN ({SQLITE_TAGS.format(ref='new')}));
+        {SQLITE_NEW_TAGS}
+        {SQLITE_NEW_LINKS}
+    END
+    """,
+    """
+    CREATE TRIGGER api_project_tags_ad AFTER DELETE ON api_project BEGIN
+        DELETE FROM api_projecttag WHERE project_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_projecttag_count_ai AFTER INSERT ON api_projecttag BEGIN
+        UPDATE api_tag SET count = count + 1 WHERE id = new.tag_id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_projecttag_count_ad AFTER DELETE ON api_projecttag BEGIN
+        UPDATE api_tag SET count = count - 1 WHERE id = old.tag_id;
+    END
+    """,
+]
+SQLITE_TRIGGER_NAMES = [
+    'api_project_tags_ai', 'api_project_tags_au', 'api_project_tags_ad',
+    'api_projecttag_count_ai', 'api_projecttag_count_ad',
+]
+
+POSTGRES_TAGS = """
+    SELECT DISTINCT element #>> '{}' FROM jsonb_array_elements(
+        CASE WHEN jsonb_typeof(NEW.tags) = 'array' THEN NEW.tags ELSE '[]'::jsonb END
+    ) AS element WHERE jsonb_typeof(element) = 'string'
+"""
+
+POSTGRES_TRIGGERS = [
+    f"""
+    CREATE FUNCTION api_project_sync_tags() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM api_projecttag WHERE project_id = OLD.id;
+            RETURN OLD;
+        END IF;
+        IF TG_OP = 'UPDATE' AND NEW.tags IS NOT DISTINCT FROM OLD.tags THEN
+            RETURN NEW;
+        END IF;
+        DELETE FROM api_projecttag WHERE project_id = NEW.id
+            AND tag_id NOT IN (SELECT id FROM api_tag WHERE name IN ({POSTGRES_TAGS}));
+        INSERT INTO api_tag (name) {POSTGRES_TAGS} ON CONFLICT (name) DO NOTHING;
+        INSERT INTO api_projecttag (project_id, tag_id)
+            SELECT NEW.id, id FROM api_tag WHERE name IN ({POSTGRES_TAGS})
+            ON CONFLICT (tag_id, project_id) DO NOTHING;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_project_tags AFTER INSERT OR UPDATE OF tags OR DELETE ON api_project
+        FOR EACH ROW EXECUTE FUNCTION api_project_sync_tags()
+    """,
+    """
+    CREATE FUNCTION api_projecttag_count() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE api_tag SET "count" = "count" + 1 WHERE id = NEW.tag_id;
+            RETURN NEW;
+        END IF;
+        UPDATE api_tag SET "count" = "count" - 1 WHERE id = OLD.tag_id;
+        RETURN OLD;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_projecttag_count AFTER INSERT OR DELETE ON api_projecttag
+        FOR EACH ROW EXECUTE FUNCTION api_projecttag_count()
+    """,
+]
+
+
+def has_triggers(conn=connection):
+    return conn.vendor in ('sqlite', 'postgresql')
+
+
+def install_sql(vendor):
+    """
+    The statements installing the triggers on `vendor`, after dropping any
+    existing ones. Migrations carry a copy of them, as they were when written.
+    """
+    return uninstall_sql(vendor) + {'sqlite': SQLITE_TRIGGERS, 'postgresql': POSTGRES_TRIGGERS}.get(vendor, [])
+
+
+def uninstall_sql(vendor):
+    if vendor == 'sqlite':
+        return [f'DROP TRIGGER IF EXISTS {name}' for name in SQLITE_TRIGGER_NAMES]
+    if vendor == 'postgresql':
+        return [
+            'DROP TRIGGER IF EXISTS api_project_tags ON api_project',
+            'DROP TRIGGER IF EXISTS api_projecttag_count ON api_projecttag',
+            'DROP FUNCTION IF EXISTS api_project_sync_tags()',
+            'DROP FUNCTION IF EXISTS api_projecttag_count()',
+        ]
+    return []
+
+
+def project_tags(tags):
+    return {tag for tag in tags if isinstance(tag, str)} if isinstance(tags, list) else set()
+
+
+def rebuild(batch_size=1000):
+    """Recompute the whole index from `Project.tags`, in case it was ever bypassed."""
+    with transaction.atomic():
+        ProjectTag.objects.all().delete()
+        links = {pk: project_tags(tags) for pk, tags in Project.objects.values_list('pk', 'tags').iterator()}
+        names = set().union(*links.values())
+        existing = set(Tag.objects.filter(name__in=names).values_list('name', flat=True))
+        Tag.objects.bulk_create([Tag(name=name) for name in names - existing], batch_size=batch_size)
+        ids = dict(Tag.objects.values_list('name', 'pk'))
+        ProjectTag.objects.bulk_create([
+            ProjectTag(project_id=pk, tag_id=ids[name]) for pk, tags in links.items() for name in tags
+        ], batch_size=batch_size)
+        # Overwrites whatever the count triggers did while linking
+        Tag.objects.update(count=Coalesce(Subquery(
+            ProjectTag.objects.filter(tag=OuterRef('pk')).values('tag').annotate(n=Count('pk')).values('n'),
+        ), 0))
+
+
+def parse_tag_mode(params):
+    """The `?tag_mode=` of `params`, 'any' if not given; anything else is a ValidationError."""
+    mode = params.get('tag_mode', 'any')
+    if mode not in TAG_MODES:
+        raise ValidationError({'tag_mode': f"Choose from: {', '.join(TAG_MODES)}."})
+    return mode
+
+
+def filter_by_tags(queryset, names, mode='any'):
+    """
+    Narrow a Project queryset to the rows carrying any (`mode='any'`) or all
+    (`mode='all'`) of the tags in `names`.
+    """
+    names = sorted(set(names))
+    if not names:
+        return queryset
+    links = ProjectTag.objects.filter(tag__name__in=names)
+    if mode == 'all' and len(names) > 1:
+        links = links.values('project_id').annotate(n=Count('tag_id')).filter(n=len(names))
+    return queryset.filter(pk__in=links.values('project_id'))
+
+
+def facets():
+    """`[{'name': ..., 'count': ...}]` of the tags in use, most used first."""
+    return [
+        {'name': name, 'count': count}
+        for name, count in Tag.objects.filter(count__gt=0).values_list('name', 'count')
+    ]
+
+
+@receiver(content_changed, sender=Project)
+def _rebuild_without_triggers(sender, **kwargs):
+    if not has_triggers():
+        rebuild()
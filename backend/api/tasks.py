@@ -0,0 +1,49 @@
+"""
+In-process background work.
+
+Jobs run on a small thread pool owned by the current worker process, so slow
+I/O (image processing, uploads to remote storage) never holds up a request.
+With `API_TASKS_EAGER = True` jobs run inline instead, which is what tests use.
+Jobs must be idempotent: a worker that is restarted loses its queue, and the
+management commands that go with each job type re-run anything left behind.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'API_TASK_WORKERS', 2),
+                thread_name_prefix='api-tasks',
+            )
+        return _executor
+
+
+def _run(func, args):
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Background task %s%r failed', func.__name__, args)
+    finally:
+        close_old_connections()
+
+
+def submit(func, *args):
+    """Run `func(*args)` in the background once the current transaction commits."""
+    if getattr(settings, 'API_TASKS_EAGER', False):
+        transaction.on_commit(lambda: func(*args))
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run, func, args))
@@ -1,3 +1,1253 @@
-from django.test import TestCase
+import gzip
+import importlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+import brotli
+from PIL import Image
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import JWTAuthentication, StatelessJWTAuthentication
+from .cache import get_cache
+from .pagination import KeysetPagination
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+from . import authentication, compression, firestore, images, metrics, search, serializers, snapshots, tags, transfer, versions
+from .models import ContactInfo, ContentSection, ContentVersion, HomeStats, Project, ProjectTag, Service, Tag, Testimonial
+
+
+LOCAL_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def image_file(name='photo.png', size=(1, 1)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class TempMediaMixin:
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(
+            STORAGES=LOCAL_STORAGES, MEDIA_ROOT=self.media_root, MEDIA_STAGING_ROOT=f'{self.media_root}/staging',
+        )
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        super().setUp()
+
+
+class ContentFixtureMixin:
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        Project.objects.create(title='Featured', description='A', tags=['Django'], featured=True, order=0)
+        Project.objects.create(title='Hidden', description='B', tags=[], featured=False, order=1)
+        Testimonial.objects.create(name='Ada', role='CEO', company='Acme', content='Great', featured=True)
+        Service.objects.create(title='Web', description='Sites', icon='code')
+        HomeStats.objects.create(label='Projects', value='50+')
+        ContentSection.objects.create(section='hero', title='Hi', content='Hello')
+        ContactInfo.objects.create(email='a@example.com', phone='1', address='Here', social_links={'github': 'x'})
+
+
+class HomepageBundleTests(ContentFixtureMixin, TestCase):
+    def test_bundle_matches_individual_endpoints(self):
+        bundle = self.client.get('/api/bundle/').json()
+        self.assertEqual(bundle['projects'], self.client.get('/api/projects/?featured=true').json())
+        self.assertEqual(bundle['testimonials'], self.client.get('/api/testimonials/?featured=true').json())
+        for name in ['services', 'home-stats', 'content', 'contact-info']:
+            self.assertEqual(bundle[name], self.client.get(f'/api/{name}/').json())
+
+    def test_include_selects_collections(self):
+        bundle = self.client.get('/api/bundle/?include=services,home-stats').json()
+        self.assertEqual(set(bundle), {'services', 'home-stats'})
+
+    def test_unknown_include_is_rejected(self):
+        response = self.client.get('/api/bundle/?include=projects,nope')
+        self.assertEqual(response.status_code, 400)
+
+
+class ResponseCacheTests(ContentFixtureMixin, TestCase):
+    def test_second_get_is_served_from_cache(self):
+        self.assertEqual(self.client.get('/api/projects/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/projects/')['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get('/api/projects/?featured=true')['X-Cache'], 'MISS')
+
+    def test_model_writes_invalidate(self):
+        self.client.get('/api/projects/')
+        Project.objects.create(title='New', description='C', order=2)
+        response = self.client.get('/api/projects/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()), 3)
+
+        self.client.get('/api/services/')
+        Project.objects.get(title='New').delete()
+        self.assertEqual(self.client.get('/api/services/')['X-Cache'], 'HIT')
+        self.assertEqual(len(self.client.get('/api/projects/').json()), 2)
+
+    def test_viewset_writes_invalidate(self):
+        admin = User.objects.create_user('admin', password='pw', is_staff=True)
+        self.client.get('/api/home-stats/')
+        self.client.force_authenticate(admin)
+        stat = HomeStats.objects.get()
+        self.client.patch(f'/api/home-stats/{stat.pk}/', {'value': '60+'}, format='json')
+        response = self.client.get('/api/home-stats/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()[0]['value'], '60+')
+
+    def test_stats_are_staff_only(self):
+        self.assertIn(self.client.get('/api/cache-stats/').status_code, (401, 403))
+        self.client.force_authenticate(User.objects.create_user('admin', password='pw', is_staff=True))
+        self.assertIn('hits', self.client.get('/api/cache-stats/').json())
+
+
+class ConditionalGetTests(ContentFixtureMixin, TestCase):
+    def test_list_etag_revalidation(self):
+        for cached in (False, True):
+            if not cached:
+                get_cache().clear()
+            response = self.client.get('/api/projects/')
+            etag = response['ETag']
+            self.assertTrue(response.has_header('Last-Modified'))
+            response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+
+    def test_etag_changes_on_write_and_delete(self):
+        etag = self.client.get('/api/projects/')['ETag']
+        Project.objects.get(title='Hidden').delete()
+        response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_and_if_modified_since(self):
+        stat = HomeStats.objects.get()
+        response = self.client.get(f'/api/home-stats/{stat.pk}/')
+        last_modified = response['Last-Modified']
+        get_cache().clear()
+        with self.assertNumQueries(1):  # Content versions, shared with the cache lookup
+            response = self.client.get(f'/api/home-stats/{stat.pk}/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get('/api/home-stats/abc/').status_code, 404)
+
+    def test_validators_never_query_the_content_tables(self):
+        with CaptureQueriesContext(connection) as queries:
+            first = self.client.get('/api/projects/?page_size=1')
+            self.client.get(first.json()['next'])  # Keyset page
+            self.client.get('/api/projects/?page_size=1')  # Cache hit
+        self.assertFalse([q['sql'] for q in queries if 'MAX(' in q['sql'] or 'COUNT(' in q['sql']])
+        self.assertEqual(self.client.get('/api/projects/?page_size=1', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+
+class ContentVersionTests(ContentFixtureMixin, TestCase):
+    def test_versions_advance_per_model_and_globally(self):
+        before = self.client.get('/api/versions/').json()
+        self.assertEqual(set(before['models']), {'projects', 'testimonials', 'services', 'home-stats', 'content', 'contact-info'})
+        Service.objects.create(title='Design', description='UI', icon='palette')
+        after = self.client.get('/api/versions/').json()
+        self.assertGreater(after['version'], before['version'])
+        self.assertGreater(after['models']['services'], before['models']['services'])
+        self.assertEqual(after['models']['projects'], before['models']['projects'])
+
+    def test_versions_are_counted_in_the_database(self):
+        before = versions.get_versions([Project, Service])
+        for _ in range(3):
+            versions.bump(Project)
+        get_cache().clear()  # An evicted or per-process response cache loses nothing
+        self.assertEqual(versions.get_versions([Project, Service]), (before[0] + 3, before[1]))
+        self.assertEqual(ContentVersion.objects.get(name='api.project').version, before[0] + 3)
+
+    def test_global_version_only_goes_up(self):
+        seen = [self.client.get('/api/versions/').json()['version']]
+        Service.objects.create(title='Design', description='UI', icon='palette')
+        seen.append(self.client.get('/api/versions/').json()['version'])
+        seen.append(self.client.get('/api/versions/').json()['version'])
+        ContentVersion.objects.all().delete()  # Reseeded ahead of every version handed out
+        seen.append(self.client.get('/api/versions/').json()['version'])
+        self.assertEqual(seen[1], seen[0] + 1)
+        self.assertEqual(seen[2], seen[1])
+        self.assertGreater(seen[3], seen[2])
+
+    def test_poll_without_changes_is_not_modified(self):
+        etag = self.client.get('/api/versions/')['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/versions/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        HomeStats.objects.get().delete()
+        self.assertEqual(self.client.get('/api/versions/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class KeysetPaginationTests(ContentFixtureMixin, TestCase):
+    def test_unpaginated_by_default(self):
+        self.assertIsInstance(self.client.get('/api/projects/').json(), list)
+        self.assertEqual(len(self.client.get('/api/projects/?limit=1').json()), 1)
+
+    def test_walks_every_row_once_in_order(self):
+        for i in range(5):
+            Project.objects.create(title=f'Tie {i}', description='', order=1)
+        expected = [str(pk) for pk in Project.objects.order_by('order', 'id').values_list('id', flat=True)]
+        seen, url = [], '/api/projects/?page_size=3&limit=1'
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 3)
+            seen += [row['id'] for row in page['results']]
+            url = page['next']
+        self.assertEqual(seen, expected)
+
+    def test_filters_and_invalid_cursor(self):
+        page = self.client.get('/api/testimonials/?featured=true&page_size=10').json()
+        self.assertEqual(len(page['results']), 1)
+        self.assertIsNone(page['next'])
+        self.assertEqual(self.client.get('/api/testimonials/?cursor=garbage').status_code, 404)
+
+
+class QueryPlanTests(TestCase):
+    """
+    The list/filter/keyset queries the viewsets run must be served by an index,
+    without a sequential scan or a separate sort step. Runs against whatever
+    DATABASE_URL points at (SQLite by default, or Postgres).
+    """
+
+    def setUp(self):
+        Project.objects.bulk_create(
+            Project(title=f'P{i}', description='', order=i % 50, featured=i % 10 == 0) for i in range(500)
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+                # Tiny test tables always look cheaper to scan; make the planner
+                # show whether an index *can* serve the query.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_bitmapscan = off')
+
+    def queries(self):
+        keyset = KeysetPagination()
+        return [
+            ('project_order_idx', Project.objects.all()),
+            ('project_featured_order_idx', Project.objects.filter(featured=True)),
+            ('project_order_idx', keyset.apply_cursor(Project.objects.all(), (10, 42))[:21]),
+            ('project_featured_order_idx', keyset.apply_cursor(Project.objects.filter(featured=True), (10, 42))[:21]),
+            ('testimonial_order_idx', Testimonial.objects.all()),
+            ('testimonial_featured_order_idx', Testimonial.objects.filter(featured=True)),
+            ('testimonial_featured_order_idx', keyset.apply_cursor(Testimonial.objects.filter(featured=True), (1, 1))[:21]),
+            ('service_order_idx', Service.objects.all()),
+            ('homestats_order_idx', HomeStats.objects.all()),
+            (None, ContentSection.objects.filter(section='hero')),
+        ]
+
+    def assertIndexedPlan(self, plan, index):
+        if connection.vendor == 'sqlite':
+            self.assertNotIn('USE TEMP B-TREE', plan)
+            self.assertRegex(plan, r'USING (COVERING )?INDEX ' + (index or ''))
+        elif connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan', plan)
+            self.assertNotRegex(plan, r'(^|\s)Sort')
+            self.assertRegex(plan, r'Index (Only )?Scan using ' + (index or ''))
+        else:
+            self.skipTest(f'No plan assertions for {connection.vendor}')
+
+    def test_list_queries_use_indexes(self):
+        for index, queryset in self.queries():
+            with self.subTest(query=str(queryset.query)):
+                self.assertIndexedPlan(queryset.explain(), index)
+
+
+@override_settings(STORAGES=LOCAL_STORAGES)
+class ValuesSerializerTests(ContentFixtureMixin, TestCase):
+    pairs = [
+        (serializers.ProjectSerializer, serializers.ProjectValuesSerializer),
+        (serializers.TestimonialSerializer, serializers.TestimonialValuesSerializer),
+        (serializers.ServiceSerializer, serializers.ServiceValuesSerializer),
+        (serializers.HomeStatsSerializer, serializers.HomeStatsValuesSerializer),
+        (serializers.ContentSectionSerializer, serializers.ContentSectionValuesSerializer),
+        (serializers.ContactInfoSerializer, serializers.ContactInfoValuesSerializer),
+    ]
+
+    def test_same_json_as_model_serializers(self):
+        Project.objects.filter(title='Featured').update(image='projects/a b.jpg')
+        Project.objects.filter(title='Hidden').update(image_url_fallback='https://cdn.example.com/x.png')
+        Testimonial.objects.update(image='testimonials/t.png')
+        request = self.client.get('/api/').wsgi_request
+        for model_serializer, values_serializer in self.pairs:
+            with self.subTest(model=values_serializer.model.__name__):
+                queryset = values_serializer.model.objects.all()
+                expected = model_serializer(queryset, many=True, context={'request': request}).data
+                actual = values_serializer(queryset.values(*values_serializer.columns), context={'request': request}).data
+                self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+
+class ImageURLTests(TempMediaMixin, ContentFixtureMixin, TestCase):
+    def test_url_is_resolved_on_save_and_refreshed_on_change(self):
+        project = Project.objects.get(title='Featured')
+        self.assertEqual(project.image_url, '')
+        project.image = image_file('first.png')
+        project.save()
+        self.assertEqual(project.image_url, project.image.url)
+        self.assertTrue(project.image_url.startswith('/media/projects/first'))
+
+        project.image = image_file('second.png')
+        project.save()
+        project.refresh_from_db()
+        self.assertTrue(project.image_url.startswith('/media/projects/second'))
+
+        project.image = None
+        project.save()
+        self.assertEqual(project.image_url, '')
+
+    def test_list_does_no_storage_work(self):
+        project = Project.objects.get(title='Featured')
+        project.image = image_file()
+        project.save()
+        storage = Project._meta.get_field('image').storage
+        with mock.patch.object(type(storage._wrapped), 'url', side_effect=AssertionError):
+            data = self.client.get('/api/projects/').json()
+        self.assertEqual(data[0]['imageUrl'], 'http://testserver' + project.image_url)
+
+
+@override_settings(API_TASKS_EAGER=True, IMAGE_VARIANT_WIDTHS=[320, 640, 1024], IMAGE_VARIANT_FORMATS=['webp'])
+class ImageVariantTests(TempMediaMixin, ContentFixtureMixin, TestCase):
+    def test_variants_are_generated_and_exposed(self):
+        project = Project.objects.get(title='Featured')
+        project.image = image_file(size=(800, 400))
+        with self.captureOnCommitCallbacks(execute=True):
+            project.save()
+        project.refresh_from_db()
+        variants = project.image_variants['variants']
+        self.assertEqual([(v['width'], v['height'], v['format']) for v in variants], [(320, 160, 'webp'), (640, 320, 'webp')])
+        with Image.open(f"{self.media_root}/{variants[0]['url'].removeprefix('/media/')}") as variant:
+            self.assertEqual((variant.format, variant.size), ('WEBP', (320, 160)))
+
+        data = self.client.get(f'/api/projects/{project.pk}/').json()
+        self.assertEqual(data['imageSrcset']['webp'], ', '.join(
+            f"http://testserver{v['url']} {v['width']}w" for v in variants
+        ))
+        self.assertEqual(self.client.get('/api/projects/').json()[0]['imageVariants'], data['imageVariants'])
+
+    def test_variants_of_a_replaced_image_are_not_served(self):
+        project = Project.objects.get(title='Featured')
+        project.image = image_file(size=(400, 200))
+        with self.captureOnCommitCallbacks(execute=True):
+            project.save()
+        project.image = image_file('new.png', size=(400, 200))
+        project.save()  # Variant job not run yet
+        self.assertEqual(self.client.get(f'/api/projects/{project.pk}/').json()['imageVariants'], [])
+
+
+@override_settings(API_TASKS_EAGER=True, IMAGE_VARIANT_FORMATS=['webp'])
+class StagedUploadTests(TempMediaMixin, ContentFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(User.objects.create_user('admin', password='pw', is_staff=True))
+
+    def test_upload_is_published_in_the_background(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post('/api/projects/', {
+                'title': 'Async', 'description': 'D', 'tags': '[]', 'image': image_file('cover.png', (64, 64)),
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['imageStatus'], 'pending')
+        project = Project.objects.get(pk=response.json()['id'])
+        self.assertFalse(project.image)
+        self.assertTrue(os.path.exists(f'{self.media_root}/staging/{project.image_staging}'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for callback in callbacks:
+                callback()
+        status = self.client.get(f'/api/projects/{project.pk}/image-status/').json()
+        self.assertEqual(status['imageStatus'], 'ready')
+        self.assertRegex(status['imageUrl'], r'^http://testserver/media/projects/cover.*\.png$')
+        project.refresh_from_db()
+        self.assertEqual(project.image_staging, '')
+        self.assertEqual(os.listdir(f'{self.media_root}/staging/project'), [])
+        self.assertEqual(len(project.image_variants['variants']), 1)
+
+    def test_failed_push_is_reported_and_retried(self):
+        stat = ContentSection.objects.get()
+        storage = ContentSection._meta.get_field('image').storage
+        with mock.patch('api.tasks.submit') as submit, self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/content/{stat.pk}/', {'image': image_file()}, format='multipart')
+        status_url = f'/api/content/{stat.pk}/image-status/'
+        self.assertEqual(self.client.get(status_url).json()['imageStatus'], 'pending')
+        self.assertEqual(self.client.get(status_url)['X-Cache'], 'HIT')  # Polled and cached
+
+        (func, *args), _ = submit.call_args
+        with mock.patch.object(storage, 'save', side_effect=OSError('offline')), self.assertLogs('api.uploads', 'ERROR'):
+            func(*args)
+        self.assertEqual(self.client.get(status_url).json()['imageStatus'], 'failed')
+
+        call_command('process_staged_images', '--retry-failed', stdout=io.StringIO())
+        stat.refresh_from_db()
+        self.assertEqual((stat.image_status, stat.image_staging), ('ready', ''))
+        self.assertTrue(stat.image_url)
+
+
+class BulkEndpointTests(ContentFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(User.objects.create_user('admin', password='pw', is_staff=True))
+
+    def version(self, resource):
+        return self.client.get('/api/versions/').json()['models'][resource]
+
+    def test_bulk_create_update_delete_in_one_batch(self):
+        featured, hidden = Project.objects.order_by('order')
+        before = self.version('projects')
+        with mock.patch('api.versions._bump', wraps=versions._bump) as bump, \
+                mock.patch('api.bulk.schedule_variants', wraps=images.schedule_variants) as schedule:
+            response = self.client.post('/api/projects/bulk/', {
+                'create': [{'title': 'N1', 'description': 'x', 'tags': ['a']}, {'title': 'N2', 'description': 'y', 'tags': []}],
+                'update': [{'id': str(featured.pk), 'title': 'Renamed'}],
+                'delete': [str(hidden.pk)],
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(bump.call_count, 1)
+        (model, created), _ = schedule.call_args  # Rows without post_save still get their variants
+        self.assertEqual((model, sorted(row.title for row in created)), (Project, ['N1', 'N2']))
+        self.assertEqual(len(response.json()['created']), 2)
+        self.assertEqual(sorted(Project.objects.values_list('title', flat=True)), ['N1', 'N2', 'Renamed'])
+        self.assertGreater(self.version('projects'), before)
+
+    def test_invalid_batch_changes_nothing(self):
+        response = self.client.post('/api/services/bulk/', {
+            'create': [{'title': 'OK', 'description': 'x', 'icon': 'code'}],
+            'update': [{'id': '999999', 'title': 'Missing'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Service.objects.count(), 1)
+        response = self.client.post('/api/services/bulk/', {'create': [{'title': 'No icon'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        service = Service.objects.get()
+        response = self.client.post('/api/services/bulk/', {'delete': [str(service.pk), '999999']}, format='json')
+        self.assertEqual(response.json(), {'delete': 'Not found: 999999.'})
+        self.assertTrue(Service.objects.filter(pk=service.pk).exists())
+
+    def test_rejects_bodies_other_than_objects(self):
+        for url in ('/api/services/bulk/', '/api/services/reorder/'):
+            for body in ([{'create': []}], 'create', 3):
+                with self.subTest(url=url, body=body):
+                    response = self.client.post(url, body, format='json')
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), ['Expected a JSON object.'])
+        response = self.client.post('/api/services/bulk/', {'update': 3}, format='json')
+        self.assertEqual(response.json(), {'update': 'Expected a list of objects.'})
+
+    def test_reorder_in_one_statement(self):
+        ids = [str(pk) for pk in Project.objects.order_by('-order').values_list('pk', flat=True)]
+        with self.assertNumQueries(5):  # savepoint, UPDATE, version bump, release, re-read
+            response = self.client.post('/api/projects/reorder/', {'ids': ids}, format='json')
+        self.assertEqual([row['id'] for row in response.json()], ids)
+        self.assertEqual(self.client.post('/api/projects/reorder/', {'ids': ids + ['999']}, format='json').status_code, 400)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(None)
+        self.assertIn(self.client.post('/api/home-stats/reorder/', {'ids': []}, format='json').status_code, (401, 403))
+
+
+class AsyncReadPathTests(ContentFixtureMixin, TestCase):
+    def test_matches_sync_endpoints(self):
+        for url in ['projects/', 'projects/?featured=true', 'projects/?limit=1', 'testimonials/?featured=true',
+                    'services/', 'home-stats/', 'content/?section=hero', 'contact-info/']:
+            with self.subTest(url=url):
+                get_cache().clear()
+                self.assertEqual(self.client.get(f'/api/async/{url}').content, self.client.get(f'/api/{url}').content)
+        project = Project.objects.first()
+        self.assertEqual(
+            self.client.get(f'/api/async/projects/{project.pk}/').content,
+            self.client.get(f'/api/projects/{project.pk}/').content,
+        )
+
+    def test_matches_sync_search_fields_and_pages(self):
+        project = Project.objects.first()
+        for url in ['projects/?q=featured', 'projects/?q=django&page_size=1', 'testimonials/?q=acme',
+                    'services/?q=sites', 'projects/?q=nothing', 'projects/?fields=id,title', 'testimonials/?omit=content&featured=true',
+                    'projects/?page_size=1', 'projects/?page_size=1&limit=1', f'projects/{project.pk}/?fields=title',
+                    'projects/?q=hidden&fields=title', 'projects/?tag_mode=some', 'projects/?fields=nope',
+                    'projects/?cursor=nope', f'projects/{project.pk}/?omit=nope']:
+            with self.subTest(url=url):
+                get_cache().clear()
+                response = self.client.get(f'/api/{url}')
+                async_response = self.client.get(f'/api/async/{url}')
+                self.assertEqual(async_response.status_code, response.status_code)
+                self.assertEqual(async_response.json(), json.loads(response.content.decode().replace('/api/', '/api/async/')))
+
+    def test_follows_the_next_link(self):
+        first = self.client.get('/api/async/projects/?page_size=1').json()
+        second = self.client.get(first['next']).json()
+        self.assertTrue(first['next'].startswith('http://testserver/api/async/projects/'))
+        self.assertEqual(len(first['results']) + len(second['results']), 2)
+        self.assertNotEqual(first['results'], second['results'])
+
+    def test_errors(self):
+        self.assertEqual(self.client.get('/api/async/projects/999999/').status_code, 404)
+        response = self.client.get('/api/async/nothing/')
+        self.assertEqual((response.status_code, response.json()), (404, {'detail': 'Unknown resource: nothing'}))
+        self.assertEqual(self.client.post('/api/async/projects/').status_code, 405)
+
+    def test_validators_match_the_viewsets(self):
+        project = Project.objects.first()
+        for url in ['projects/', 'projects/?page_size=1', f'projects/{project.pk}/']:
+            with self.subTest(url=url):
+                get_cache().clear()
+                response = self.client.get(f'/api/{url}')
+                async_response = self.client.get(f'/api/async/{url}')
+                self.assertEqual(async_response['Last-Modified'], response['Last-Modified'])
+                with self.assertNumQueries(1):  # Content versions
+                    response = self.client.get(f'/api/async/{url}', HTTP_IF_NONE_MATCH=async_response['ETag'])
+                self.assertEqual(response.status_code, 304)
+        etag = self.client.get('/api/async/projects/')['ETag']
+        Project.objects.filter(pk=project.pk).delete()
+        self.assertEqual(self.client.get('/api/async/projects/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_reports_every_route_and_leaves_no_rows(self):
+        out = tempfile.NamedTemporaryFile(suffix='.json', delete=False)
+        self.addCleanup(os.remove, out.name)
+        call_command(
+            'benchmark', projects=5, services=2, requests=2, token_requests=1, warmup=0,
+            output=out.name, stdout=io.StringIO(),
+        )
+        with open(out.name) as f:
+            report = json.load(f)
+        self.assertIn('projects-list', report['results'])
+        self.assertIn('projects-detail', report['results'])
+        self.assertEqual(report['results']['token']['statuses'], {'200': 1})
+        self.assertEqual(report['results']['projects-list']['requests'], 2)
+        self.assertEqual(Project.objects.count(), 0)
+        self.assertFalse(User.objects.exists())
+
+    def test_threshold(self):
+        from .management.commands.benchmark import compare
+
+        baseline = {'results': {'projects-list': {'throughput_rps': 100, 'p50_ms': 10, 'queries_per_request': 2}}}
+        current = {'results': {'projects-list': {'throughput_rps': 95, 'p50_ms': 10.5, 'queries_per_request': 2}}}
+        self.assertEqual(compare(baseline, current, 10), [])
+        current['results']['projects-list'].update(throughput_rps=80, queries_per_request=3)
+        self.assertEqual(len(compare(baseline, current, 10)), 2)
+
+
+@override_settings(MIDDLEWARE=['api.metrics.RequestMetricsMiddleware', *settings.MIDDLEWARE])
+class RequestMetricsTests(ContentFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+
+    def test_server_timing_log_and_prometheus_metrics(self):
+        with self.assertLogs('api.metrics', 'INFO') as logs:
+            response = self.client.get('/api/projects/')
+        timing = dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'db', 'auth', 'serialize', 'total'})
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['view'], 'project-list')
+        self.assertGreater(line['queries'], 0)
+        self.assertIn(f'desc="{line["queries"]} queries"', timing['db'])
+
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        with self.assertLogs('api.metrics', 'INFO'):
+            body = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('api_requests_total{route="project-list",method="GET",status="200"} 1', body)
+        self.assertIn('api_request_duration_seconds_bucket{route="project-list",method="GET",le="+Inf"} 1', body)
+        self.assertIn(f'api_db_queries_total{{route="project-list",method="GET"}} {line["queries"]}', body)
+
+    def test_metrics_are_staff_only(self):
+        with self.assertLogs('api.metrics', 'INFO'):
+            self.assertIn(self.client.get('/api/metrics/').status_code, (401, 403))
+
+
+@override_settings(
+    CACHES={**settings.CACHES, 'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'auth-tests'}},
+    API_AUTH_CACHE_ALIAS='auth',
+)
+class StatelessJWTTests(ContentFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user('admin', password='secret', is_staff=True)
+        # DRF reads DEFAULT_AUTHENTICATION_CLASSES once, when APIView is defined
+        patcher = mock.patch.object(APIView, 'authentication_classes', [StatelessJWTAuthentication])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self):
+        tokens = self.client.post('/api/token/', {'username': 'admin', 'password': 'secret'}, format='json').data
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        return tokens
+
+    def test_staff_write_does_not_load_the_user(self):
+        self.login()
+        ids = list(HomeStats.objects.values_list('pk', flat=True))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/home-stats/reorder/', {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries if 'auth_user' in q['sql']])
+
+    def test_reads_skip_authentication(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(self.client.get('/api/projects/').status_code, 200)
+        self.assertEqual(self.client.post('/api/home-stats/reorder/', {'ids': []}, format='json').status_code, 401)
+
+    def test_deactivated_user_is_revoked_and_refresh_reads_current_flags(self):
+        tokens = self.login()
+        self.staff.is_staff = False
+        self.staff.save()
+        self.assertEqual(self.client.post('/api/home-stats/reorder/', {'ids': []}, format='json').status_code, 401)
+
+        with self.assertNumQueries(1):  # The user, for the active check and the claims alike
+            refreshed = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertFalse(AccessToken(refreshed.data['access'])['is_staff'])
+        # Issued in the same second as the revocation, after it: accepted, without staff rights
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refreshed.data["access"]}')
+        self.assertEqual(self.client.post('/api/home-stats/reorder/', {'ids': []}, format='json').status_code, 403)
+
+    def test_revocation_is_recorded_again_on_commit(self):
+        ids = list(HomeStats.objects.values_list('pk', flat=True))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.staff.is_staff = False
+            self.staff.save()
+            # Issued elsewhere with the flags read before the change committed
+            stale = authentication.add_claims(AccessToken.for_user(self.staff), User(is_staff=True))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {stale}')
+        self.assertEqual(self.client.post('/api/home-stats/reorder/', {'ids': ids}, format='json').status_code, 200)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.post('/api/home-stats/reorder/', {'ids': ids}, format='json').status_code, 401)
+
+    @override_settings(CACHES={
+        **settings.CACHES,
+        'api': {**settings.CACHES['api'], 'OPTIONS': {'MAX_ENTRIES': 10}},
+        'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'auth-tests'},
+    })
+    def test_revocation_outlives_the_response_cache(self):
+        self.login()
+        self.staff.is_active = False
+        self.staff.save()
+        get_cache().clear()
+        for n in range(20):  # Culls the response cache
+            self.client.get(f'/api/projects/?page_size={n + 1}')
+        self.assertEqual(self.client.post('/api/home-stats/reorder/', {'ids': []}, format='json').status_code, 401)
+
+    def test_default_settings_load_the_user(self):
+        self.assertFalse(settings.API_JWT_STATELESS)
+        self.assertEqual(api_settings.DEFAULT_AUTHENTICATION_CLASSES, [JWTAuthentication])
+
+
+class LeanMiddlewareTests(ContentFixtureMixin, TestCase):
+    def test_api_skips_admin_middleware(self):
+        response = Client().get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        self.assertFalse(hasattr(response.wsgi_request, 'user'))
+        self.assertFalse(response.has_header('X-Frame-Options'))
+
+    def test_admin_keeps_sessions_and_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.get('/admin/login/')
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        self.assertIn('csrftoken', response.cookies)
+        self.assertEqual(client.post('/admin/login/', {'username': 'x', 'password': 'y'}).status_code, 403)
+
+    async def test_async_requests(self):
+        client = AsyncClient()
+        self.assertEqual((await client.get('/api/async/services/')).status_code, 200)
+        self.assertEqual((await client.get('/admin/login/'))['X-Frame-Options'], 'DENY')
+
+
+class SnapshotTests(ContentFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        snapshot_settings = override_settings(
+            API_SNAPSHOT_ROOT=self.root, API_SNAPSHOT_BASE_URL='http://testserver', API_SNAPSHOT_COMPRESS_MIN_SIZE=0,
+        )
+        snapshot_settings.enable()
+        self.addCleanup(snapshot_settings.disable)
+
+    def manifest(self):
+        return snapshots.read_manifest(self.root)['files']
+
+    def fetch(self, url, **headers):
+        response = Client().get(url, **headers)
+        return response, b''.join(response.streaming_content)
+
+    def test_snapshots_match_the_api_and_are_served_precompressed(self):
+        call_command('build_snapshots', stdout=io.StringIO())
+        files = self.manifest()
+        project = Project.objects.first()
+        for path in ['projects/', f'projects/{project.pk}/', 'contact-info/', 'bundle/']:
+            with self.subTest(path=path):
+                response, body = self.fetch(f'/snapshots/{files[path]}')
+                self.assertEqual(body, self.client.get(f'/api/{path}').content)
+                self.assertIn('immutable', response['Cache-Control'])
+
+        response, body = self.fetch(f'/snapshots/{files["projects/"]}', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), self.client.get('/api/projects/').content)
+        self.assertEqual(self.fetch('/snapshots/manifest.json')[0]['Cache-Control'], 'no-cache')
+
+    @override_settings(API_SNAPSHOTS=True, API_TASKS_EAGER=True)
+    def test_changes_rebuild_only_the_affected_resource(self):
+        snapshots.build()
+        before = self.manifest()
+        service = Service.objects.first()
+        service.title = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            service.save()
+
+        after = self.manifest()
+        self.assertNotEqual(after['services/'], before['services/'])
+        self.assertNotEqual(after['bundle/'], before['bundle/'])
+        self.assertEqual(after['projects/'], before['projects/'])
+        self.assertIn(b'Renamed', self.fetch(f'/snapshots/{after["services/"]}')[1])
+        # The replaced file stays for clients holding the old manifest
+        self.assertEqual(self.fetch(f'/snapshots/{before["services/"]}')[0].status_code, 200)
+
+
+    def test_base_url_is_required(self):
+        with override_settings(API_SNAPSHOT_BASE_URL=''):
+            with self.assertRaisesMessage(CommandError, 'API_SNAPSHOT_BASE_URL must be'):
+                call_command('build_snapshots', stdout=io.StringIO())
+            self.assertEqual(snapshots.check_base_url(None), [])
+            with override_settings(API_SNAPSHOTS=True):
+                self.assertEqual([error.id for error in snapshots.check_base_url(None)], ['api.E001'])
+        with override_settings(API_SNAPSHOT_BASE_URL='https://api.example.com/', ALLOWED_HOSTS=['testserver']):
+            request = snapshots.make_request()
+            self.assertEqual(request.build_absolute_uri('/media/a.png'), 'https://api.example.com/media/a.png')
+
+
+class CompressionTests(ContentFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        Project.objects.bulk_create([
+            Project(title=f'Project {i}', description='Lorem ipsum dolor sit amet. ' * 10, order=i) for i in range(10)
+        ])
+        versions.bump(Project)
+
+    def test_negotiates_and_caches_encoded_bodies(self):
+        plain = self.client.get('/api/projects/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        with mock.patch('api.compression.compress', wraps=compression.compress) as compress:
+            for _ in range(2):
+                response = self.client.get('/api/projects/', HTTP_ACCEPT_ENCODING='gzip;q=0.5, br')
+                self.assertEqual(response['Content-Encoding'], 'br')
+                self.assertEqual(brotli.decompress(response.content), plain.content)
+        self.assertEqual(compress.call_count, 1)
+
+        response = self.client.get('/api/projects/', HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(f'/api/services/{Service.objects.first().pk}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class ORJSONTests(ContentFixtureMixin, TestCase):
+    def test_renders_like_drf(self):
+        import datetime
+        import decimal
+        import uuid
+        from django.utils.translation import gettext_lazy
+
+        data = {
+            'utc': datetime.datetime(2024, 5, 1, 12, 30, 0, 123456, tzinfo=datetime.timezone.utc),
+            'offset': datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=2))),
+            'naive': datetime.datetime(2024, 5, 1, 12, 30),
+            'date': datetime.date(2024, 5, 1),
+            'time': datetime.time(8, 15, 30, 250),
+            'decimal': decimal.Decimal('12.50'),
+            'uuid': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Projects'),
+            1: 'int key',
+            'big': 2 ** 70,
+            'separators': 'a\u2028b\u2029c — d',
+            'nested': [None, True, 1.5, {'é': '日本'}],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        for path in ('/api/projects/', '/api/bundle/', f'/api/services/{Service.objects.first().pk}/'):
+            response = self.client.get(path)
+            self.assertEqual(response.content, JSONRenderer().render(response.json()))
+
+    def test_indented_output_falls_back(self):
+        data = {'a': [1, 2]}
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+    def test_non_finite_floats_are_refused_like_drf(self):
+        import decimal
+
+        for value in (float('nan'), float('-inf'), decimal.Decimal('Infinity')):
+            with self.subTest(value=value):
+                data = {'rows': [{'score': value, 'note': None}]}
+                with self.assertRaisesMessage(ValueError, 'Out of range float values are not JSON compliant'):
+                    JSONRenderer().render(data)
+                with self.assertRaisesMessage(ValueError, 'Out of range float values are not JSON compliant'):
+                    ORJSONRenderer().render(data)
+        lenient = type('Lenient', (ORJSONRenderer,), {'strict': False})  # STRICT_JSON = False
+        self.assertEqual(lenient().render([float('nan'), None]), b'[NaN,null]')
+
+    def test_parses_like_drf(self):
+        body = json.dumps({'title': 'Projet é', 'order': 3, 'tags': ['a'], 'price': 1.25, 'none': None}).encode()
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+
+        for body in (b'{"title": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError) as expected:
+                JSONParser().parse(io.BytesIO(body))
+            with self.assertRaises(ParseError) as raised:
+                ORJSONParser().parse(io.BytesIO(body))
+            self.assertEqual(str(raised.exception), str(expected.exception))
+
+
+class DatabaseSettingsTests(TestCase):
+    def test_sqlite_connections_are_tuned(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 2)  # FULL, without the write-ahead log
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], int(settings.DB_SQLITE_BUSY_TIMEOUT * 1000))
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+        self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+
+    def test_opening_the_database_leaves_the_file_alone(self):
+        # journal_mode=WAL is stored in the file: opt-in, so the committed db.sqlite3 stays clean
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = shutil.copy(os.path.join(settings.BASE_DIR, 'db.sqlite3'), directory)
+        with open(path, 'rb') as f:
+            before = f.read()
+        environment = {key: value for key, value in os.environ.items() if not key.startswith('DB_SQLITE_')}
+        subprocess.run(
+            [sys.executable, 'manage.py', 'check', '--database', 'default'], cwd=settings.BASE_DIR, check=True,
+            env={**environment, 'DATABASE_URL': f'sqlite:///{path}'}, capture_output=True,
+        )
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), before)
+
+
+class SearchTests(ContentFixtureMixin, TestCase):
+    def ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [row['title'] for row in response.json()['results']]
+
+    def test_ranks_matches_across_fields(self):
+        Project.objects.create(title='Shop', description='Built with django and love', tags=[], order=2)
+        Project.objects.create(title='Django admin', description='Internal tool', tags=[], order=3)
+        titles = self.ids(self.client.get('/api/projects/?q=django'))
+        self.assertEqual(titles[0], 'Django admin')  # Title outranks tags, tags outrank description
+        self.assertEqual(titles[1:], ['Featured', 'Shop'])
+        self.assertEqual(self.ids(self.client.get('/api/projects/?q=djan')), titles)  # Last word is a prefix
+        self.assertEqual(self.ids(self.client.get('/api/projects/?q=django+tool')), ['Django admin'])
+        self.assertEqual(self.ids(self.client.get('/api/projects/?q=django&featured=true')), ['Featured'])
+        self.assertEqual(self.ids(self.client.get('/api/projects/?q=%22%28*')), [])
+
+        response = self.client.get('/api/testimonials/?q=acme')
+        self.assertEqual([row['name'] for row in response.json()['results']], ['Ada'])
+        self.assertEqual(self.ids(self.client.get('/api/services/?q=sites')), ['Web'])
+
+    def test_index_follows_writes(self):
+        project = Project.objects.get(title='Hidden')
+        project.title = 'Observatory'
+        project.save()
+        Project.objects.bulk_create([Project(title='Telescope', description='Observatory gear', tags=[])])
+        Project.objects.filter(title='Featured').update(tags=['observatory'])
+        self.assertEqual(self.ids(self.client.get('/api/projects/?q=observatory')), ['Observatory', 'Featured', 'Telescope'])
+        self.assertEqual(self.ids(self.client.get('/api/projects/?q=hidden')), [])
+
+        Project.objects.filter(title='Telescope').delete()
+        self.assertEqual(self.ids(self.client.get('/api/projects/?q=observatory')), ['Observatory', 'Featured'])
+
+    def test_pages(self):
+        Project.objects.bulk_create([Project(title=f'Lens {i}', description='', tags=[], order=i) for i in range(5)])
+        response = self.client.get('/api/projects/?q=lens&page_size=2').json()
+        titles = [row['title'] for row in response['results']]
+        while response['next']:
+            response = self.client.get(response['next']).json()
+            titles += [row['title'] for row in response['results']]
+        self.assertEqual(titles, [f'Lens {i}' for i in range(5)])
+        self.assertEqual(self.client.get('/api/projects/?q=lens&cursor=bad').status_code, 404)
+
+
+class TagIndexTests(ContentFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        Project.objects.create(title='Shop', description='', tags=['Django', 'Stripe'], order=2)
+        Project.objects.bulk_create([Project(title='App', description='', tags=['React', 'Stripe', 'Stripe', 7], order=3)])
+
+    def titles(self, query):
+        response = self.client.get(f'/api/projects/{query}')
+        self.assertEqual(response.status_code, 200)
+        return [row['title'] for row in response.json()]
+
+    def facets(self):
+        return {tag['name']: tag['count'] for tag in self.client.get('/api/projects/facets/').json()['tags']}
+
+    def test_filters_by_any_or_all_tags(self):
+        self.assertEqual(self.titles('?tag=Stripe'), ['Shop', 'App'])
+        self.assertEqual(self.titles('?tag=Django&tag=React'), ['Featured', 'Shop', 'App'])
+        self.assertEqual(self.titles('?tag=Django&tag=Stripe&tag_mode=all'), ['Shop'])
+        self.assertEqual(self.titles('?tag=Django&featured=true'), ['Featured'])
+        self.assertEqual(self.titles('?tag=django'), [])
+        self.assertEqual(self.client.get('/api/projects/?tag=Django&tag_mode=most').status_code, 400)
+        response = self.client.get('/api/async/projects/?tag=Django&tag=Stripe&tag_mode=all')
+        self.assertEqual([row['title'] for row in response.json()], ['Shop'])
+
+    def test_facet_counts_follow_writes(self):
+        self.assertEqual(self.facets(), {'Stripe': 2, 'Django': 2, 'React': 1})
+
+        shop = Project.objects.get(title='Shop')
+        shop.tags = ['Stripe', 'Vue']
+        shop.save()
+        Project.objects.filter(title='App').update(tags=['Vue'])
+        self.assertEqual(self.facets(), {'Vue': 2, 'Django': 1, 'Stripe': 1})
+
+        Project.objects.filter(title='Featured').delete()
+        self.assertEqual(self.facets(), {'Vue': 2, 'Stripe': 1})
+
+    def test_upserts_keep_the_index(self):
+        # SQLite triggers with INSERT OR IGNORE took the upsert's conflict policy and failed
+        shop = Project.objects.get(title='Shop')
+        Project.objects.bulk_create(
+            [Project(pk=shop.pk, title='Shop', description='', tags=['Stripe', 'Vue'], order=2)],
+            update_conflicts=True, unique_fields=['id'], update_fields=['tags'],
+        )
+        self.assertEqual(self.facets(), {'Stripe': 2, 'Django': 1, 'React': 1, 'Vue': 1})
+
+    def test_rebuild_matches_triggers(self):
+        before = list(Tag.objects.values_list('name', 'count'))
+        tags.rebuild()
+        self.assertEqual(list(Tag.objects.values_list('name', 'count')), before)
+        self.assertEqual(ProjectTag.objects.count(), 5)
+
+
+class SchemaMigrationTests(TransactionTestCase):
+    def test_migrations_carry_the_current_sql(self):
+        # Changing api.search or api.tags needs a new migration with their new SQL
+        search_migration = importlib.import_module('api.migrations.0007_search')
+        self.assertEqual(search_migration.INSTALL, {backend: search.install_sql(backend) for backend in ('postgresql', 'fts5')})
+        tags_migration = importlib.import_module('api.migrations.0008_tags')
+        for vendor in ('sqlite', 'postgresql'):
+            self.assertEqual(
+                [' '.join(sql.split()) for sql in tags_migration.UNINSTALL[vendor] + tags_migration.TRIGGERS[vendor]],
+                [' '.join(sql.split()) for sql in tags.install_sql(vendor)],
+            )
+
+    def test_tag_backfill_uses_historical_models(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('api', '0007_search')])
+        historical = executor.loader.project_state([('api', '0007_search')]).apps
+        historical.get_model('api', 'Project').objects.create(title='Old', description='', tags=['Django', 'Django', 3])
+        historical.get_model('api', 'Project').objects.create(title='Older', description='', tags=['Django', 'Vue'])
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        self.assertEqual(dict(Tag.objects.values_list('name', 'count')), {'Django': 2, 'Vue': 1})
+        self.assertEqual(ProjectTag.objects.count(), 3)
+
+
+class SparseFieldsTests(ContentFixtureMixin, TestCase):
+    def test_list_trims_output_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/projects/?fields=id,title,imageUrl,tags')
+        self.assertEqual(response.json(), [
+            {'id': str(project.pk), 'title': project.title, 'imageUrl': '', 'tags': project.tags}
+            for project in Project.objects.all()
+        ])
+        sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('"created_at"', sql)
+
+        full = self.client.get('/api/testimonials/').json()
+        response = self.client.get('/api/testimonials/?omit=content,created_at,updated_at')
+        self.assertEqual(response.json(), [
+            {name: value for name, value in item.items() if name not in ('content', 'created_at', 'updated_at')}
+            for item in full
+        ])
+
+    def test_detail_defers_columns(self):
+        project = Project.objects.get(title='Featured')
+        full = self.client.get(f'/api/projects/{project.pk}/').json()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/projects/{project.pk}/?omit=description')
+        self.assertEqual(response.json(), {name: value for name, value in full.items() if name != 'description'})
+        self.assertFalse(any('"description"' in query['sql'] for query in queries.captured_queries))
+
+    def test_paginated_and_unknown_fields(self):
+        response = self.client.get('/api/projects/?page_size=1&fields=title')
+        self.assertEqual(response.json()['results'], [{'title': 'Featured'}])
+        self.assertEqual(self.client.get(response.json()['next']).json()['results'], [{'title': 'Hidden'}])
+
+        response = self.client.get('/api/projects/?fields=title,body')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown field(s): body', response.json()['fields'])
+        self.assertEqual(self.client.get('/api/services/?omit=nope').status_code, 400)
+
+    def test_sources_cover_every_field(self):
+        for serializer_class in (
+            serializers.ProjectValuesSerializer, serializers.TestimonialValuesSerializer,
+            serializers.ServiceValuesSerializer, serializers.HomeStatsValuesSerializer,
+            serializers.ContentSectionValuesSerializer, serializers.ContactInfoValuesSerializer,
+        ):
+            for name, column in serializer_class.output.items():
+                columns = serializer_class.sources[name] if column is None else (column,)
+                self.assertLessEqual(set(columns), set(serializer_class.columns), (serializer_class, name))
+                if column is None:
+                    self.assertTrue(callable(getattr(serializer_class, f'get_{name}', None)), (serializer_class, name))
+
+
+class ContentTransferTests(ContentFixtureMixin, TestCase):
+    def export(self, *args):
+        output = os.path.join(self.directory, 'content.ndjson')
+        call_command('export_content', '--output', output, *args, stderr=io.StringIO())
+        with open(output, 'rb') as f:
+            return f.read()
+
+    def load(self, data, *args):
+        path = os.path.join(self.directory, 'import.ndjson')
+        with open(path, 'wb') as f:
+            f.write(data)
+        stdout = io.StringIO()
+        call_command('import_content', path, *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_round_trip_by_primary_key(self):
+        data = self.export()
+        self.assertEqual(len(data.splitlines()), 7)
+        first = json.loads(data.splitlines()[0])
+        self.assertEqual((first['model'], first['fields']['title']), ('api.project', 'Featured'))
+
+        for model in transfer.MODELS.values():
+            model.objects.all().delete()
+        report = self.load(data, '--key', 'pk')
+        self.assertIn('api.project: 2 created, 0 updated', report)
+        self.assertEqual(self.export(), data)
+        self.assertEqual(self.facets(), {'Django': 1})
+        last = Project.objects.order_by('pk').last().pk
+        self.assertGreater(Project.objects.create(title='Next', description='', order=2).pk, last)
+
+    def facets(self):
+        return {tag['name']: tag['count'] for tag in tags.facets()}
+
+    def test_upserts_on_natural_keys(self):
+        hero = ContentSection.objects.get(section='hero')
+        records = [
+            {'model': 'api.contentsection', 'fields': {'section': 'hero', 'title': 'Welcome', 'content': 'New'}},
+            {'model': 'api.contentsection', 'fields': {'section': 'about', 'title': 'About', 'content': 'Me'}},
+            {'model': 'api.project', 'fields': {'title': 'Featured', 'description': 'Z', 'tags': ['Vue'], 'order': 0, 'created_at': '2020-01-02T03:04:05.000006Z'}},
+        ]
+        self.client.get('/api/content/')
+        report = self.load(b'\n'.join(transfer.dumps(record) for record in records) + b'\n')
+        self.assertIn('api.contentsection: 1 created, 1 updated', report)
+
+        hero.refresh_from_db()
+        self.assertEqual((hero.title, hero.content), ('Welcome', 'New'))
+        self.assertEqual(ContentSection.objects.count(), 2)
+        self.assertEqual(self.client.get('/api/content/')['X-Cache'], 'MISS')
+
+        project = Project.objects.get(title='Featured')
+        self.assertEqual((project.description, project.tags), ('Z', ['Vue']))
+        self.assertEqual(project.created_at.isoformat(), '2020-01-02T03:04:05.000006+00:00')
+        self.assertEqual(Project.objects.count(), 2)
+        self.assertEqual(self.facets(), {'Vue': 1})
+
+    def test_upserts_large_batches_on_composite_keys(self):
+        def records(content):
+            return b''.join(
+                transfer.dumps({'model': 'api.testimonial', 'fields': {
+                    'name': f'Client {i}', 'company': f'Company {i % 7}', 'role': 'CEO', 'content': content,
+                }}) + b'\n'
+                for i in range(1500)
+            )
+        self.assertIn('api.testimonial: 1500 created, 0 updated', self.load(records('First'), '--batch-size', '2000'))
+        self.assertIn('api.testimonial: 0 created, 1500 updated', self.load(records('Second'), '--batch-size', '2000'))
+        self.assertEqual(Testimonial.objects.filter(content='Second').count(), 1500)
+
+    def test_refuses_repeated_natural_keys(self):
+        def service(title, description):
+            return transfer.dumps({'model': 'api.service', 'fields': {'title': title, 'description': description}})
+
+        with self.assertRaisesMessage(CommandError, "Line 3: Duplicate natural key of api.service: ('Apps',)"):
+            self.load(b'\n'.join([service('Apps', 'A'), service('Web', 'W'), service('Apps', 'B')]))
+        Service.objects.create(title='Apps', description='One', icon='x')
+        Service.objects.create(title='Apps', description='Two', icon='y')
+        with self.assertRaisesMessage(CommandError, "Natural key ('Apps',) matches several api.service rows"):
+            self.load(service('Apps', 'C'))
+        self.assertEqual(sorted(Service.objects.filter(title='Apps').values_list('description', flat=True)), ['One', 'Two'])
+
+    def test_keeps_timestamps_without_touching_the_model_fields(self):
+        field = Project._meta.get_field('updated_at')
+        records = [{'model': 'api.project', 'fields': {'title': 'Old', 'description': '', 'order': 9, 'updated_at': '2020-01-02T03:04:05Z'}}]
+        original = transfer.RawInsertQuerySet.bulk_create
+
+        def bulk_create(queryset, *args, **kwargs):
+            self.assertTrue(field.auto_now)  # A save elsewhere still gets the current time
+            return original(queryset, *args, **kwargs)
+
+        with mock.patch.object(transfer.RawInsertQuerySet, 'bulk_create', bulk_create):
+            self.load(b'\n'.join(transfer.dumps(record) for record in records))
+        self.assertTrue(field.auto_now)
+        self.assertEqual(Project.objects.get(title='Old').updated_at.isoformat(), '2020-01-02T03:04:05+00:00')
+
+    def test_rejects_unknown_models_and_fields(self):
+        with self.assertRaisesMessage(CommandError, 'Line 2: Unknown field(s) of api.service: colour'):
+            self.load(b'\n'.join([
+                transfer.dumps({'model': 'api.service', 'fields': {'title': 'Apps'}}),
+                transfer.dumps({'model': 'api.service', 'fields': {'title': 'Web', 'colour': 'red'}}),
+            ]))
+        self.assertFalse(Service.objects.filter(title='Apps').exists())  # Its batch never committed
+        with self.assertRaisesMessage(CommandError, "Unknown model: 'auth.user'"):
+            self.load(transfer.dumps({'model': 'auth.user', 'fields': {}}))
+        with self.assertRaisesMessage(CommandError, 'Unknown model(s): users'):
+            self.export('--models', 'users,services')
+
+
+FIRESTORE_EXPORT = {
+    '__collections__': {
+        'projects': {
+            'p2': {
+                'title': 'Brand', 'description': 'Identity', 'imageUrl': 'https://example.com/brand.png',
+                'tags': ['Design'], 'featured': True, 'order': 2, 'views': 10,
+                'createdAt': {'_seconds': 1700000000, '_nanoseconds': 5000}, 'updatedAt': '2024-01-01T00:00:00Z',
+            },
+            'p1': {'title': 'Featured', 'description': 'Moved', 'tags': ['Django'], 'featured': True, 'order': 0},
+            'p3': {'title': 'Dashboard', 'description': 'SaaS', 'tags': [], 'order': 3},
+        },
+        'contactInfo': {
+            'c1': {'email': 'a@example.com', 'phone': '2', 'address': 'There', 'socialLinks': {'github': 'y'}},
+        },
+        'users': {'u1': {'name': 'Not content'}},
+    },
+}
+
+
+class FirestoreImportTests(ContentFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.export = os.path.join(self.directory, 'firestore.json')
+        with open(self.export, 'w') as f:
+            json.dump(FIRESTORE_EXPORT, f)
+
+    def run_import(self, *args):
+        stdout = io.StringIO()
+        call_command('import_firestore', '--export', self.export, *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_maps_fields_onto_models(self):
+        output = self.run_import()
+        self.assertIn('api.project: 2 created, 1 updated', output)
+        self.assertIn('projects: no column for views, dropped', output)
+
+        brand = Project.objects.get(title='Brand')
+        self.assertEqual((brand.image_url_fallback, brand.tags, brand.order), ('https://example.com/brand.png', ['Design'], 2))
+        self.assertEqual(brand.created_at.isoformat(), '2023-11-14T22:13:20.000005+00:00')
+        self.assertEqual(brand.updated_at.isoformat(), '2024-01-01T00:00:00+00:00')
+        self.assertEqual(Project.objects.get(title='Featured').description, 'Moved')
+        self.assertEqual(ContactInfo.objects.get().social_links, {'github': 'y'})
+        response = self.client.get('/api/projects/?tag=Design')
+        self.assertEqual([row['imageUrl'] for row in response.json()], ['https://example.com/brand.png'])
+
+    def test_resumes_from_checkpoint_without_duplicates(self):
+        to_record = firestore.to_record
+
+        def fail_on_brand(collection, fields):
+            if fields.get('title') == 'Brand':
+                raise OSError('connection lost')
+            return to_record(collection, fields)
+
+        with mock.patch('api.management.commands.import_firestore.to_record', fail_on_brand), self.assertRaises(OSError):
+            self.run_import('--batch-size', '1')
+        featured = Project.objects.get(title='Featured').pk
+        with open(f'{self.export}.checkpoint') as f:
+            self.assertEqual(json.load(f)['projects'], {'after': 'p1', 'documents': 1, 'done': False, 'ids': {'p1': featured}})
+        self.assertEqual(Project.objects.count(), 2)
+
+        output = self.run_import('--batch-size', '1')
+        self.assertIn('api.project: 2 created, 0 updated', output)
+        self.assertEqual(self.run_import().count('done in an earlier run'), len(firestore.COLLECTIONS))
+        self.run_import('--restart')
+        self.assertEqual(Project.objects.count(), 4)
+        self.assertEqual(ContactInfo.objects.count(), 1)
+
+    def test_matches_documents_on_their_ids(self):
+        FIRESTORE_EXPORT['__collections__']['projects']['p4'] = {'title': 'Brand', 'description': 'Twin', 'order': 4}
+        self.addCleanup(FIRESTORE_EXPORT['__collections__']['projects'].pop, 'p4')
+        with open(self.export, 'w') as f:
+            json.dump(FIRESTORE_EXPORT, f)
+        self.assertIn('api.project: 3 created, 1 updated', self.run_import())
+        self.assertEqual(sorted(Project.objects.filter(title='Brand').values_list('description', flat=True)), ['Identity', 'Twin'])
+
+        FIRESTORE_EXPORT['__collections__']['projects']['p1']['title'] = 'Renamed'
+        self.addCleanup(FIRESTORE_EXPORT['__collections__']['projects']['p1'].update, title='Featured')
+        with open(self.export, 'w') as f:
+            json.dump(FIRESTORE_EXPORT, f)
+        self.assertIn('api.project: 0 created, 4 updated', self.run_import('--restart'))
+        self.assertEqual(Project.objects.count(), 5)
+        self.assertFalse(Project.objects.filter(title='Featured').exists())
+        self.assertEqual(Project.objects.get(title='Renamed').description, 'Moved')
+
+    def test_reads_the_emulator(self):
+        pages = [
+            [{'document': {'name': 'projects/demo/databases/(default)/documents/projects/p1', 'fields': {
+                'title': {'stringValue': 'Featured'}, 'description': {'stringValue': 'Emulated'},
+                'order': {'integerValue': '4'}, 'link': {'nullValue': None},
+                'tags': {'arrayValue': {'values': [{'stringValue': 'Django'}]}},
+                'createdAt': {'timestampValue': '2023-05-06T07:08:09.123Z'},
+            }}}],
+        ]
+        bodies = []
+
+        def urlopen(request, timeout):
+            bodies.append(json.loads(request.data))
+            return io.BytesIO(json.dumps(pages.pop(0)).encode())
+
+        checkpoint = os.path.join(self.directory, 'emulator.checkpoint')
+        with open(checkpoint, 'w') as f:
+            json.dump({'projects': {'after': 'p0', 'documents': 1, 'done': False}}, f)
+        with mock.patch('urllib.request.urlopen', urlopen):
+            call_command(
+                'import_firestore', '--emulator', 'localhost:8080', '--project', 'demo', '--collections', 'projects',
+                '--checkpoint', checkpoint, stdout=io.StringIO(),
+            )
+        project = Project.objects.get(title='Featured')
+        self.assertEqual((project.description, project.order, project.tags), ('Emulated', 4, ['Django']))
+        self.assertEqual(project.created_at.isoformat(), '2023-05-06T07:08:09.123000+00:00')
+        self.assertEqual(
+            bodies[0]['structuredQuery']['startAt']['values'][0]['referenceValue'],
+            'projects/demo/databases/(default)/documents/projects/p0',
+        )
+        with open(checkpoint) as f:
+            self.assertEqual(json.load(f)['projects'], {'after': 'p1', 'documents': 2, 'done': True, 'ids': {'p1': project.pk}})
@@ -0,0 +1,285 @@
+"""
+Bulk transfer of content to and from NDJSON.
+
+One record per line, in the shape of Django's `jsonl` serializer, so an
+export also loads with `manage.py loaddata`:
+
+    {"model": "api.contentsection", "pk": 3, "fields": {"section": "hero", ...}}
+
+Images are referenced by their storage name (`"image": "projects/a.jpg"`),
+alongside the URL and variants recorded for them; the files themselves stay
+in storage. Tag and ProjectTag are not exported: they are derived from
+`Project.tags` (see api.tags).
+
+`Loader` upserts records in batches: per batch, one transaction, one query to
+find the existing rows (on NATURAL_KEYS or the primary key), one INSERT for
+the new rows and one INSERT .. ON CONFLICT (id) DO UPDATE for the others.
+`bulk_update` is avoided: its CASE WHEN per row and field costs more to build
+than the rows take to write. Timestamps are taken from the records, not reset
+to now.
+
+Natural keys are not all unique in the schema (two projects may share a
+title), so a natural key that repeats, in the input or among the rows it
+would match, is refused rather than merged into one row: load such data with
+`key='pk'`.
+"""
+import functools
+import json
+import time
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import ContactInfo, ContentSection, HomeStats, Project, Service, Testimonial
+from .renderers import ORJSONRenderer
+from .signals import changed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# In dependency order; rows are matched on these fields when importing
+NATURAL_KEYS = {
+    Project: ('title',),
+    Testimonial: ('name', 'company'),
+    Service: ('title',),
+    HomeStats: ('label',),
+    ContentSection: ('section',),
+    ContactInfo: ('email',),
+}
+MODELS = {model._meta.label_lower: model for model in NATURAL_KEYS}
+
+_renderer = ORJSONRenderer()
+
+
+@functools.cache
+def data_fields(model):
+    """The concrete fields of `model` that are transferred, the primary key aside."""
+    return [field for field in model._meta.concrete_fields if not field.primary_key]
+
+
+@functools.cache
+def field_map(model):
+    return {field.name: field for field in data_fields(model)}
+
+
+def export_records(model, chunk_size=2000):
+    """Yield the records of every `model` row, reading `chunk_size` rows at a time."""
+    fields = data_fields(model)
+    names = [field.attname for field in fields]
+    label = model._meta.label_lower
+    for row in model.objects.order_by('pk').values_list('pk', *names).iterator(chunk_size=chunk_size):
+        yield {'model': label, 'pk': row[0], 'fields': dict(zip((field.name for field in fields), row[1:]))}
+
+
+def dumps(record):
+    """`record` as one line of JSON bytes, encoded like the API's responses (microseconds kept)."""
+    return _renderer.render(record)
+
+
+def loads(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+@functools.cache
+def timestamp_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+
+
+class RawInsertQuerySet(QuerySet):
+    """
+    bulk_create writing the values set on instances, auto_now/auto_now_add
+    included, instead of the current time: the inserts are raw, as loaddata's
+    saves are. Nothing outside the query changes, unlike clearing the flags
+    on the model's fields would.
+    """
+
+    def _insert(self, *args, **kwargs):
+        kwargs['raw'] = True
+        return super()._insert(*args, **kwargs)
+
+
+def lookup(model, names, keys):
+    """
+    Yield `(key, pk)` for the rows whose `names` columns hold one of `keys`
+    (tuples), by ascending pk.
+
+    Rows are filtered on the first column only and matched on the others
+    here: an OR of one Q per key nests too deep for SQLite past a few hundred
+    keys. Chunked to stay under the backend's limit on query parameters.
+    """
+    wanted = set(keys)
+    first = sorted({key[0] for key in wanted})
+    chunk_size = connection.features.max_query_params or len(first) or 1
+    for start in range(0, len(first), chunk_size):
+        rows = model.objects.filter(**{f'{names[0]}__in': first[start:start + chunk_size]})
+        for pk, *key in rows.order_by('pk').values_list('pk', *names):
+            if tuple(key) in wanted:
+                yield tuple(key), pk
+
+
+class LoadError(ValueError):
+    pass
+
+
+class ModelStats:
+    __slots__ = ('created', 'updated', 'seconds')
+
+    def __init__(self):
+        self.created = self.updated = 0
+        self.seconds = 0.0
+
+    @property
+    def rows(self):
+        return self.created + self.updated
+
+
+class Loader:
+    """
+    Upsert records into the api models, `batch_size` rows per transaction.
+
+    Feed records with `add()` and finish with `close()` (or use it as a
+    context manager). With `key='pk'`, rows are matched on their primary key
+    and keep it when created; with `key='natural'`, on NATURAL_KEYS, and new
+    rows get fresh primary keys. A natural key given twice, or matching more
+    than one row, raises LoadError. Change notifications go out once per model,
+    after the last batch. If loading fails, the batches already flushed stay
+    committed and the pending ones are dropped.
+    """
+
+    def __init__(self, batch_size=1000, key='natural'):
+        if key not in ('natural', 'pk'):
+            raise ValueError(f'Unknown key: {key}')
+        self.batch_size = batch_size
+        self.key = key
+        self.pending = {}  # model -> {key: (instance, field names)}
+        self.seen = {}  # model -> natural keys added so far, across batches
+        self.stats = {}  # model -> ModelStats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.notify()  # For the batches already committed
+
+    def instance(self, record):
+        model = MODELS.get(record.get('model'))
+        if model is None:
+            raise LoadError(f"Unknown model: {record.get('model')!r}")
+        values = record.get('fields') or {}
+        fields = field_map(model)
+        unknown = values.keys() - fields.keys()
+        if unknown:
+            raise LoadError(f"Unknown field(s) of {model._meta.label_lower}: {', '.join(sorted(unknown))}")
+        instance = model(**{name: fields[name].to_python(value) for name, value in values.items()})
+        names = set(values)
+        now = timezone.now()
+        for field in timestamp_fields(model):
+            if field.name not in values:
+                setattr(instance, field.attname, now)
+                if field.auto_now:
+                    names.add(field.name)
+        if self.key == 'pk':
+            if record.get('pk') is None:
+                raise LoadError('Records need a "pk" with key=pk')
+            instance.pk = model._meta.pk.to_python(record['pk'])
+        return model, instance, tuple(sorted(names))
+
+    def row_key(self, model, instance):
+        if self.key == 'pk':
+            return instance.pk
+        return tuple(getattr(instance, name) for name in NATURAL_KEYS[model])
+
+    def add(self, record, key=None):
+        """Queue `record`, to be matched on `key` rather than the loader's own key if given."""
+        model, instance, names = self.instance(record)
+        if key is None:
+            key = self.row_key(model, instance)
+            if self.key == 'natural':
+                seen = self.seen.setdefault(model, set())
+                if key in seen:
+                    raise LoadError(f'Duplicate natural key of {model._meta.label_lower}: {key!r}')
+                seen.add(key)
+        batch = self.pending.setdefault(model, {})
+        batch[key] = (instance, names)  # A later duplicate primary key wins
+        if len(batch) >= self.batch_size:
+            self.flush(model)
+
+    def existing(self, model, batch):
+        """`{key: pk}` of the rows matching the keys of `batch`."""
+        if self.key == 'pk':
+            return {key[0]: pk for key, pk in lookup(model, ('pk',), [(key,) for key in batch])}
+        found = {}
+        for key, pk in lookup(model, NATURAL_KEYS[model], list(batch)):
+            if key in found:
+                raise LoadError(
+                    f'Natural key {key!r} matches several {model._meta.label_lower} rows '
+                    f'({found[key]}, {pk}); import with key=pk'
+                )
+            found[key] = pk
+        return found
+
+    def flush(self, model):
+        batch = self.pending.pop(model, None)
+        if not batch:
+            return
+        stats = self.stats.setdefault(model, ModelStats())
+        start = time.perf_counter()
+        with transaction.atomic():
+            found = self.existing(model, batch)
+            new, updated = [], {}  # updated: field names -> instances
+            for key, (instance, names) in batch.items():
+                pk = found.get(key)
+                if pk is None:
+                    new.append(instance)
+                    continue
+                instance.pk = pk
+                instance._state.adding = False
+                updated.setdefault(names, []).append(instance)
+            if new:
+                RawInsertQuerySet(model).bulk_create(new)
+            for names, instances in updated.items():
+                self.update(model, instances, names)
+        stats.seconds += time.perf_counter() - start
+        stats.created += len(new)
+        stats.updated += sum(map(len, updated.values()))
+
+    def update(self, model, instances, names):
+        features = connection.features
+        if not features.supports_update_conflicts:
+            model.objects.bulk_update(instances, names)
+            return
+        pk = model._meta.pk.name
+        RawInsertQuerySet(model).bulk_create(
+            instances, update_conflicts=True, update_fields=names,
+            unique_fields=[pk] if features.supports_update_conflicts_with_target else None,
+        )
+
+    def notify(self):
+        for model in self.stats:
+            changed(model)
+
+    def reset_sequences(self):
+        """After rows were created with their own primary keys, move the sequences past them (as loaddata does)."""
+        models = [model for model, stats in self.stats.items() if stats.created]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def close(self):
+        for model in NATURAL_KEYS:
+            self.flush(model)
+        if self.key == 'pk':
+            self.reset_sequences()
+        self.notify()
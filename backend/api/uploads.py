@@ -0,0 +1,115 @@
+"""
+Image uploads off the request path.
+
+An uploaded `image` is written to a local staging directory and the row is
+saved straight away with `image_status = "pending"`. A background job (see
+`api.tasks`) then pushes the staged file to the image field's storage (e.g.
+Cloudinary), points the row at it and marks it "ready" (or "failed").
+
+The staged path is recorded on the row in `image_staging`, so the rows
+themselves are the queue: `manage.py process_staged_images` picks up anything
+a restarted worker left behind.
+"""
+import logging
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.functional import LazyObject, empty
+
+from . import tasks
+from .signals import changed
+
+logger = logging.getLogger(__name__)
+
+PENDING, READY, FAILED = 'pending', 'ready', 'failed'
+
+
+class StagingStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = FileSystemStorage(location=settings.MEDIA_STAGING_ROOT)
+
+
+staging_storage = StagingStorage()
+
+
+@receiver(setting_changed)
+def _reset_staging_storage(setting, **kwargs):
+    if setting == 'MEDIA_STAGING_ROOT':
+        staging_storage._wrapped = empty
+
+
+def async_uploads_enabled():
+    return getattr(settings, 'API_ASYNC_UPLOADS', True)
+
+
+def stage(model, upload):
+    """Write an uploaded file to the staging area and return its staged name."""
+    return staging_storage.save(f'{model._meta.model_name}/{os.path.basename(upload.name)}', upload)
+
+
+def publish_staged_image(model, pk):
+    """Move a row's staged image to its real storage and mark the row ready."""
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.image_staging:
+        return
+    staged = instance.image_staging
+
+    try:
+        with staging_storage.open(staged, 'rb') as source:
+            name = instance.image.field.generate_filename(instance, os.path.basename(staged))
+            name = instance.image.storage.save(name, File(source), max_length=instance.image.field.max_length)
+    except Exception:
+        logger.exception('Publishing staged image %s for %s %s failed', staged, model.__name__, pk)
+        if model.objects.filter(pk=pk, image_staging=staged).update(image_status=FAILED):
+            changed(model)  # update() sends no signals; pollers would keep seeing "pending"
+        return
+
+    with transaction.atomic():
+        current = model.objects.select_for_update().filter(pk=pk, image_staging=staged).first()
+        if current is not None:
+            current.image.name = name
+            current.image_staging = ''
+            current.image_status = READY
+            # A regular save: refreshes image_url, bumps content versions and
+            # queues the responsive variants.
+            current.save(update_fields=['image', 'image_url', 'image_staging', 'image_status', 'updated_at'])
+    if current is None:
+        # Row deleted, or a newer upload replaced this one, while it was pushed
+        instance.image.storage.delete(name)
+    staging_storage.delete(staged)
+
+
+class StagedImageMixin:
+    """
+    ModelSerializer mixin: stage uploaded `image` files instead of saving them
+    to storage inside the request, and queue the upload.
+    """
+
+    def _stage_upload(self, validated_data):
+        upload = validated_data.get('image')
+        if not async_uploads_enabled() or not isinstance(upload, UploadedFile):
+            return False
+        del validated_data['image']
+        validated_data['image_staging'] = stage(self.Meta.model, upload)
+        validated_data['image_status'] = PENDING
+        return True
+
+    def create(self, validated_data):
+        staged = self._stage_upload(validated_data)
+        instance = super().create(validated_data)
+        if staged:
+            tasks.submit(publish_staged_image, self.Meta.model, instance.pk)
+        return instance
+
+    def update(self, instance, validated_data):
+        staged = self._stage_upload(validated_data)
+        instance = super().update(instance, validated_data)
+        if staged:
+            tasks.submit(publish_staged_image, self.Meta.model, instance.pk)
+        return instance
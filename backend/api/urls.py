@@ -1,8 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     ProjectViewSet, TestimonialViewSet, ServiceViewSet, 
-    HomeStatsViewSet, ContentSectionViewSet, ContactInfoViewSet
+    HomeStatsViewSet, ContentSectionViewSet, ContactInfoViewSet,
+    HomepageBundleView, CacheStatsView, ContentVersionView, MetricsView,
 )
 
 router = DefaultRouter()
@@ -14,5 +16,11 @@ router.register(r'content', ContentSectionViewSet)
 router.register(r'contact-info', ContactInfoViewSet)
 
 urlpatterns = [
+    path('bundle/', HomepageBundleView.as_view(), name='homepage-bundle'),
+    path('versions/', ContentVersionView.as_view(), name='content-versions'),
+    path('cache-stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('async/<str:resource>/', async_views.resource_list, name='async-list'),
+    path('async/<str:resource>/<int:pk>/', async_views.resource_detail, name='async-detail'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,128 @@
+"""
+Monotonic content versions, per model and global.
+
+Every write to an api model (see `api.signals.content_changed`) bumps the
+version of that model and the global version. Versions are ContentVersion
+rows, so every worker reads the same numbers and nothing evicts them; reading
+them is a primary key lookup that never touches the content tables. Each row
+also records when it was last bumped, which gives Last-Modified (see
+api.conditional). Pass the request to read them once per request.
+
+A bump is one `UPDATE .. SET version = version + 1`, atomic on every backend,
+made in the writer's transaction: new versions become visible together with
+the data they stand for, and a rolled back write bumps nothing.
+
+A missing row (the table was flushed) is created from the current time in
+milliseconds, as the migration did, which is ahead of any version handed out
+before: versions never go backwards.
+"""
+import time
+
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ContentVersion
+from .signals import CONTENT_MODELS, content_changed
+
+GLOBAL_NAME = '__all__'
+
+# Public names of the versioned models, matching their API endpoints
+RESOURCE_NAMES = {
+    'api.project': 'projects',
+    'api.testimonial': 'testimonials',
+    'api.service': 'services',
+    'api.homestats': 'home-stats',
+    'api.contentsection': 'content',
+    'api.contactinfo': 'contact-info',
+}
+
+
+def _name(model):
+    return model._meta.label_lower
+
+
+def _seed():
+    return int(time.time() * 1000)
+
+
+def _missing_rows(names):
+    return [ContentVersion(name=name, version=_seed()) for name in names]
+
+
+def _rows(names):
+    return ContentVersion.objects.filter(name__in=names).values_list('name', 'version', 'updated_at')
+
+
+def _read(names):
+    """`[(version, updated_at), ...]` of `names`, in order."""
+    found = {name: (version, updated_at) for name, version, updated_at in _rows(names)}
+    missing = [name for name in names if name not in found]
+    if missing:
+        ContentVersion.objects.bulk_create(_missing_rows(missing), ignore_conflicts=True)
+        found.update({name: (version, updated_at) for name, version, updated_at in _rows(missing)})
+    return [found[name] for name in names]
+
+
+async def _aread(names):
+    found = {name: (version, updated_at) async for name, version, updated_at in _rows(names)}
+    missing = [name for name in names if name not in found]
+    if missing:
+        await ContentVersion.objects.abulk_create(_missing_rows(missing), ignore_conflicts=True)
+        found.update({name: (version, updated_at) async for name, version, updated_at in _rows(missing)})
+    return [found[name] for name in names]
+
+
+def _state(states):
+    return tuple(version for version, _ in states), max(updated_at for _, updated_at in states)
+
+
+def get_state(models, request=None):
+    """
+    `(versions, last modified)` of `models`: the current version of each, in
+    order, and the time of the latest bump among them. Read once per `request`.
+    """
+    if request is None:
+        return _state(_read([_name(model) for model in models]))
+    request = getattr(request, '_request', request)  # The HttpRequest behind a DRF Request
+    memo = request.__dict__.setdefault('_content_versions', {})
+    key = tuple(models)
+    if key not in memo:
+        memo[key] = _state(_read([_name(model) for model in models]))
+    return memo[key]
+
+
+async def aget_state(models):
+    return _state(await _aread([_name(model) for model in models]))
+
+
+def get_versions(models, request=None):
+    """Current version of each model, in order."""
+    return get_state(models, request)[0]
+
+
+def get_version_map():
+    values = [version for version, _ in _read([GLOBAL_NAME] + [_name(model) for model in CONTENT_MODELS])]
+    return {
+        'version': values[0],
+        'models': {
+            RESOURCE_NAMES[_name(model)]: value
+            for model, value in zip(CONTENT_MODELS, values[1:])
+        },
+    }
+
+
+def _bump(models):
+    names = {_name(model) for model in models} | {GLOBAL_NAME}
+    if ContentVersion.objects.filter(name__in=names).update(version=F('version') + 1, updated_at=timezone.now()) < len(names):
+        ContentVersion.objects.bulk_create(_missing_rows(names), ignore_conflicts=True)
+
+
+def bump(*models):
+    """Advance the version of `models` and the global version, in the current transaction if any."""
+    _bump(models)
+
+
+@receiver(content_changed)
+def _bump_on_change(sender, **kwargs):
+    bump(sender)
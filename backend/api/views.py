@@ -1,8 +1,25 @@
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .bulk import BulkMixin
+from .cache import CachedResponseMixin, stats as cache_stats
+from .conditional import ConditionalGetMixin
+from .metrics import registry as metrics_registry, timed
+from .pagination import KeysetPagination, SearchPagination
+from .search import search
+from .tags import facets, filter_by_tags, parse_tag_mode
 from .models import Project, Testimonial, Service, HomeStats, ContentSection, ContactInfo
+from .versions import get_version_map
 from .serializers import (
     ProjectSerializer, TestimonialSerializer, ServiceSerializer, 
-    HomeStatsSerializer, ContentSectionSerializer, ContactInfoSerializer
+    HomeStatsSerializer, ContentSectionSerializer, ContactInfoSerializer,
+    ProjectValuesSerializer, TestimonialValuesSerializer, ServiceValuesSerializer,
+    HomeStatsValuesSerializer, ContentSectionValuesSerializer, ContactInfoValuesSerializer,
 )
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -11,10 +28,112 @@ class IsAdminOrReadOnly(permissions.BasePermission):
             return True
         return request.user and request.user.is_staff
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class PublicReadMixin:
+    """
+    Authenticate lazily. DRF normally authenticates before the permission
+    check; with IsAdminOrReadOnly a safe request never looks at the user, so
+    reads skip token decoding altogether (a stale token does not fail them).
+    """
+
+    def perform_authentication(self, request):
+        if request.method not in permissions.SAFE_METHODS:
+            super().perform_authentication(request)
+
+class ImageStatusMixin:
+    """Lets the admin UI poll a background image upload (see api.uploads)."""
+
+    @action(detail=True, methods=['get'], url_path='image-status')
+    def image_status(self, request, pk=None):
+        data = self.get_serializer(self.get_object()).data
+        return Response({'imageStatus': data['imageStatus'], 'imageUrl': data['imageUrl']})
+
+class SearchMixin:
+    """
+    `?q=` full-text search on the list (see api.search). Combines with the
+    other filters; results come best match first, paginated by SearchPagination.
+    """
+    search_query_param = 'q'
+
+    def get_search_query(self):
+        if self.action != 'list':
+            return ''
+        return self.request.query_params.get(self.search_query_param, '').strip()
+
+    @property
+    def paginator(self):
+        if not self.get_search_query():
+            return super().paginator
+        if not hasattr(self, '_search_paginator'):
+            self._search_paginator = SearchPagination()
+        return self._search_paginator
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        query = self.get_search_query()
+        return search(queryset, query) if query else queryset
+
+class ValuesListMixin:
+    """
+    Serve list GETs from `.values()` rows through `values_serializer_class`
+    instead of building model instances and a ModelSerializer per row.
+    Leave `values_serializer_class` unset to keep the regular list path.
+    """
+    values_serializer_class = None
+
+    def get_sparse_fields(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        serializer_class = self.values_serializer_class
+        fields = self.get_sparse_fields()
+        columns = serializer_class.columns if fields is None else serializer_class.columns_for(fields)
+        queryset = self.filter_queryset(self.get_queryset()).values(*columns)
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer_class(page, context=context, fields=fields).data)
+        return Response(serializer_class(queryset, context=context, fields=fields).data)
+
+class SparseFieldsMixin:
+    """
+    `?fields=id,title` and `?omit=description` on list and detail GETs. The
+    output keeps only the remaining fields, and the query selects only the
+    columns they are read from (`.values()` on lists, `.only()` on details),
+    so large text columns are not even read. Names are those of the output,
+    as listed by `values_serializer_class.field_names()`.
+    """
+
+    def get_sparse_fields(self):
+        if self.action not in ('list', 'retrieve'):
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = self.values_serializer_class.sparse_fields(self.request.query_params)
+        return self._sparse_fields
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if fields is not None and self.action == 'retrieve':
+            queryset = queryset.only(*self.values_serializer_class.columns_for(fields))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            for name in set(serializer.fields) - set(fields):
+                serializer.fields.pop(name)
+        return serializer
+
+class ProjectViewSet(PublicReadMixin, CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin, SearchMixin, ValuesListMixin, ImageStatusMixin, BulkMixin, viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
+    values_serializer_class = ProjectValuesSerializer
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         queryset = Project.objects.all()
@@ -22,16 +141,29 @@ class ProjectViewSet(viewsets.ModelViewSet):
         limit = self.request.query_params.get('limit')
         if featured == 'true':
             queryset = queryset.filter(featured=True)
+        queryset = filter_by_tags(queryset, self.request.query_params.getlist('tag'), self.get_tag_mode())
         
-        if limit and limit.isdigit():
+        # ?limit= is the legacy way of asking for the first N rows; keyset pages
+        # replace it when the client opts into pagination.
+        if limit and limit.isdigit() and not self.paginator.is_requested(self.request):
             queryset = queryset[:int(limit)]
             
         return queryset
 
-class TestimonialViewSet(viewsets.ModelViewSet):
+    def get_tag_mode(self):
+        return parse_tag_mode(self.request.query_params)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Tags in use with their project counts, most used first (see api.tags)."""
+        return Response({'tags': facets()})
+
+class TestimonialViewSet(PublicReadMixin, CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin, SearchMixin, ValuesListMixin, ImageStatusMixin, BulkMixin, viewsets.ModelViewSet):
     queryset = Testimonial.objects.all()
     serializer_class = TestimonialSerializer
+    values_serializer_class = TestimonialValuesSerializer
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         queryset = Testimonial.objects.all()
@@ -40,19 +172,22 @@ class TestimonialViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(featured=True)
         return queryset
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(PublicReadMixin, CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin, SearchMixin, ValuesListMixin, BulkMixin, viewsets.ModelViewSet):
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
+    values_serializer_class = ServiceValuesSerializer
     permission_classes = [IsAdminOrReadOnly]
 
-class HomeStatsViewSet(viewsets.ModelViewSet):
+class HomeStatsViewSet(PublicReadMixin, CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin, BulkMixin, viewsets.ModelViewSet):
     queryset = HomeStats.objects.all()
     serializer_class = HomeStatsSerializer
+    values_serializer_class = HomeStatsValuesSerializer
     permission_classes = [IsAdminOrReadOnly]
 
-class ContentSectionViewSet(viewsets.ModelViewSet):
+class ContentSectionViewSet(PublicReadMixin, CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin, ImageStatusMixin, viewsets.ModelViewSet):
     queryset = ContentSection.objects.all()
     serializer_class = ContentSectionSerializer
+    values_serializer_class = ContentSectionValuesSerializer
     permission_classes = [IsAdminOrReadOnly]
     # lookup_field = 'section'  <-- Remove this to allow ID lookup (content/1/)
     
@@ -63,11 +198,95 @@ class ContentSectionViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(section=section)
         return queryset
 
-class ContactInfoViewSet(viewsets.ModelViewSet):
+class ContactInfoViewSet(PublicReadMixin, CachedResponseMixin, ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = ContactInfo.objects.all()
     serializer_class = ContactInfoSerializer
+    values_serializer_class = ContactInfoValuesSerializer
     permission_classes = [IsAdminOrReadOnly]
 
     # Since it's a singleton (mostly), we might want valid list behavior or just 1.
     # The frontend expects a single object sometimes? No, `getContactInfo` in firebase returned the first doc.
     # We'll allow list, frontend can pick [0].
+
+
+class HomepageBundleView(CachedResponseMixin, APIView):
+    """
+    Everything the homepage needs in a single round trip.
+
+    Each collection is rendered with the same serializer as its own endpoint, so
+    the payload under each key is identical to GET-ing that endpoint directly.
+    Use `?include=projects,services` to only fetch some of them.
+    """
+    permission_classes = [IsAdminOrReadOnly]
+    authentication_classes = []  # Public, read-only: no need to decode JWTs
+
+    collections = {
+        'projects': (Project.objects.filter(featured=True), ProjectSerializer),
+        'testimonials': (Testimonial.objects.filter(featured=True), TestimonialSerializer),
+        'services': (Service.objects.all(), ServiceSerializer),
+        'home-stats': (HomeStats.objects.all(), HomeStatsSerializer),
+        'content': (ContentSection.objects.all(), ContentSectionSerializer),
+        'contact-info': (ContactInfo.objects.all(), ContactInfoSerializer),
+    }
+
+    def get_cache_models(self):
+        return [queryset.model for queryset, _ in self.collections.values()]
+
+    def get_included(self):
+        include = self.request.query_params.get('include')
+        if not include:
+            return list(self.collections)
+        names = [name.strip() for name in include.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.collections]
+        if unknown:
+            raise ValidationError({
+                'include': f"Unknown collection(s): {', '.join(unknown)}. "
+                           f"Choose from: {', '.join(self.collections)}."
+            })
+        return names
+
+    def get(self, request):
+        data = {}
+        with timed('serialize'):
+            for name in self.get_included():
+                queryset, serializer_class = self.collections[name]
+                serializer = serializer_class(queryset.all(), many=True, context={'request': request})
+                data[name] = serializer.data
+        return Response(data)
+
+
+class CacheStatsView(APIView):
+    """Hit/miss counters of the API response cache for this worker process."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats.as_dict())
+
+
+class MetricsView(APIView):
+    """Per-route request metrics of this worker process in Prometheus text format (see api.metrics)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ContentVersionView(APIView):
+    """
+    Current content versions, global and per collection.
+
+    Cheap enough to poll: one query on the version table (see api.versions),
+    never on the content tables. Versions are shared by every worker and only
+    go up. The global version doubles as the ETag, so a poll with
+    `If-None-Match` gets an empty 304 while nothing has changed.
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        versions = get_version_map()
+        etag = quote_etag(str(versions['version']))
+        response = get_conditional_response(request, etag=etag) or Response(versions)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
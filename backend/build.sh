@@ -14,6 +14,7 @@ rm -rf staticfiles/
 
 python manage.py collectstatic --noinput
 python manage.py migrate
+python manage.py createcachetable
 
 # Create superuser from environment variables (skips if already exists)
 if [ "$DJANGO_SUPERUSER_USERNAME" ]; then
@@ -21,4 +22,8 @@ if [ "$DJANGO_SUPERUSER_USERNAME" ]; then
 fi
 
 # Seed initial data (safe to run multiple times)
-python seed_data.py
\ No newline at end of file
+python seed_data.py
+# Pre-render the public JSON snapshots (kept up to date on writes afterwards)
+if [ "$API_SNAPSHOTS" = "True" ]; then
+  python manage.py build_snapshots
+fi
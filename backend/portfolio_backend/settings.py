@@ -9,9 +9,11 @@ https://docs.djangoproject.com/en/6.0/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
+import importlib.util
 import os
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,17 +50,36 @@ INSTALLED_APPS = [
     'api',
 ]
 
+# api.middleware holds the Django middleware of the same names, except that
+# session, CSRF, auth, messages and clickjacking are skipped under
+# API_LEAN_PATH_PREFIXES: they only serve the admin (see api/middleware.py).
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.SecurityMiddleware',
+    'api.compression.CompressionMiddleware',
+    'api.middleware.AsyncWhiteNoiseMiddleware',
+    'api.middleware.SessionMiddleware',
+    'api.middleware.CommonMiddleware',
+    'api.middleware.CsrfViewMiddleware',
+    'api.middleware.AuthenticationMiddleware',
+    'api.middleware.MessageMiddleware',
+    'api.middleware.XFrameOptionsMiddleware',
 ]
+API_LEAN_PATH_PREFIXES = ['/api/']
+
+# gzip/brotli for API JSON of at least API_COMPRESS_MIN_SIZE bytes; encoded
+# bodies are cached next to the response cache (see api/compression.py)
+API_COMPRESS_PATH_PREFIXES = ['/api/']
+API_COMPRESS_MIN_SIZE = int(os.environ.get('API_COMPRESS_MIN_SIZE', '1024'))
+API_COMPRESS_GZIP_LEVEL = 6
+API_COMPRESS_BROTLI_QUALITY = 8  # Bodies are cached, so spend a little more CPU once
+
+# Per-request SQL/auth/serialization timing, Server-Timing headers and
+# GET /api/metrics/ (see api/metrics.py). First, so it times every other middleware.
+API_METRICS = os.environ.get('API_METRICS', 'False') == 'True'
+API_METRICS_WINDOW = int(os.environ.get('API_METRICS_WINDOW', '1000'))  # Requests per route kept for quantiles
+if API_METRICS:
+    MIDDLEWARE.insert(0, 'api.metrics.RequestMetricsMiddleware')
 
 ROOT_URLCONF = 'portfolio_backend.urls'
 
@@ -86,10 +107,62 @@ WSGI_APPLICATION = 'portfolio_backend.wsgi.application'
 DATABASES = {
     'default': dj_database_url.config(
         default='sqlite:///' + str(BASE_DIR / 'db.sqlite3'),
-        conn_max_age=600
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', '600')),
+        # Test reused connections before the first query of a request, so a
+        # database restart costs one reconnect instead of a failed request
+        conn_health_checks=os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
     )
 }
 
+# PostgreSQL: Django's connection pool (psycopg 3 with psycopg_pool) instead of
+# one persistent connection per thread. Connections are returned to the pool
+# at the end of each request, so CONN_MAX_AGE must be 0.
+DB_POOL = os.environ.get('DB_POOL', 'True') == 'True'
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '10'))  # Seconds to wait for a free connection
+DB_POOL_MAX_IDLE = float(os.environ.get('DB_POOL_MAX_IDLE', '600'))  # Seconds before an idle connection is closed
+
+# SQLite: memory-mapped reads, and a busy timeout instead of "database is
+# locked". Writes start with BEGIN IMMEDIATE, so a transaction never fails to
+# upgrade from a read lock halfway through.
+# DB_SQLITE_JOURNAL_MODE=WAL turns on the write-ahead log (readers no longer
+# block on the writer), with fsync at checkpoints only (synchronous=NORMAL).
+# It is opt-in: the journal mode is written into the database file itself, and
+# the committed db.sqlite3 must not change just by being opened.
+DB_SQLITE_TUNED = os.environ.get('DB_SQLITE_TUNED', 'True') == 'True'
+DB_SQLITE_JOURNAL_MODE = os.environ.get('DB_SQLITE_JOURNAL_MODE', '')
+DB_SQLITE_SYNCHRONOUS = os.environ.get(
+    'DB_SQLITE_SYNCHRONOUS', 'NORMAL' if DB_SQLITE_JOURNAL_MODE.upper() == 'WAL' else 'FULL',
+)
+DB_SQLITE_MMAP_SIZE = int(os.environ.get('DB_SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)))
+DB_SQLITE_BUSY_TIMEOUT = float(os.environ.get('DB_SQLITE_BUSY_TIMEOUT', '5'))  # Seconds
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    if DB_POOL and importlib.util.find_spec('psycopg_pool') is not None:
+        from psycopg_pool import ConnectionPool
+
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+            'max_idle': DB_POOL_MAX_IDLE,
+        }
+        if DATABASES['default']['CONN_HEALTH_CHECKS']:
+            # The pool's equivalent: test each connection as it is handed out
+            DATABASES['default']['OPTIONS']['pool']['check'] = ConnectionPool.check_connection
+elif DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' and DB_SQLITE_TUNED:
+    DATABASES['default'].setdefault('OPTIONS', {}).update({
+        'init_command': (
+            (f'PRAGMA journal_mode={DB_SQLITE_JOURNAL_MODE};' if DB_SQLITE_JOURNAL_MODE else '')
+            + f'PRAGMA synchronous={DB_SQLITE_SYNCHRONOUS};'
+            + f'PRAGMA mmap_size={DB_SQLITE_MMAP_SIZE};'
+        ),
+        'timeout': DB_SQLITE_BUSY_TIMEOUT,
+        'transaction_mode': 'IMMEDIATE',
+    })
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -130,6 +203,19 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Pre-rendered JSON of the public endpoints, served at API_SNAPSHOT_URL (see
+# api/snapshots.py). Build with `manage.py build_snapshots`; with API_SNAPSHOTS
+# on, content changes rebuild the affected files in the background.
+API_SNAPSHOTS = os.environ.get('API_SNAPSHOTS', 'False') == 'True'
+API_SNAPSHOT_ROOT = os.environ.get('API_SNAPSHOT_ROOT', str(BASE_DIR / 'snapshots'))
+API_SNAPSHOT_URL = '/snapshots/'
+API_SNAPSHOT_BASE_URL = os.environ.get('API_SNAPSHOT_BASE_URL', '')  # Origin of absolute media URLs, e.g. https://api.example.com; required
+API_SNAPSHOT_GRACE = int(os.environ.get('API_SNAPSHOT_GRACE', '300'))
+
+# Uploads wait here until a background job pushes them to STORAGES["default"]
+MEDIA_STAGING_ROOT = os.environ.get('MEDIA_STAGING_ROOT', str(BASE_DIR / 'staging'))
+API_ASYNC_UPLOADS = os.environ.get('API_ASYNC_UPLOADS', 'True') == 'True'
+
 # Cloudinary cloud storage for media files (persistent across deploys)
 CLOUDINARY_STORAGE = {
     'CLOUD_NAME': os.environ.get('CLOUDINARY_CLOUD_NAME', ''),
@@ -154,10 +240,92 @@ STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 CORS_ALLOW_ALL_ORIGINS = True
 
 
+# Background work (see api/tasks.py)
+API_TASK_WORKERS = int(os.environ.get('API_TASK_WORKERS', '2'))
+
+# Responsive image variants (see api/images.py)
+IMAGE_VARIANT_WIDTHS = [int(w) for w in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,640,1024,1600').split(',')]
+IMAGE_VARIANT_FORMATS = os.environ.get('IMAGE_VARIANT_FORMATS', 'avif,webp').split(',')
+IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', '80'))
+
+
+# Caching
+# API_CACHE selects the backend for the public API response cache:
+#   locmem - per process (default; content versions are in the database, so a
+#            write still reaches every worker)
+#   file   - shared by every worker on the host, stored in API_CACHE_LOCATION
+#   db     - shared through the database (run `manage.py createcachetable`)
+#   dummy  - disables caching
+API_CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+API_CACHE = os.environ.get('API_CACHE', 'locmem')
+API_CACHE_LOCATIONS = {
+    'locmem': 'api-cache',
+    'file': os.environ.get('API_CACHE_LOCATION', str(BASE_DIR / '.cache' / 'api')),
+    'db': os.environ.get('API_CACHE_LOCATION', 'api_cache'),
+    'dummy': '',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': API_CACHE_BACKENDS[API_CACHE],
+        'LOCATION': API_CACHE_LOCATIONS[API_CACHE],
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('API_CACHE_MAX_ENTRIES', '1000'))},
+    },
+}
+API_CACHE_ALIAS = 'api'
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', str(60 * 60 * 24)))
+API_CACHE_ENABLED = API_CACHE != 'dummy'
+
+
+# Authorize from the is_staff/is_superuser claims of the JWT instead of loading
+# the user on every request (see api/authentication.py). Revoked tokens must be
+# refused by every worker and revocations must never be evicted, so this needs
+# API_AUTH_CACHE, a cache of their own shared between processes:
+#   file - stored in API_AUTH_CACHE_LOCATION, for workers on one host
+#   db   - a database table (run `manage.py createcachetable`)
+# Without it, every authenticated request loads the user (the default).
+API_AUTH_CACHE = os.environ.get('API_AUTH_CACHE', '')
+API_AUTH_CACHE_LOCATIONS = {
+    'file': os.environ.get('API_AUTH_CACHE_LOCATION', str(BASE_DIR / '.cache' / 'auth')),
+    'db': os.environ.get('API_AUTH_CACHE_LOCATION', 'api_auth_cache'),
+}
+if API_AUTH_CACHE and API_AUTH_CACHE not in API_AUTH_CACHE_LOCATIONS:
+    raise ImproperlyConfigured(f"API_AUTH_CACHE must be one of: {', '.join(API_AUTH_CACHE_LOCATIONS)}")
+if API_AUTH_CACHE:
+    CACHES['auth'] = {
+        'BACKEND': API_CACHE_BACKENDS[API_AUTH_CACHE],
+        'LOCATION': API_AUTH_CACHE_LOCATIONS[API_AUTH_CACHE],
+        # One entry per revoked user, expiring with its tokens: never cull
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+    }
+API_AUTH_CACHE_ALIAS = 'auth' if API_AUTH_CACHE else 'default'
+API_JWT_STATELESS = os.environ.get('API_JWT_STATELESS', str(bool(API_AUTH_CACHE))) == 'True'
+if API_JWT_STATELESS and not API_AUTH_CACHE:
+    raise ImproperlyConfigured('API_JWT_STATELESS needs API_AUTH_CACHE, so that revocations reach every worker')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication' if API_JWT_STATELESS else 'api.authentication.JWTAuthentication',
     ),
+    # orjson-backed, byte-identical to DRF's JSON (see api/renderers.py); use
+    # api.renderers.JSONRenderer and rest_framework.parsers.JSONParser for the stdlib
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny', # Default (we will restrict properties in Views)
     ],
@@ -167,5 +335,19 @@ from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'TOKEN_OBTAIN_SERIALIZER': 'api.authentication.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'api.authentication.TokenRefreshSerializer',
 }
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One JSON line per request when API_METRICS is on
+        'api.metrics': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
@@ -1,10 +1,21 @@
+import argparse
 import os
+import random
 import django
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "portfolio_backend.settings")
 django.setup()
 
+from django.db import transaction
 from api.models import ContentSection, ContactInfo, HomeStats, Service, Testimonial, Project
+from api.signals import batched_changes, changed
+
+WORDS = (
+    "design development platform mobile cloud data analytics brand strategy product "
+    "research commerce secure fast modern scalable experience team client launch growth"
+).split()
+TAGS = ["Next.js", "React", "Django", "PostgreSQL", "Tailwind", "Stripe", "Firebase", "AWS", "Figma", "TypeScript"]
+
 
 def seed():
     # Content Sections
@@ -140,5 +151,59 @@ def seed():
     # Defaults
     print("Database seeded successfully!")
 
+def seed_synthetic(projects=0, testimonials=0, services=0, seed=0, batch_size=1000):
+    """
+    Add generated rows for benchmarking. The same `seed` always produces the
+    same content, so datasets are comparable between runs.
+    """
+    rng = random.Random(seed)
+
+    def text(words):
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    with transaction.atomic(), batched_changes():
+        Project.objects.bulk_create([
+            Project(
+                title=text(3)[:-1],
+                description=text(rng.randint(20, 80)),
+                image_url_fallback=f"https://picsum.photos/seed/{i}/800/600",
+                tags=rng.sample(TAGS, rng.randint(1, 4)),
+                link=f"https://example.com/projects/{i}",
+                featured=rng.random() < 0.1,
+                order=i,
+            )
+            for i in range(projects)
+        ], batch_size=batch_size)
+        Testimonial.objects.bulk_create([
+            Testimonial(
+                name=f"Client {i}",
+                role=rng.choice(["CEO", "CTO", "Product Manager", "Founder"]),
+                company=f"{text(1)[:-1]} Inc",
+                content=text(rng.randint(15, 50)),
+                rating=rng.randint(3, 5),
+                featured=rng.random() < 0.1,
+                order=i,
+            )
+            for i in range(testimonials)
+        ], batch_size=batch_size)
+        Service.objects.bulk_create([
+            Service(title=text(2)[:-1], description=text(rng.randint(10, 30)), icon="code", order=i)
+            for i in range(services)
+        ], batch_size=batch_size)
+        for model, count in ((Project, projects), (Testimonial, testimonials), (Service, services)):
+            if count:
+                changed(model)
+    print(f"Created {projects} synthetic projects, {testimonials} testimonials and {services} services")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed the database with default content")
+    parser.add_argument("--projects", type=int, default=0, help="Also create N synthetic projects")
+    parser.add_argument("--testimonials", type=int, default=0, help="Also create N synthetic testimonials")
+    parser.add_argument("--services", type=int, default=0, help="Also create N synthetic services")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for synthetic content")
+    args = parser.parse_args()
+
     seed()
+    if args.projects or args.testimonials or args.services:
+        seed_synthetic(args.projects, args.testimonials, args.services, seed=args.seed)
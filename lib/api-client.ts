@@ -81,6 +81,37 @@ const mapContent = (p: any): ContentSection => ({
   updatedAt: mapDate(p.updated_at || p.updatedAt),
 })
 
+const mapContact = (p: any): ContactInfo => ({
+  ...p,
+  updatedAt: mapDate(p.updated_at || p.updatedAt),
+})
+
+// Homepage bundle: the homepage collections in one request (featured projects
+// and testimonials only). `include` narrows it to some of them.
+export interface HomepageBundle {
+  projects: Project[]
+  testimonials: Testimonial[]
+  services: Service[]
+  homeStats: HomeStats[]
+  content: ContentSection[]
+  contactInfo: ContactInfo | null
+}
+
+export type HomepageCollection = "projects" | "testimonials" | "services" | "home-stats" | "content" | "contact-info"
+
+export async function getHomepageBundle(include?: HomepageCollection[]): Promise<HomepageBundle> {
+  const query = include ? `?include=${include.join(",")}` : ""
+  const data = await fetchAPI(`bundle/${query}`)
+  return {
+    projects: data?.projects ? data.projects.map(mapProject) : [],
+    testimonials: data?.testimonials ? data.testimonials.map(mapTestimonial) : [],
+    services: data?.services ? data.services.map(mapService) : [],
+    homeStats: data?.["home-stats"] || [],
+    content: data?.content ? data.content.map(mapContent) : [],
+    contactInfo: data?.["contact-info"]?.length ? mapContact(data["contact-info"][0]) : null,
+  }
+}
+
 // Projects CRUD
 export async function getProjects(): Promise<Project[]> {
   const data = await fetchAPI("projects/")
@@ -188,6 +219,30 @@ export async function deleteHomeStat(id: string) {
   })
 }
 
+// Batch operations (projects, testimonials, services, home-stats)
+type BulkResource = "projects" | "testimonials" | "services" | "home-stats"
+
+export interface BulkOperations {
+  create?: Record<string, unknown>[]
+  update?: ({ id: string } & Record<string, unknown>)[]
+  delete?: string[]
+}
+
+export async function bulkUpdate(resource: BulkResource, operations: BulkOperations) {
+  return await fetchAPI(`${resource}/bulk/`, {
+    method: "POST",
+    body: JSON.stringify(operations),
+  })
+}
+
+// Rewrites `order` to match the position of each id, in one request
+export async function reorder(resource: BulkResource, ids: string[]) {
+  return await fetchAPI(`${resource}/reorder/`, {
+    method: "POST",
+    body: JSON.stringify({ ids }),
+  })
+}
+
 // Content Sections CRUD
 export async function getAllContentSections(): Promise<ContentSection[]> {
   const data = await fetchAPI("content/")
@@ -213,7 +268,7 @@ export async function createContentSection(data: Omit<ContentSection, "id" | "up
 // Contact Info CRUD
 export async function getContactInfo(): Promise<ContactInfo | null> {
   const data = await fetchAPI("contact-info/")
-  return Array.isArray(data) && data.length > 0 ? data[0] : null
+  return Array.isArray(data) && data.length > 0 ? mapContact(data[0]) : null
 }
 
 export async function updateContactInfo(id: string, data: Partial<ContactInfo>) {
@@ -53,6 +53,16 @@ const mapContact = (d: any): ContactInfo => ({
   updatedAt: new Date(d.updated_at || d.updatedAt),
 })
 
+// Content versions: a few bytes that change whenever backend content does
+export interface ContentVersions {
+  version: number
+  models: Record<string, number>
+}
+
+export async function getContentVersions(): Promise<ContentVersions | null> {
+  return await fetchAPI("versions/")
+}
+
 // Projects
 export async function getProjects(): Promise<Project[]> {
   const data = await fetchAPI("projects/")